@@ -27,7 +27,6 @@ setup(
         "Development Status :: 3 - Alpha",
         "License :: OSI Approved :: GNU General Public License v3 (GPLv3)",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "Environment :: Console",
@@ -35,11 +34,13 @@ setup(
     ],
     include_package_data=True,
     package_dir={'': 'src'},
+    python_requires=">=3.7",
     install_requires=['mcstatus', 'requests'],
     setup_requires=['wheel'],
     entry_points={
         "console_scripts": [
             "mcctl=mcctl.__main__:main",
+            "mcctld=mcctl.daemon:main",
         ]
     },
 )
@@ -28,7 +28,8 @@ CFGVARS = ConfigParser()
 
 try:
     LOGIN_USER = os.getlogin()
-except FileNotFoundError:
+except OSError:
+    # No controlling Terminal, e.g. in Cron Jobs or Services.
     LOGIN_USER = "nobody"
 _USERDATA = getpwnam(LOGIN_USER)
 
@@ -41,6 +42,9 @@ _SYSTEM_DEFAULTS = {
     'systemd_service': 'mcserver',
     'server_user': 'mcserver',
     'env_file': 'jvm-env',
+    'http_cache_ttl': '300',
+    'jar_cache_size': '4G',
+    'daemon_socket': '/run/mcctld.sock',
 }
 _USER_DEFAULTS = {
     'editor': 'vim',
@@ -53,11 +57,15 @@ CFGVARS['user'] = _USER_DEFAULTS
 
 
 def read_cfg() -> None:
-    """Read Configuration Files."""
+    """Read Configuration Files.
+
+    The User Config is copied to /tmp to be readable after elevation, but only if the Copy is outdated.
+    """
     if os.getuid() == _USERDATA.pw_uid and _USERCFG.is_file():
         try:
-            copy(_USERCFG, _TMPCFG)
-            os.chmod(_TMPCFG, 0o0664)
+            if not _TMPCFG.is_file() or _TMPCFG.stat().st_mtime < _USERCFG.stat().st_mtime:
+                copy(_USERCFG, _TMPCFG)
+                os.chmod(_TMPCFG, 0o0664)
         except OSError as ex:
             print(f"WARN: Unable to copy User Config: {ex}")
 
@@ -22,4 +22,14 @@
 __version__ = "0.3.1"
 
 from mcctl.__config__ import CFGVARS  # noqa: F401
-from mcctl import common, config, proc, service, storage, visuals, web  # noqa: F401
+
+_SUBMODULES = ("backup", "common", "config", "daemon", "exporter", "jars", "logs", "metrics", "proc", "rcon", "service",
+               "storage", "visuals", "web")
+
+
+def __getattr__(name: str):
+    """Import Submodules on first Access, so importing mcctl only loads what is used."""
+    if name in _SUBMODULES:
+        import importlib  # pylint: disable=import-outside-toplevel
+        return importlib.import_module(f"mcctl.{name}")
+    raise AttributeError(f"module 'mcctl' has no attribute '{name}'")
@@ -21,10 +21,39 @@
 import re
 import sys
 import inspect
+import importlib
 import argparse as ap
 from typing import Callable
+from datetime import datetime
 from mcctl.__config__ import LOGIN_USER, read_cfg, write_cfg
-from mcctl import proc, storage, service, web, common, CFGVARS, __version__
+from mcctl import daemon, CFGVARS, __version__
+
+
+class lazy:  # pylint: disable=invalid-name
+    """A Function of a mcctl Module, which is only imported when the Function is called or inspected.
+
+    Only the Modules needed by the chosen Action are imported, so mcctl starts fast and the Import Cost is not
+    paid twice if the Process restarts itself with sudo.
+
+    Arguments:
+        module (str): The Name of the Module in mcctl.
+        name (str): The Name of the Function.
+    """
+
+    def __init__(self, module: str, name: str):
+        self.module = module
+        self.name = name
+
+    def resolve(self) -> Callable:
+        """Import the Module and return the Function."""
+        return getattr(importlib.import_module(f"mcctl.{self.module}"), self.name)
+
+    @property
+    def __signature__(self) -> inspect.Signature:
+        return inspect.signature(self.resolve())
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
 
 
 def get_permlevel(args: ap.Namespace, elevation: dict) -> dict:
@@ -74,11 +103,11 @@ def apply_permlevel(permlevel: dict) -> None:
             - "usr": The user to elevate to via sudo.
             - "eusr" (optional): The user of which the EIDs are set.
     """
-    proc.elevate(permlevel.get('usr'))
+    lazy("proc", "elevate")(permlevel.get('usr'))
     demote_user = permlevel.get('eusr')
     if demote_user:
-        user_ids = proc.get_ids(demote_user)
-        proc.run_as(*user_ids)
+        user_ids = lazy("proc", "get_ids")(demote_user)
+        lazy("proc", "run_as")(*user_ids)
 
 
 def filter_args(unfiltered_kwargs: dict, func: Callable) -> dict:
@@ -129,12 +158,25 @@ def get_parser() -> ap.ArgumentParser:
                 "must be in the form '<TYPE>:<VERSION>:<BUILD>' or 'all'.")
         return value
 
+    def check_instance_name(value: str) -> str:
+        # Names are used as Path Components below the Instance Folder, also for Requests to mcctld.
+        if not value or "/" in value or "\0" in value or value in (".", ".."):
+            raise ap.ArgumentTypeError("must be a Name without '/', not '.' or '..'.")
+        return value
+
     def check_mem(value: str) -> str:
         test_mem = re.compile(r'^[0-9]+[KMG]$')
         if not test_mem.search(value):
             raise ap.ArgumentTypeError("Must be in Format <NUMBER>{K,M,G}.")
         return value
 
+    def check_time(value: str) -> datetime:
+        try:
+            return lazy("logs", "parse_time")(value)
+        except ValueError:
+            raise ap.ArgumentTypeError(
+                "must be a time like '2020-11-22 13:37', '13:37' or a duration like '30m', '12h', '2d'.") from None
+
     default_err_template = "{args.action} instance '{args.instance}'"
     default_elev = {"default": "server_user"}
     default_semi_elev = {"default": "server_user", "change_to": "root"}
@@ -154,6 +196,8 @@ def get_parser() -> ap.ArgumentParser:
         add_help=False, formatter_class=ap.RawTextHelpFormatter)
     type_id_parser.add_argument(
         "-u", "--url", dest="literal_url", action='store_true', help="Treat the TypeID Value as a URL.")
+    type_id_parser.add_argument(
+        "-o", "--offline", action='store_true', help="Resolve the TypeID with the Version Catalog (see 'sync') and only use cached Files.")
     type_id_parser.add_argument(
         "source", metavar="TYPEID_OR_URL", type=check_type_id,
         help=("Type ID in '<TYPE>:<VERSION>:<BUILD>' format.\n"
@@ -164,7 +208,7 @@ def get_parser() -> ap.ArgumentParser:
 
     instance_name_parser = ap.ArgumentParser(add_help=False)
     instance_name_parser.add_argument(
-        "instance", metavar="INSTANCE_ID", help="Instance Name of the Minecraft Server.")
+        "instance", metavar="INSTANCE_ID", type=check_instance_name, help="Instance Name of the Minecraft Server.")
     # Optional Instance Name
     instance_subfolder_parser = ap.ArgumentParser(add_help=False)
     instance_subfolder_parser.add_argument(
@@ -174,6 +218,29 @@ def get_parser() -> ap.ArgumentParser:
     message_parser.add_argument(
         "-m", "--message", help="Reason for the restart/stop. Informs the Players on the Server.")
 
+    wait_parser = ap.ArgumentParser(add_help=False)
+    wait_parser.add_argument(
+        "-w", "--wait", action='store_true', help="Return once the Server accepts Connections or has stopped.")
+    wait_parser.add_argument(
+        "-t", "--timeout", type=float, default=120.0, help="Maximum Seconds to wait with '--wait'.")
+
+    # Many Instances for Lifecycle Actions
+    instances_parser = ap.ArgumentParser(add_help=False)
+    instances_parser.add_argument(
+        "instances", metavar="INSTANCE_ID", nargs="*", type=check_instance_name,
+        help="Instance Names or Globs, e.g. 'lobby-*'.")
+    instances_parser.add_argument(
+        "-a", "--all", dest="all_instances", action='store_true', help="Apply to all Instances.")
+
+    jobs_parser = ap.ArgumentParser(add_help=False)
+    jobs_parser.add_argument(
+        "-j", "--jobs", type=int, default=4, help="Amount of Servers starting/stopping at the same Time.")
+
+    drain_parser = ap.ArgumentParser(add_help=False)
+    drain_parser.add_argument(
+        "-d", "--drain", type=float, default=300.0,
+        help="Seconds to wait for Players to leave before restarting populated Servers with a Countdown.")
+
     restart_parser = ap.ArgumentParser(add_help=False)
     restart_parser.add_argument(
         "-r", "--restart", action='store_true', help="Stop the Server, apply config changes, and start it again.")
@@ -185,7 +252,26 @@ def get_parser() -> ap.ArgumentParser:
     parser_attach = subparsers.add_parser(
         "attach", parents=[instance_name_parser], help="Attach to the Console of the Minecraft Instance.")
     parser_attach.set_defaults(
-        func=proc.attach, err_template="attach to '{args.instance}'")
+        func=lazy("proc", "attach"), err_template="attach to '{args.instance}'")
+
+    parser_backup = subparsers.add_parser(
+        "backup", parents=[instance_name_parser], help="Create an incremental, deduplicated Backup of an Instance.")
+    parser_backup.add_argument(
+        "-w", "--world-only", action='store_true', help="Only back up World Data.")
+    parser_backup.add_argument(
+        "-H", "--hot", action='store_true', help="Pause Saving of a running Server only while staging a consistent Copy.")
+    parser_backup.add_argument(
+        "-j", "--jobs", type=int, help="Amount of Files read in parallel. Defaults to the CPU Count.")
+    parser_backup.set_defaults(func=lazy("backup", "create"))
+
+    parser_collect = subparsers.add_parser(
+        "collect", help="Sample Metrics of all Instances periodically, see 'stats'.")
+    parser_collect.add_argument(
+        "-i", "--interval", type=float, default=10.0, help="Seconds between Samples.")
+    parser_collect.add_argument(
+        "-c", "--count", type=int, default=0, help="Stop after COUNT Samples, 0 runs until interrupted.")
+    parser_collect.set_defaults(
+        func=lazy("metrics", "collect"), err_template="collect Metrics")
 
     parser_config = subparsers.add_parser(
         "config", parents=[instance_name_parser, restart_parser, memory_parser], help="Configure/Change Files of a Minecraft Server Instance.")
@@ -194,7 +280,7 @@ def get_parser() -> ap.ArgumentParser:
     parser_config.add_argument(
         "-p", "--properties", nargs="+", help="Change server.properties options, e.g. server-port=25567 'motd=My new and cool Server'.")
     parser_config.set_defaults(
-        func=common.configure, err_template="configure '{args.instance}'", editor=CFGVARS.get('user', 'editor'),
+        func=lazy("common", "configure"), err_template="configure '{args.instance}'", editor=CFGVARS.get('user', 'editor'),
         elevation={
             "default": "server_user",
             "change_to": "root",
@@ -208,7 +294,7 @@ def get_parser() -> ap.ArgumentParser:
     parser_create.add_argument(
         "-p", "--properties", nargs="+", help="server.properties options in 'KEY1=VALUE1 KEY2=VALUE2' Format.")
     parser_create.set_defaults(
-        func=common.create,
+        func=lazy("common", "create"),
         elevation={
             "default": "server_user",
             "change_to": "root",
@@ -219,8 +305,21 @@ def get_parser() -> ap.ArgumentParser:
         "exec", parents=[instance_name_parser], help="Execute a command in the Console of the Instance.")
     parser_exec.add_argument("command", nargs="+",
                              help="Command to execute in the Server Console.")
+    parser_exec.add_argument("-s", "--screen", dest="use_screen", action='store_true',
+                             help="Send the Command via screen even if RCON is enabled.")
     parser_exec.set_defaults(
-        func=proc.mc_exec, err_template="execute command on {args.instance}")
+        func=lazy("proc", "mc_exec"), err_template="execute command on {args.instance}")
+
+    parser_exporter = subparsers.add_parser(
+        "exporter", help="Serve Metrics of all Instances for Prometheus on /metrics.")
+    parser_exporter.add_argument(
+        "-p", "--port", type=int, default=9940, help="The TCP Port to listen on.")
+    parser_exporter.add_argument(
+        "-a", "--address", default="127.0.0.1", help="The Address to listen on.")
+    parser_exporter.add_argument(
+        "-i", "--interval", type=float, default=15.0, help="Seconds between Probes of all Instances.")
+    parser_exporter.set_defaults(
+        func=lazy("exporter", "exporter"), err_template="serve Metrics")
 
     parser_export = subparsers.add_parser(
         "export", parents=[instance_name_parser], help="Export an Instance to a zip File.")
@@ -228,45 +327,81 @@ def get_parser() -> ap.ArgumentParser:
         "-c", "--compress", action='store_true', help="Compress the Archive.")
     parser_export.add_argument(
         "-w", "--world-only", action='store_true', help="Only export World Data.")
+    parser_export.add_argument(
+        "-H", "--hot", action='store_true', help="Pause Saving of a running Server only while staging a consistent Copy.")
+    parser_export.add_argument(
+        "-j", "--jobs", type=int, help="Amount of Files compressed in parallel. Defaults to the CPU Count.")
+    parser_export.add_argument(
+        "-l", "--level", type=int, default=6, choices=range(10), metavar="{0..9}", help="Compression Level.")
     parser_export.set_defaults(
-        func=storage.export, elevation=default_semi_elev)
+        func=lazy("storage", "export"), elevation=default_semi_elev)
 
     parser_inspect = subparsers.add_parser(
         "inspect", parents=[instance_name_parser], help="Inspect the Log of a Server.")
     parser_inspect.add_argument(
         "-n", "--lines", dest="limit", type=int, default=0, help="Limit the line output count to n.")
+    parser_inspect.add_argument(
+        "-s", "--since", type=check_time, help="Only show lines logged after a time, e.g. '2020-11-22 13:37' or '2h'.")
+    parser_inspect.add_argument(
+        "-u", "--until", type=check_time, help="Only show lines logged before a time, e.g. '2020-11-22' or '30m'.")
+    parser_inspect.add_argument(
+        "-g", "--grep", help="Only show lines containing a string.")
     parser_inspect.set_defaults(
-        func=storage.inspect, err_template="{args.action} logs of '{args.instance}'")
+        func=lazy("storage", "inspect"), err_template="{args.action} logs of '{args.instance}'")
 
     parser_list = subparsers.add_parser(
         "ls", help="List Instances, installed Versions, etc.")
     parser_list.add_argument("what", metavar="WHAT", nargs="?", choices=[
-        "instances", "jars"], default="instances", help="What Type (instnaces/jars) return.")
+        "instances", "jars", "backups"], default="instances", help="What Type (instances/jars/backups) return.")
     parser_list.add_argument("-f", "--filter", dest="filter_str",
                              default='', help="Filter by Version or Instance Name, etc.")
     parser_list.set_defaults(
-        func=common.mc_ls, err_template="list {args.what}")
+        func=lazy("common", "mc_ls"), err_template="list {args.what}")
 
     parser_pull = subparsers.add_parser(
-        "pull", parents=[type_id_parser], help="Pull a Server .jar-File from the Internet.")
+        "pull", help="Pull Server .jar-Files from the Internet.", formatter_class=ap.RawTextHelpFormatter)
+    parser_pull.add_argument(
+        "-u", "--url", dest="literal_url", action='store_true', help="Treat the TypeID Values as URLs.")
+    parser_pull.add_argument(
+        "-o", "--offline", action='store_true', help="Resolve the TypeIDs with the Version Catalog (see 'sync') and only use cached Files.")
+    parser_pull.add_argument(
+        "-f", "--file", dest="manifest", metavar="FILE", help="Pull the TypeIDs or URLs listed in FILE, one per Line.")
+    parser_pull.add_argument(
+        "-j", "--jobs", type=int, default=4, help="Amount of concurrent Downloads.")
+    parser_pull.add_argument(
+        "sources", metavar="TYPEID_OR_URL", nargs="*", type=check_type_id,
+        help="Type IDs in '<TYPE>:<VERSION>:<BUILD>' format or URLs, see 'create'.")
     parser_pull.set_defaults(
-        func=web.pull, err_template="{args.action} Server Type '{args.source}'")
+        func=lazy("web", "pull_many"), err_template="{args.action} Server Types")
 
     parser_rename = subparsers.add_parser(
         "rename", parents=[instance_name_parser], help="Rename a Server Instance.")
     parser_rename.add_argument(
-        "new_name", metavar="NEW_NAME", help="The new Name of the Server Instance.")
-    parser_rename.set_defaults(func=common.rename)
+        "new_name", metavar="NEW_NAME", type=check_instance_name, help="The new Name of the Server Instance.")
+    parser_rename.set_defaults(func=lazy("common", "rename"))
+
+    parser_restore = subparsers.add_parser(
+        "restore", parents=[instance_name_parser], help="Restore a Backup to a new Instance.")
+    parser_restore.add_argument(
+        "snapshot", metavar="SNAPSHOT", help="The Snapshot to restore (see 'ls backups'), or 'latest'.")
+    parser_restore.add_argument(
+        "-t", "--target", metavar="NEW_INSTANCE_ID", type=check_instance_name,
+        help="Restore to a different Instance Name.")
+    parser_restore.set_defaults(
+        func=lazy("backup", "restore"), err_template="restore '{args.instance}'")
 
     parser_restart = subparsers.add_parser(
-        "restart", parents=[instance_name_parser, message_parser], help="Restart a Server Instance.")
+        "restart", parents=[instances_parser, jobs_parser, message_parser, wait_parser, drain_parser], help="Restart Server Instances.")
+    parser_restart.add_argument(
+        "-R", "--rolling", action='store_true',
+        help="Restart at most '-j' Servers at a Time, empty Servers first.")
     parser_restart.set_defaults(
-        func=service.notified_set_status, elevation=default_semi_elev)
+        func=lazy("service", "restart_many"), err_template="{args.action} Instances", elevation=default_semi_elev)
 
     parser_remove = subparsers.add_parser(
         "rm", parents=[instance_name_parser], help="Remove a Server Instance.")
     parser_remove.set_defaults(
-        func=storage.remove, err_template="remove '{args.instance}'")
+        func=lazy("storage", "remove"), err_template="remove '{args.instance}'")
 
     parser_remove_jar = subparsers.add_parser(
         "rmj", help="Remove a cached Server Binary.")
@@ -276,26 +411,28 @@ def get_parser() -> ap.ArgumentParser:
               "'<TYPE>:latest' or '<TYPE>:latest-snap' are NOT allowed.\n"
               "'all' removes all cached Files.\n"))
     parser_remove_jar.set_defaults(
-        func=storage.remove_jar, err_template="remove .jar File '{args.source}'")
+        func=lazy("storage", "remove_jar"), err_template="remove .jar File '{args.source}'")
 
     parser_start = subparsers.add_parser(
-        "start", parents=[instance_name_parser], help="Start a Server Instance.")
+        "start", parents=[instances_parser, jobs_parser, wait_parser], help="Start Server Instances.")
     parser_start.add_argument("-p", "--persistent", action='store_true',
                               help="Start even after Reboot.")
     parser_start.set_defaults(
-        func=service.notified_set_status, elevation=default_semi_elev)
+        func=lazy("service", "set_status_many"), err_template="{args.action} Instances", elevation=default_semi_elev)
 
     parser_stop = subparsers.add_parser(
-        "stop", parents=[instance_name_parser, message_parser], help="Stop a Server Instance.")
+        "stop", parents=[instances_parser, jobs_parser, message_parser, wait_parser], help="Stop Server Instances.")
     parser_stop.add_argument("-p", "--persistent", action='store_true',
                              help="Do not start again after Reboot.")
     parser_stop.set_defaults(
-        func=service.notified_set_status, elevation=default_semi_elev)
+        func=lazy("service", "set_status_many"), err_template="{args.action} Instances", elevation=default_semi_elev)
 
     parser_update = subparsers.add_parser(
-        "update", parents=[instance_name_parser, type_id_parser, restart_parser], help="Update a Server Instance.")
+        "update", parents=[instances_parser, type_id_parser, restart_parser, drain_parser], help="Update Server Instances.")
+    parser_update.add_argument(
+        "-j", "--jobs", type=int, default=1, help="Amount of Servers restarting at the same Time.")
     parser_update.set_defaults(
-        func=common.update,
+        func=lazy("common", "update"), err_template="update Instances",
         elevation={
             "default": "server_user",
             "change_to": "root",
@@ -304,9 +441,29 @@ def get_parser() -> ap.ArgumentParser:
 
     parser_shell = subparsers.add_parser(
         "shell", parents=[instance_subfolder_parser], help="Use a Shell to interactively edit a Server Instance.")
-    parser_shell.set_defaults(func=proc.shell, err_template="invoke a Shell",
+    parser_shell.set_defaults(func=lazy("proc", "shell"), err_template="invoke a Shell",
                               shell_path=CFGVARS.get('user', 'shell'))
 
+    parser_stats = subparsers.add_parser(
+        "stats", parents=[instance_name_parser], help="Show the Metrics collected of an Instance.")
+    parser_stats.add_argument(
+        "-s", "--since", type=check_time, help="Only show Samples taken after a time, e.g. '2020-11-22 13:37' or '1h'.")
+    parser_stats.add_argument(
+        "-u", "--until", type=check_time, help="Only show Samples taken before a time, e.g. '2020-11-22' or '30m'.")
+    parser_stats.add_argument(
+        "-r", "--rows", type=int, default=30, help="Maximum Amount of Rows, Samples are aggregated.")
+    parser_stats.set_defaults(
+        func=lazy("metrics", "stats"), err_template="show Metrics of '{args.instance}'")
+
+    parser_sync = subparsers.add_parser(
+        "sync", help="Refresh the Version Catalog used to resolve TypeIDs offline.")
+    parser_sync.add_argument(
+        "sources", metavar="TYPEID", nargs="*", type=check_strict_type_id,
+        help="Additional TypeIDs to add to the Catalog, e.g. 'paper:1.16.4:latest'.")
+    parser_sync.add_argument(
+        "-j", "--jobs", type=int, default=8, help="Amount of parallel Requests.")
+    parser_sync.set_defaults(func=lazy("web", "sync"), err_template="sync the Version Catalog")
+
     parser_wcfg = subparsers.add_parser(
         "write-cfg", help="Write mcctl configuration and exit.")
     parser_wcfg.add_argument("-u", "--user", action="store_true",
@@ -330,8 +487,14 @@ def main() -> None:
     The logic is moved into the other files as much as possible.
     """
     read_cfg()
-    # Determine needed Permission Level and restart with sudo.
     args = get_parser().parse_args()
+    # Let mcctld run the Command if it is running, which needs neither sudo nor a fresh Process State.
+    if args.action in daemon.ACTIONS and not args.verbose:
+        exit_code = daemon.request(sys.argv[1:])
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    # Determine needed Permission Level and restart with sudo.
     plvl = get_permlevel(args, args.elevation)
     try:
         apply_permlevel(plvl)
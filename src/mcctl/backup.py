@@ -0,0 +1,442 @@
+#!/bin/env python3
+
+# mcctl: A Minecraft Server Management Utility written in Python
+# Copyright (C) 2020 Matthias Cotting
+
+# This file is part of mcctl.
+
+# mcctl is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# mcctl is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with mcctl. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import sys
+import json
+import gzip
+import zlib
+import mmap
+import time
+import hashlib
+import tempfile
+from stat import S_ISDIR
+from pathlib import Path
+from datetime import datetime
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor
+from mcctl import config, storage
+
+# Files are split at content-defined Boundaries found with a Gear Rolling Hash (as in FastCDC), so Insertions only
+# change the Chunks around them. Region Files are split by their Chunk Payloads instead, see _store_region().
+CHUNK_MIN = 16 * 1024
+CHUNK_MAX = 256 * 1024
+# A Boundary is where the 16 high Bits of the Hash are zero, about every 64 KiB after CHUNK_MIN.
+_CUT_MASK = 0xFFFF0000
+# 32-bit Values per Byte, derived from fixed Inputs so Boundaries stay the same across Versions and Hosts.
+_GEAR = [int.from_bytes(hashlib.blake2b(bytes([x]), digest_size=4).digest(), "big") for x in range(256)]
+_READ_SIZE = 4 * CHUNK_MAX
+COMPRESSION_LEVEL = 3
+
+# Region Files start with a Table of 1024 Chunk Locations (3 Bytes Sector Offset, 1 Byte Sector Count)
+# followed by a Table of 1024 Chunk Timestamps, see https://minecraft.gamepedia.com/Region_file_format
+SECTOR_SIZE = 4096
+REGION_HEADER_SIZE = 2 * SECTOR_SIZE
+REGION_CHUNKS = 1024
+
+
+def get_repo_path() -> Path:
+    """Return the Path of the Backup Repository.
+
+    Returns:
+        Path: The Path of the Backup Repository.
+    """
+    return storage.get_home_path() / "backups"
+
+
+def _get_chunk_path(chunk_hash: str) -> Path:
+    return get_repo_path() / "chunks" / chunk_hash[:2] / chunk_hash
+
+
+def _get_snapshot_path(instance: str, snapshot: str) -> Path:
+    return get_repo_path() / "snapshots" / instance / f"{snapshot}.json.gz"
+
+
+def store_chunk(data: bytes) -> str:
+    """Store a Chunk in the Repository, if it is not already stored.
+
+    Arguments:
+        data (bytes): The Contents of the Chunk.
+
+    Returns:
+        str: The Hash of the Chunk.
+    """
+    chunk_hash = hashlib.blake2b(data, digest_size=20).hexdigest()
+    chunk_path = _get_chunk_path(chunk_hash)
+    if not chunk_path.exists():
+        storage.create_dirs(chunk_path.parent)
+        # Unique per Writer, identical Chunks are often stored by several Threads at once.
+        tmp_fd, tmp_name = tempfile.mkstemp(".tmp", f"{chunk_hash}.", chunk_path.parent)
+        try:
+            with open(tmp_fd, "wb") as chunk_file:
+                chunk_file.write(zlib.compress(data, COMPRESSION_LEVEL))
+            # A concurrent Writer may have won the Race, its Chunk has the same Contents.
+            os.replace(tmp_name, chunk_path)
+        finally:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+    return chunk_hash
+
+
+def load_chunk(chunk_hash: str) -> bytes:
+    """Load a Chunk from the Repository.
+
+    Arguments:
+        chunk_hash (str): The Hash of the Chunk.
+
+    Returns:
+        bytes: The Contents of the Chunk.
+    """
+    with open(_get_chunk_path(chunk_hash), "rb") as chunk_file:
+        return zlib.decompress(chunk_file.read())
+
+
+def _find_boundary(data: bytes, start: int, end: int) -> int:
+    """Find the End of the Chunk starting at <start> with the Gear Rolling Hash.
+
+    The Hash only depends on the last 32 Bytes, so Boundaries move along with inserted or removed Data.
+
+    Arguments:
+        data (bytes): The Data to split.
+        start (int): The Start of the Chunk.
+        end (int): The End of the Data available.
+
+    Returns:
+        int: The End of the Chunk, at most CHUNK_MAX after <start>.
+    """
+    if end - start <= CHUNK_MIN:
+        return end
+    gear = _GEAR
+    hash_value = 0
+    # No Boundary can be within CHUNK_MIN, those Bytes are skipped.
+    for pos, byte in enumerate(data[start + CHUNK_MIN:min(start + CHUNK_MAX, end)], start + CHUNK_MIN + 1):
+        hash_value = ((hash_value << 1) + gear[byte]) & 0xFFFFFFFF
+        if not hash_value & _CUT_MASK:
+            return pos
+    return min(start + CHUNK_MAX, end)
+
+
+def _store_file(file_path: Path) -> list:
+    """Split a File into content-defined Chunks and store them.
+
+    Arguments:
+        file_path (Path): The File to store.
+
+    Returns:
+        list: The Hashes of the Chunks of the File.
+    """
+    hashes = []
+    buffer = b""
+    start = 0
+    with open(file_path, "rb") as src:
+        while True:
+            if len(buffer) - start < CHUNK_MAX:
+                block = src.read(_READ_SIZE)
+                if block:
+                    buffer = buffer[start:] + block
+                    start = 0
+                    continue
+                if start == len(buffer):
+                    return hashes
+            end = _find_boundary(buffer, start, len(buffer))
+            hashes.append(store_chunk(buffer[start:end]))
+            start = end
+
+
+def _store_region(file_path: Path, old: dict, previous_started: float) -> dict:
+    """Store the Header and the Chunk Payloads of a Region File separately.
+
+    Chunks whose Timestamp did not change since the previous Snapshot reuse the stored Payload without being read.
+
+    Arguments:
+        file_path (Path): The Region File (.mca) to store.
+        old (dict): The Entry of the File in the previous Snapshot.
+        previous_started (float): The Time the previous Snapshot was started, as Unix Timestamp.
+
+    Returns:
+        dict: "header" and "payloads" of the Entry, None if the File is not a valid Region File.
+    """
+    old_payloads = {}
+    if old.get("type") == "region":
+        old_payloads = {idx: (timestamp, chunk_hash) for idx, timestamp, chunk_hash in old["payloads"]}
+
+    with open(file_path, "rb") as region_file:
+        size = os.fstat(region_file.fileno()).st_size
+        if size < REGION_HEADER_SIZE:
+            return None
+        with mmap.mmap(region_file.fileno(), 0, access=mmap.ACCESS_READ) as region:
+            header = region[:REGION_HEADER_SIZE]
+            payloads = []
+            for idx in range(REGION_CHUNKS):
+                location = int.from_bytes(header[idx * 4:idx * 4 + 3], "big")
+                if location == 0:
+                    continue
+                timestamp = int.from_bytes(header[SECTOR_SIZE + idx * 4:SECTOR_SIZE + idx * 4 + 4], "big")
+                old_timestamp, old_hash = old_payloads.get(idx, (None, None))
+                # A Chunk saved again within the Second of the previous Snapshot keeps its Timestamp.
+                if timestamp == old_timestamp and timestamp < previous_started:
+                    payloads.append([idx, timestamp, old_hash])
+                    continue
+
+                start = location * SECTOR_SIZE
+                if start + 4 > size:
+                    return None
+                # Payloads start with their Length, excluding the Length itself.
+                length = int.from_bytes(region[start:start + 4], "big")
+                if start + 4 + length > size:
+                    return None
+                payloads.append([idx, timestamp, store_chunk(region[start:start + 4 + length])])
+
+    return {"header": store_chunk(header), "payloads": payloads}
+
+
+def _restore_region(dest, entry: dict) -> None:
+    """Reassemble a Region File from its Header and Chunk Payloads.
+
+    Arguments:
+        dest (file): The File to write to, opened in binary Mode.
+        entry (dict): The Entry of the Region File in the Manifest.
+    """
+    header = load_chunk(entry["header"])
+    dest.truncate(entry["size"])
+    dest.write(header)
+    for idx, _, chunk_hash in entry["payloads"]:
+        location = int.from_bytes(header[idx * 4:idx * 4 + 3], "big")
+        dest.seek(location * SECTOR_SIZE)
+        dest.write(load_chunk(chunk_hash))
+
+
+def get_snapshots(instance: str) -> list:
+    """Get the Snapshot IDs of an Instance.
+
+    Arguments:
+        instance (str): The name of the Instance.
+
+    Returns:
+        list: The Snapshot IDs, oldest first.
+    """
+    snapshot_dir = get_repo_path() / "snapshots" / instance
+    if not snapshot_dir.is_dir():
+        return []
+    return sorted(x.name[:-len(".json.gz")] for x in snapshot_dir.glob("*.json.gz"))
+
+
+def load_manifest(instance: str, snapshot: str) -> dict:
+    """Load the Manifest of a Snapshot.
+
+    Arguments:
+        instance (str): The name of the Instance.
+        snapshot (str): The Snapshot ID.
+
+    Raises:
+        FileNotFoundError: Raised if the Snapshot does not exist.
+
+    Returns:
+        dict: The Manifest.
+    """
+    snapshot_path = _get_snapshot_path(instance, snapshot)
+    if not snapshot_path.is_file():
+        raise FileNotFoundError(f"Snapshot '{instance}/{snapshot}' not found.")
+    with gzip.open(snapshot_path, "rt") as manifest_file:
+        return json.load(manifest_file)
+
+
+def _store_entries(source_path: Path, rel_paths: list, previous: dict, previous_started: float, jobs: int = None) -> list:
+    """Store Files and Directories of an Instance in the Repository.
+
+    Arguments:
+        source_path (Path): The Path of the Instance, or of a staged Copy.
+        rel_paths (list): The relative Paths to store.
+        previous (dict): The Entries of the previous Snapshot by Path.
+        previous_started (float): The Time the previous Snapshot was started, as Unix Timestamp.
+
+    Keyword Arguments:
+        jobs (int): The Amount of Files read in parallel. Defaults to the CPU Count. (default: {None})
+
+    Returns:
+        list: The Manifest Entries.
+    """
+    entries = []
+    for rel_path in rel_paths:
+        full_path = source_path / rel_path
+        stat = full_path.stat()
+        entry = {"path": str(rel_path), "mode": stat.st_mode & 0o7777, "mtime_ns": stat.st_mtime_ns}
+        if S_ISDIR(stat.st_mode):
+            entry["type"] = "dir"
+        else:
+            entry.update({"type": "file", "size": stat.st_size})
+        entries.append(entry)
+
+    def backup_entry(entry: dict) -> dict:
+        if entry["type"] == "dir":
+            return entry
+        old = previous.get(entry["path"], {})
+        if old.get("size") == entry["size"] and old.get("mtime_ns") == entry["mtime_ns"]:
+            entry.update({x: old[x] for x in ("type", "chunks", "header", "payloads") if x in old})
+            return entry
+
+        region = None
+        if entry["path"].endswith(".mca"):
+            region = _store_region(source_path / entry["path"], old, previous_started)
+        if region is not None:
+            entry["type"] = "region"
+            entry.update(region)
+        else:
+            entry["chunks"] = _store_file(source_path / entry["path"])
+        return entry
+
+    total_size = sum(x.get("size", 0) for x in entries)
+    written = 0
+    with ThreadPoolExecutor(jobs or os.cpu_count() or 1) as executor:
+        for entry in executor.map(backup_entry, entries):
+            written += entry.get("size", 0)
+            sys.stdout.write(
+                f"\r[{(written * 100 / max(total_size, 1)):3.0f}%] Storing: {entry['path']}...\033[K")
+    print()
+    return entries
+
+
+def create(instance: str, world_only: bool = False, jobs: int = None, hot: bool = False) -> str:
+    """Create a deduplicated Snapshot of an Instance in the Backup Repository.
+
+    Files are split into Chunks which are stored once by their Hash. Files whose Size and Modification Time
+    did not change since the last Snapshot are not read again. Of Region Files, only the Chunks whose
+    Timestamp changed since the last Snapshot are read and stored.
+
+    Arguments:
+        instance (str): The name of the Instance.
+
+    Keyword Arguments:
+        world_only (bool): Only back up the World data without configuration files. (default: {False})
+        jobs (int): The Amount of Files read in parallel. Defaults to the CPU Count. (default: {None})
+        hot (bool): Back up a consistent Copy of a running Server, see storage.hot_copy(). (default: {False})
+
+    Returns:
+        str: The ID of the new Snapshot.
+    """
+    server_path = storage.get_instance_path(instance)
+    if not server_path.is_dir():
+        raise FileNotFoundError(f"Instance not found: {server_path}.")
+
+    world = ""
+    if world_only:
+        server_cfg = config.get_properties(server_path / "server.properties")
+        world = server_cfg.get("level-name")
+
+    previous = {}
+    previous_started = 0
+    snapshots = get_snapshots(instance)
+    if snapshots:
+        manifest = load_manifest(instance, snapshots[-1])
+        previous = {x["path"]: x for x in manifest["files"]}
+        previous_started = manifest.get("started", 0)
+    started = time.time()
+
+    rel_paths = storage.get_relative_paths(server_path, world)
+    with ExitStack() as stack:
+        source_path = stack.enter_context(storage.hot_copy(instance, rel_paths)) if hot else server_path
+        entries = _store_entries(source_path, rel_paths, previous, previous_started, jobs)
+
+    snapshot = datetime.now().strftime('%y-%m-%d-%H.%M.%S')
+    if _get_snapshot_path(instance, snapshot).exists():
+        snapshot += f"-{len(snapshots)}"
+    manifest = {
+        "instance": instance,
+        "created": datetime.now().isoformat(),
+        "started": started,
+        "world_only": world_only,
+        "files": entries
+    }
+    snapshot_path = _get_snapshot_path(instance, snapshot)
+    storage.create_dirs(snapshot_path.parent)
+    tmp_path = snapshot_path.with_name(f"{snapshot}.tmp")
+    with gzip.open(tmp_path, "wt") as manifest_file:
+        json.dump(manifest, manifest_file)
+    os.replace(tmp_path, snapshot_path)
+
+    print(f"Snapshot '{instance}/{snapshot}' saved.")
+    return snapshot
+
+
+def list_snapshots(filter_str: str = '') -> None:
+    """Print a list of all Snapshots in the Backup Repository.
+
+    Keyword Arguments:
+        filter_str (str): Filter the list by instance name. (default: {''})
+    """
+    template = "{:16} {:20} {:10} {:>12}"
+    print(template.format("Name", "Snapshot", "Files", "Size"))
+    snapshot_dir = get_repo_path() / "snapshots"
+    if not snapshot_dir.is_dir():
+        return
+    for instance in sorted(x.name for x in snapshot_dir.iterdir()):
+        if filter_str not in instance:
+            continue
+        for snapshot in get_snapshots(instance):
+            files = load_manifest(instance, snapshot)["files"]
+            size = sum(x.get("size", 0) for x in files)
+            print(template.format(instance, snapshot, len(files), f"{size / 1024**2:.1f}MB"))
+
+
+def restore(instance: str, snapshot: str, target: str = None) -> None:
+    """Restore a Snapshot to a new Instance.
+
+    Arguments:
+        instance (str): The name of the Instance the Snapshot was taken of.
+        snapshot (str): The Snapshot ID, "latest" restores the newest Snapshot.
+
+    Keyword Arguments:
+        target (str): The name of the new Instance. Defaults to <instance>. (default: {None})
+    """
+    if snapshot == "latest":
+        snapshots = get_snapshots(instance)
+        if not snapshots:
+            raise FileNotFoundError(f"No Snapshots of '{instance}' found.")
+        snapshot = snapshots[-1]
+    manifest = load_manifest(instance, snapshot)
+
+    target_path = storage.get_instance_path(target or instance)
+    if target_path.exists():
+        raise FileExistsError("Instance already exists.")
+
+    storage.create_dirs(target_path)
+    directories = []
+    for entry in manifest["files"]:
+        full_path = target_path / entry["path"]
+        if entry["type"] == "dir":
+            storage.create_dirs(full_path)
+            directories.append((full_path, entry))
+            continue
+        sys.stdout.write(f"\rRestoring: {entry['path']}...\033[K")
+        storage.create_dirs(full_path.parent)
+        with open(full_path, "wb") as dest:
+            if entry["type"] == "region":
+                _restore_region(dest, entry)
+            else:
+                for chunk_hash in entry["chunks"]:
+                    dest.write(load_chunk(chunk_hash))
+        os.chmod(full_path, entry["mode"])
+        os.utime(full_path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+    # Directory Times change while their Contents are restored.
+    for full_path, entry in reversed(directories):
+        os.chmod(full_path, entry["mode"])
+        os.utime(full_path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+    print()
+    print(f"Snapshot '{instance}/{snapshot}' restored to '{target_path}'.")
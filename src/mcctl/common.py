@@ -19,11 +19,12 @@
 # along with mcctl. If not, see <http://www.gnu.org/licenses/>.
 
 from socket import error as sock_error
-from mcstatus import MinecraftServer
-from mcctl import web, storage, service, config, proc, CFGVARS
+from concurrent.futures import ThreadPoolExecutor
+from mcctl import web, storage, service, config, proc, backup, jars, CFGVARS
 
 
-def create(instance: str, source: str, memory: str, properties: list, literal_url: bool = False, start: bool = False) -> None:
+def create(instance: str, source: str, memory: str, properties: list, literal_url: bool = False, start: bool = False,
+           offline: bool = False) -> None:
     """Create a new Minecraft Server Instance.
 
     Downloads the correct jar-file, configures the server and asks the user to accept the EULA.
@@ -35,6 +36,7 @@ def create(instance: str, source: str, memory: str, properties: list, literal_ur
         properties (list): A list with Strings in the format of "KEY=VALUE".
         literal_url (bool): Determines if the TypeID is a literal URL. Default: False
         start (bool): Starts the Server directly if set to True. Default: False
+        offline (bool): Resolve the TypeID with the Version Catalog, without Network Access. Default: False
     """
     instance_path = storage.get_instance_path(instance)
     if instance_path.exists():
@@ -42,9 +44,9 @@ def create(instance: str, source: str, memory: str, properties: list, literal_ur
 
     storage.create_dirs(instance_path)
 
-    jar_path_src, version = web.pull(source, literal_url)
+    _, version = web.pull(source, literal_url, offline)
+    jars.install(version, instance)
     jar_path_dest = instance_path / "server.jar"
-    storage.copy(jar_path_src, jar_path_dest)
     proc.pre_start(jar_path_dest)
     if config.accept_eula(instance_path):
         if properties:
@@ -66,51 +68,126 @@ def create(instance: str, source: str, memory: str, properties: list, literal_ur
         storage.remove(instance, confirm=False)
 
 
-def get_instance_list(filter_str: str = '') -> None:
+def _ping(port: int, timeout: float):
+    """Ping a local Server once, with <timeout> applied to every Socket Operation.
+
+    Arguments:
+        port (int): The Port of the Server.
+        timeout (float): Timeout of Socket Operations in Seconds.
+
+    Returns:
+        PingResponse: The Status of the Server.
+    """
+    # Imported on use, mcstatus is slow to import and only needed to ping Servers.
+    from mcstatus import MinecraftServer  # pylint: disable=import-outside-toplevel
+    try:
+        server = MinecraftServer('localhost', port, timeout=timeout)
+    except TypeError:
+        # mcstatus < 5 only sets the Timeout on the Connection, which status() creates with a fixed one.
+        from mcstatus.pinger import ServerPinger  # pylint: disable=import-outside-toplevel
+        from mcstatus.protocol.connection import TCPSocketConnection  # pylint: disable=import-outside-toplevel
+        pinger = ServerPinger(TCPSocketConnection(('localhost', port), timeout), host='localhost', port=port)
+        pinger.handshake()
+        status = pinger.read_status()
+        status.latency = pinger.test_ping()
+        return status
+    return server.status(tries=1)
+
+
+def get_status(instance: str, timeout: float = 3.0):
+    """Ping an Instance and return its Status.
+
+    Arguments:
+        instance (str): The Instance ID.
+
+    Keyword Arguments:
+        timeout (float): Timeout of the Ping's Socket Operations in Seconds. (default: {3.0})
+
+    Returns:
+        PingResponse: The Status of the Server, None if it is unreachable.
+    """
+    cfg = config.get_properties(
+        storage.get_instance_path(instance) / "server.properties")
+    port = int(cfg.get("server-port"))
+    try:
+        return _ping(port, timeout)
+    except (ConnectionError, sock_error):
+        return None
+
+
+def get_instance_info(instance: str, status_future=None, state: dict = None) -> tuple:
+    """Collect the Fields of an Instance shown in the Instance List.
+
+    Arguments:
+        instance (str): The Instance ID.
+
+    Keyword Arguments:
+        status_future (Future): A pending get_status() call for the Instance. Pinged directly if omitted. (default: {None})
+        state (dict): The Unit Properties of the Instance, see service.query_states(). Queried if omitted. (default: {None})
+
+    Returns:
+        tuple: Name, Server Version, Player Count, Status and Persistence of the Instance.
+    """
+    cfg = config.get_properties(
+        storage.get_instance_path(instance) / "server.properties")
+    active = service.is_active(instance, state)
+    enabled = service.is_enabled(instance, state)
+
+    if status_future is None:
+        status = get_status(instance)
+    else:
+        status = status_future.result()
+
+    if status is not None:
+        online = status.players.online
+        proto = status.version.protocol
+        version = status.version.name
+    else:
+        online = 0
+        proto = -1
+        version = "n/a"
+
+    if active:
+        run_status = "Active" if proto > -1 else "Starting"
+    else:
+        run_status = "Inactive"
+
+    return (instance, version, f"{online}/{cfg.get('max-players')}",
+            run_status, str(enabled))
+
+
+def get_instance_list(filter_str: str = '', timeout: float = 3.0, workers: int = 32) -> None:
     """Print a list of all instances.
 
     Output a table of all instances with their respective Name, Server Version String, Status and persistence.
+    All Instances are probed concurrently, rows are printed in order as soon as they are complete.
 
     Keyword Arguments:
         filter_str (str): Filter the list by instance name. (default: {''})
+        timeout (float): Time in seconds a single status ping may take. (default: {3.0})
+        workers (int): Maximum amount of concurrent probes. (default: {32})
     """
     base_path = storage.get_instance_path(bare=True)
-    server_paths = base_path.iterdir()
-    servers = [x.name for x in server_paths]
+    servers = sorted(x.name for x in base_path.iterdir() if filter_str in x.name)
 
     template = "{:16} {:20} {:16} {:10} {:10}"
     title = template.format("Name", "Server Version",
                             "Player Count", "Status", "Persistent")
 
     print(title)
-    for name in servers:
-        if filter_str in name:
-            cfg = config.get_properties(base_path / name / "server.properties")
-            port = int(cfg.get("server-port"))
-
-            try:
-                server = MinecraftServer('localhost', port)
-                status = server.status()
-                online = status.players.online
-                proto = status.version.protocol
-                version = status.version.name
-            except (ConnectionError, sock_error):
-                online = 0
-                proto = -1
-                version = "n/a"
-
-            if service.is_active(name):
-                if proto > -1:
-                    run_status = "Active"
-                else:
-                    run_status = "Starting"
-            else:
-                run_status = "Inactive"
-
+    if not servers:
+        return
+
+    # One systemctl call for all Instances, however long the Pings take.
+    states = service.query_states(servers)
+    workers = max(min(workers, len(servers)), 1)
+    with ThreadPoolExecutor(workers) as executor:
+        # Every Ping is bounded by <timeout> itself, so no Thread of the Pool can hang.
+        status_futures = [executor.submit(get_status, name, timeout) for name in servers]
+        for name, status_future in zip(servers, status_futures):
             contents = template.format(
-                name, version, f"{online}/{cfg.get('max-players')}",
-                run_status, str(service.is_enabled(name)))
-            print(contents)
+                *get_instance_info(name, status_future, states[name]))
+            print(contents, flush=True)
 
 
 def is_ready(instance: str) -> bool:
@@ -122,17 +199,8 @@ def is_ready(instance: str) -> bool:
     Returns:
         bool: True if the Server is ready to serve connections.
     """
-    cfg = config.get_properties(
-        storage.get_instance_path(instance) / "server.properties")
-    port = int(cfg.get("server-port"))
-    try:
-        server = MinecraftServer('localhost', port)
-        status = server.status()
-        proto = status.version.protocol
-    except (ConnectionError, sock_error):
-        return False
-
-    return proto > -1
+    status = get_status(instance)
+    return status is not None and status.version.protocol > -1
 
 
 def mc_ls(what: str, filter_str: str = '') -> None:
@@ -141,16 +209,18 @@ def mc_ls(what: str, filter_str: str = '') -> None:
     A Function to bundle all Listing Functions, invokes selected Function.
 
     Args:
-        what (str): What to list (jars or instances)
+        what (str): What to list (jars, instances or backups)
         filter (str): Filter by Instance Name, type or version. (default: '')
 
     Raises:
         ValueError: Raised if "what" is invalid.
     """
     if what == 'jars':
-        storage.get_jar_list(filter_str)
+        jars.list_jars(filter_str)
     elif what == 'instances':
         get_instance_list(filter_str)
+    elif what == 'backups':
+        backup.list_snapshots(filter_str)
     else:
         raise ValueError(f"Cannot List '{what}'.")
 
@@ -168,28 +238,39 @@ def rename(instance: str, new_name: str) -> None:
         raise OSError("The server is still persistent and/or running.")
     server_path = storage.get_instance_path(instance)
     server_path.rename(server_path.parent / new_name)
+    jars.rename(instance, new_name)
 
 
-def update(instance: str, source: str, literal_url: bool = False, restart: bool = False) -> None:
-    """Change the Jar File of a server.
+def update(instances: list, source: str, literal_url: bool = False, restart: bool = False, offline: bool = False,
+           all_instances: bool = False, jobs: int = 1, drain: float = 300.0) -> None:
+    """Change the Jar File of one or more servers.
 
-    Stops the Server if necessary, deletes the old Jar File and copies the new one, starts the Server again.
+    Links the new Jar File in place of the old one. Running Servers are restarted in a Rolling Restart if allowed,
+    see service.rolling_restart().
 
     Arguments:
-        instance (str): The Instance ID.
+        instances (list): The Instance IDs or Globs.
         source (str): The Type ID or URL of the new minecraft server Jar.
         literal_url (bool): Determines if the TypeID is a literal URL. Default: False
         allow_restart (bool): Allows a Server restart if the Server is running. Default: False
+        offline (bool): Resolve the TypeID with the Version Catalog, without Network Access. Default: False
+        all_instances (bool): Update all Instances. Default: False
+        jobs (int): Maximum Amount of Servers restarting at the same Time. Default: 1
+        drain (float): Seconds to wait for populated Servers to empty before restarting them. Default: 300.0
     """
-    jar_src, version = web.pull(source, literal_url)
-    jar_dest = storage.get_instance_path(instance) / "server.jar"
-    storage.copy(jar_src, jar_dest)
-
+    names = service.match_instances(instances, all_instances)
+    if not names:
+        raise ValueError("No Instances given, pass Instance Names or '--all'.")
+    _, version = web.pull(source, literal_url, offline)
+    for name in names:
+        jars.install(version, name)
+
+    states = service.query_states(names)
+    active = [x for x in names if service.is_active(x, states[x])]
     additions = ''
-    if service.is_active(instance) and restart:
-        service.notified_set_status(
-            instance, "restart", f"Updating to Version {version}")
-    else:
+    if active and restart:
+        service.rolling_restart(active, jobs, drain, f"Updating to Version {version}")
+    elif active:
         additions = " Manual restart required."
     print(f"Update successful.{additions}")
 
@@ -18,8 +18,14 @@
 # You should have received a copy of the GNU General Public License
 # along with mcctl. If not, see <http://www.gnu.org/licenses/>.
 
+import os
 from pathlib import Path
 
+_SIZE_UNITS = {"K": 1024, "M": 1024**2, "G": 1024**3}
+
+# Parsed Property Files by Path, with the Modification Time and Size they were parsed at.
+_PROPERTIES = {}
+
 
 def properties_to_dict(property_list: list) -> dict:
     """Convert an array of properties to a dict.
@@ -47,10 +53,26 @@ def properties_to_dict(property_list: list) -> dict:
     return property_dict
 
 
+def parse_size(value: str) -> int:
+    """Parse a Size with an optional Unit, e.g. '512M' or '4G', as used for Memory Allocations.
+
+    Arguments:
+        value (str): The Size.
+
+    Returns:
+        int: The Size in Bytes.
+    """
+    value = value.strip().upper()
+    if value and value[-1] in _SIZE_UNITS:
+        return int(float(value[:-1]) * _SIZE_UNITS[value[-1]])
+    return int(value)
+
+
 def get_properties(file_path: Path) -> dict:
     """Create a dict from a property file.
 
     Takes a the contents of a file line by line in "KEY=VALUE" form, and remodels it into a dict.
+    The File is only parsed again if it changed since the last call.
 
     Arguments:
         file_path (Path): The path of the input file.
@@ -58,9 +80,15 @@ def get_properties(file_path: Path) -> dict:
     Returns:
         dict: A dict with all properties from the specified file.
     """
+    stat = os.stat(file_path)
+    cached = _PROPERTIES.get(str(file_path))
+    if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+        return dict(cached[1])
+
     with open(file_path, "r", encoding="iso8859_1") as config_file:
         config = properties_to_dict(config_file.read().splitlines())
-    return config
+    _PROPERTIES[str(file_path)] = ((stat.st_mtime_ns, stat.st_size), config)
+    return dict(config)
 
 
 def set_properties(file_path: Path, properties: dict) -> None:
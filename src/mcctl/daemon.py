@@ -0,0 +1,264 @@
+#!/bin/env python3
+
+# mcctl: A Minecraft Server Management Utility written in Python
+# Copyright (C) 2020 Matthias Cotting
+
+# This file is part of mcctl.
+
+# mcctl is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# mcctl is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with mcctl. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import sys
+import json
+import socket
+import importlib
+import struct
+import socketserver
+from pathlib import Path
+from grp import getgrgid
+from pwd import getpwnam, getpwuid
+from mcctl.__config__ import read_cfg
+from mcctl import CFGVARS
+
+# Actions the Daemon serves. They do not ask for Input and are called frequently by Scripts.
+ACTIONS = ("exec", "inspect", "ls", "restart", "start", "stop")
+_PEERCRED = struct.Struct("3i")
+_PARSER = None
+
+
+class _ClientStdout:
+    """Replaces sys.stdout while serving a Client and sends the Output to it."""
+
+    def __init__(self, send):
+        self.send = send
+
+    def write(self, data) -> int:
+        self.send({"out": data.decode(errors="replace") if isinstance(data, bytes) else data})
+        return len(data)
+
+    def writelines(self, lines) -> None:
+        for line in lines:
+            self.write(line)
+
+    def flush(self) -> None:
+        pass
+
+    @property
+    def buffer(self):
+        """Binary Access, as used by inspect."""
+        return self
+
+
+def get_socket_path() -> Path:
+    """Return the Path of the Daemon Socket.
+
+    Returns:
+        Path: The Path of the Unix Socket, see the 'daemon_socket' Setting.
+    """
+    return Path(CFGVARS.get('system', 'daemon_socket'))
+
+
+def is_permitted(uid: int) -> bool:
+    """Check if a User may use the Daemon.
+
+    root, the Server User and Members of the Server User's Group are permitted.
+
+    Arguments:
+        uid (int): The User ID of the Client.
+
+    Returns:
+        bool: True if the User is permitted.
+    """
+    server_user = getpwnam(CFGVARS.get('system', 'server_user'))
+    if uid in (0, server_user.pw_uid):
+        return True
+    try:
+        user = getpwuid(uid)
+    except KeyError:
+        return False
+    return server_user.pw_gid in os.getgrouplist(user.pw_name, user.pw_gid)
+
+
+def _get_parser():
+    global _PARSER
+    # Imported here, as the CLI imports this Module to act as Client.
+    from mcctl.__main__ import get_parser  # pylint: disable=import-outside-toplevel
+    if _PARSER is None:
+        _PARSER = get_parser()
+    return _PARSER
+
+
+def drop_privileges(permlevel: dict) -> None:
+    """Change to the User an Action runs as in the CLI, see __main__.get_permlevel().
+
+    Actions of the Server User drop root completely, so Files written on their behalf, e.g. Log Indexes in
+    Directories the Server User owns, can not be redirected by it. Actions run as root keep only the effective
+    IDs of the demoted User, like after sudo.
+
+    Arguments:
+        permlevel (dict): The Permission Level of the Action.
+    """
+    if os.getuid() != 0:
+        return
+    if permlevel["usr"] != "root":
+        user = getpwnam(permlevel["usr"])
+        os.initgroups(user.pw_name, user.pw_gid)
+        os.setgid(user.pw_gid)
+        os.setuid(user.pw_uid)
+    elif permlevel.get("eusr"):
+        user = getpwnam(permlevel["eusr"])
+        os.setegid(user.pw_gid)
+        os.seteuid(user.pw_uid)
+
+
+def serve(argv: list, send, uid: int = 0) -> int:
+    """Run a Command for a Client, with the Output sent to the Client.
+
+    The Command runs as the User it would run as in the CLI. Commands needing root are only run for root,
+    other Clients are told to fall back to the CLI, which asks sudo.
+
+    Arguments:
+        argv (list): The Arguments of the Command, as passed to mcctl.
+        send (Callable): Called with each Message for the Client.
+
+    Keyword Arguments:
+        uid (int): The User ID of the Client. (default: {0})
+
+    Returns:
+        int: The Exit Code of the Command, None if the Client has to run it itself.
+    """
+    # Imported here, as the CLI imports this Module to act as Client.
+    from mcctl.__main__ import filter_args, get_permlevel  # pylint: disable=import-outside-toplevel
+    stdout, sys.stdout = sys.stdout, _ClientStdout(send)
+    try:
+        try:
+            args = _get_parser().parse_args(argv)
+        except SystemExit as ex:
+            return ex.code
+        if args.action not in ACTIONS:
+            print(f"Action '{args.action}' is not served by mcctld.")
+            return 1
+        permlevel = get_permlevel(args, args.elevation)
+        if permlevel["usr"] == "root" and uid != 0:
+            return None
+        try:
+            drop_privileges(permlevel)
+            args.func(**filter_args(vars(args), args.func))
+        except Exception as ex:  # pylint: disable=broad-except
+            print(f"Unable to {args.err_template.format(args=args)}: {ex}")
+            return 1
+        return 0
+    finally:
+        sys.stdout = stdout
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handles one Client Connection: A Request Line with the Arguments, answered by Output Lines and the Exit Code."""
+
+    def send(self, message: dict) -> None:
+        self.wfile.write(json.dumps(message).encode() + b"\n")
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        creds = self.request.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, _PEERCRED.size)
+        _, uid, _ = _PEERCRED.unpack(creds)
+        if not is_permitted(uid):
+            self.send({"out": "Permission denied.\n"})
+            self.send({"exit": 1})
+            return
+        try:
+            request = json.loads(self.rfile.readline())
+            exit_code = serve(request["argv"], self.send, uid)
+            self.send({"fallback": True} if exit_code is None else {"exit": exit_code})
+        except (OSError, ValueError, KeyError, TypeError):
+            # The Client went away or sent garbage.
+            pass
+
+
+class _Server(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """Serves each Client in a forked Process, which drops to the User of the Action.
+
+    A Process can only change its User as a whole, so no State cached by a Command, e.g. RCON Connections or
+    Service States, outlives it. The forked Processes only start with the Modules imported and the Parser built.
+    """
+
+
+def request(argv: list) -> int:
+    """Run a Command with the Daemon and print its Output.
+
+    Arguments:
+        argv (list): The Arguments of the Command, as passed to mcctl.
+
+    Returns:
+        int: The Exit Code of the Command, None if the Daemon is not available or the Command needs root.
+    """
+    socket_path = get_socket_path()
+    if not socket_path.exists():
+        return None
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(str(socket_path))
+    except OSError:
+        return None
+    with sock, sock.makefile("rwb") as stream:
+        stream.write(json.dumps({"argv": argv}).encode() + b"\n")
+        stream.flush()
+        for line in stream:
+            message = json.loads(line)
+            if "out" in message:
+                sys.stdout.write(message["out"])
+                sys.stdout.flush()
+            if "exit" in message:
+                return message["exit"]
+            if message.get("fallback"):
+                return None
+    return 1
+
+
+def main() -> None:
+    """Start mcctld.
+
+    The Daemon runs as root with all Modules imported and the Parser built, each Command runs in a forked Process
+    as the User it would run as in the CLI. It listens on a Unix Socket which is accessible for root, the Server
+    User and its Group.
+    """
+    read_cfg()
+    if os.getuid() != 0:
+        print("mcctld must run as root.")
+        sys.exit(1)
+    # Imported once with the Modules of the served Actions, so forked Processes start with them.
+    _get_parser()
+    for module in ("common", "logs", "proc", "rcon", "service", "storage"):
+        importlib.import_module(f"mcctl.{module}")
+    socket_path = get_socket_path()
+    if socket_path.exists():
+        socket_path.unlink()
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+    server = _Server(str(socket_path), _RequestHandler)
+    server_user = getpwnam(CFGVARS.get('system', 'server_user'))
+    os.chown(socket_path, 0, server_user.pw_gid)
+    os.chmod(socket_path, 0o660)
+    print(f"mcctld listening on '{socket_path}', Group '{getgrgid(server_user.pw_gid).gr_name}'.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        socket_path.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/bin/env python3
+
+# mcctl: A Minecraft Server Management Utility written in Python
+# Copyright (C) 2020 Matthias Cotting
+
+# This file is part of mcctl.
+
+# mcctl is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# mcctl is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with mcctl. If not, see <http://www.gnu.org/licenses/>.
+
+import time
+import threading
+from socketserver import ThreadingMixIn
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from concurrent.futures import ThreadPoolExecutor
+from mcctl import service, storage, common, config, CFGVARS
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Name, Type and Help of each Metric, in Output Order.
+METRICS = (
+    ("mcctl_up", "gauge", "1 if the Unit of the Instance is active."),
+    ("mcctl_ready", "gauge", "1 if the Server answers Status Pings."),
+    ("mcctl_players_online", "gauge", "Players online."),
+    ("mcctl_players_max", "gauge", "Maximum Players."),
+    ("mcctl_protocol_version", "gauge", "Protocol Version of the Server."),
+    ("mcctl_ping_latency_seconds", "gauge", "Latency of the Status Ping."),
+    ("mcctl_memory_limit_bytes", "gauge", "Memory Allocation of the JVM from the Environment File."),
+    ("mcctl_memory_bytes", "gauge", "Memory used by the Unit's cgroup."),
+    ("mcctl_cpu_seconds_total", "counter", "CPU Time used by the Unit's cgroup."),
+)
+
+# The rendered Metrics, replaced as a whole by each Refresh so Scrapes never wait for Probes.
+_SNAPSHOT = b""
+
+
+def probe(instance: str, state: dict) -> dict:
+    """Collect the Metrics of an Instance.
+
+    Arguments:
+        instance (str): The name of the Instance.
+        state (dict): The Unit Properties of the Instance, see service.query_states().
+
+    Returns:
+        dict: The Values by Metric Name, Metrics without a Value are omitted.
+    """
+    values = {"mcctl_up": int(state.get("ActiveState") in ("active", "reloading")), "mcctl_ready": 0}
+    if state.get("MemoryCurrent") is not None:
+        values["mcctl_memory_bytes"] = state["MemoryCurrent"]
+    if state.get("CPUUsageNSec") is not None:
+        values["mcctl_cpu_seconds_total"] = state["CPUUsageNSec"] / 1e9
+
+    env_path = storage.get_instance_path(instance) / CFGVARS.get('system', 'env_file')
+    try:
+        values["mcctl_memory_limit_bytes"] = config.parse_size(config.get_properties(env_path)["MEM"])
+    except (OSError, KeyError, ValueError):
+        pass
+
+    if values["mcctl_up"]:
+        try:
+            status = common.get_status(instance)
+        except (OSError, ValueError, TypeError):
+            status = None
+        if status is not None:
+            values.update({
+                "mcctl_ready": 1,
+                "mcctl_players_online": status.players.online,
+                "mcctl_players_max": status.players.max,
+                "mcctl_protocol_version": status.version.protocol,
+                "mcctl_ping_latency_seconds": status.latency / 1000,
+            })
+    return values
+
+
+def render(samples: dict, duration: float) -> bytes:
+    """Render Metrics in the Prometheus Text Format.
+
+    Arguments:
+        samples (dict): The Values by Metric Name, by Instance Name.
+        duration (float): The Time the Refresh took in Seconds.
+
+    Returns:
+        bytes: The Metrics Page.
+    """
+    lines = []
+    for name, metric_type, help_text in METRICS:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for instance, values in sorted(samples.items()):
+            if name in values:
+                label = instance.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{name}{{instance="{label}"}} {values[name]}')
+    lines.append("# HELP mcctl_refresh_duration_seconds Time the last Refresh of all Instances took.")
+    lines.append("# TYPE mcctl_refresh_duration_seconds gauge")
+    lines.append(f"mcctl_refresh_duration_seconds {duration:.6f}")
+    lines.append("# HELP mcctl_refresh_timestamp_seconds Time of the last Refresh.")
+    lines.append("# TYPE mcctl_refresh_timestamp_seconds gauge")
+    lines.append(f"mcctl_refresh_timestamp_seconds {time.time():.3f}")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def refresh(workers: int = 16) -> None:
+    """Probe all Instances concurrently and replace the Snapshot."""
+    global _SNAPSHOT
+    started = time.monotonic()
+    states = service.query_states()
+    with ThreadPoolExecutor(max(min(workers, len(states)), 1)) as executor:
+        futures = {x: executor.submit(probe, x, y) for x, y in states.items()}
+        samples = {x: y.result() for x, y in futures.items()}
+    _SNAPSHOT = render(samples, time.monotonic() - started)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves the current Snapshot on /metrics."""
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = _SNAPSHOT
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def exporter(port: int = 9940, address: str = "127.0.0.1", interval: float = 15.0) -> None:
+    """Serve Metrics of all Instances for Prometheus on /metrics.
+
+    The Instances are probed every <interval> Seconds in the Background. Scrapes are answered with the last
+    Snapshot and never wait for Probes.
+
+    Keyword Arguments:
+        port (int): The TCP Port to listen on. (default: {9940})
+        address (str): The Address to listen on. (default: {"127.0.0.1"})
+        interval (float): Seconds between Refreshes. (default: {15.0})
+    """
+    refresh()
+
+    def refresh_loop() -> None:
+        while True:
+            time.sleep(interval)
+            try:
+                refresh()
+            except Exception as ex:  # pylint: disable=broad-except
+                print(f"WARN: Unable to refresh Metrics: {ex}")
+
+    threading.Thread(target=refresh_loop, daemon=True).start()
+    server = _Server((address, port), _MetricsHandler)
+    print(f"Serving Metrics on http://{address}:{port}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
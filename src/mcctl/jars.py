@@ -0,0 +1,286 @@
+#!/bin/env python3
+
+# mcctl: A Minecraft Server Management Utility written in Python
+# Copyright (C) 2020 Matthias Cotting
+
+# This file is part of mcctl.
+
+# mcctl is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# mcctl is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with mcctl. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import json
+import time
+import fcntl
+import hashlib
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+from mcctl import config, storage, CFGVARS
+
+# Server Jars are stored once by their SHA-256 in 'objects'. The Tag Paths in the Jar Cache and the
+# 'server.jar' of Instances are Hardlinks (or Reflinks/Copies across File Systems) of these Objects.
+REFS_NAME = "refs.json"
+INDEX_VERSION = 1
+
+
+def get_object_path(jar_hash: str) -> Path:
+    """Return the Path of a stored Jar Object.
+
+    Arguments:
+        jar_hash (str): The SHA-256 of the Jar.
+
+    Returns:
+        Path: The Path of the Object.
+    """
+    return storage.get_jar_path(bare=True) / "objects" / jar_hash[:2] / jar_hash
+
+
+def hash_file(file_path: Path) -> str:
+    """Compute the SHA-256 of a File.
+
+    Arguments:
+        file_path (Path): The File to hash.
+
+    Returns:
+        str: The Hex Digest.
+    """
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as file_hnd:
+        for data in iter(lambda: file_hnd.read(1024 * 1024), b""):
+            hasher.update(data)
+    return hasher.hexdigest()
+
+
+@contextmanager
+def refs() -> dict:
+    """Lock and load the Reference Index, which maps Tags and Instances to Jar Objects.
+
+    Changes to the yielded Index are written back on exit.
+
+    Yields:
+        dict: The Index with the Keys 'tags' and 'instances', each mapping a Name to a Hash, and 'objects',
+              mapping a Hash to the Size and the last Time the Jar was pulled or installed.
+    """
+    jar_path = storage.get_jar_path(bare=True)
+    storage.create_dirs(jar_path)
+    with open(jar_path / f".{REFS_NAME}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            with open(jar_path / REFS_NAME) as refs_file:
+                index = json.load(refs_file)
+        except (OSError, ValueError):
+            index = {"tags": {}, "instances": {}}
+        index.setdefault("objects", {})
+        yield index
+        tmp_path = jar_path / f"{REFS_NAME}.{os.getpid()}"
+        with open(tmp_path, "w") as refs_file:
+            json.dump(index, refs_file, indent=1)
+        os.replace(tmp_path, jar_path / REFS_NAME)
+
+
+def link(source: Path, dest: Path) -> None:
+    """Link a File to a new Path atomically, replacing an existing File.
+
+    A Hardlink is used if possible, otherwise a Reflink or a Copy, see storage.clone_file().
+
+    Arguments:
+        source (Path): The File to link.
+        dest (Path): The new Path.
+    """
+    if dest.exists() and os.path.samefile(source, dest):
+        return
+    tmp_path = dest.with_name(f".{dest.name}.{os.getpid()}")
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        storage.clone_file(source, tmp_path)
+    os.replace(tmp_path, dest)
+
+
+def add(file_path: Path, tag: str) -> str:
+    """Add a Jar to the Object Store and link it to its Tag Path.
+
+    Arguments:
+        file_path (Path): The Jar to add. It is replaced by a Link to the Object.
+        tag (str): The Tag of the Jar, e.g. 'vanilla:1.16.4'.
+
+    Returns:
+        str: The Hash of the Jar.
+    """
+    jar_hash = hash_file(file_path)
+    object_path = get_object_path(jar_hash)
+    with refs() as index:
+        if not object_path.is_file():
+            storage.create_dirs(object_path.parent)
+            link(file_path, object_path)
+        tag_path = storage.get_jar_path(tag)
+        storage.create_dirs(tag_path.parent)
+        link(object_path, tag_path)
+        if file_path != tag_path:
+            file_path.unlink()
+        index["tags"][tag] = jar_hash
+        index["objects"][jar_hash] = {"size": object_path.stat().st_size, "used": time.time()}
+    return jar_hash
+
+
+def install(tag: str, instance: str) -> None:
+    """Link a cached Jar into an Instance as 'server.jar' and record the Reference.
+
+    Jars cached before the Object Store existed are added to it first.
+
+    Arguments:
+        tag (str): The Tag of the cached Jar.
+        instance (str): The name of the Instance.
+    """
+    with refs() as index:
+        jar_hash = index["tags"].get(tag)
+    if jar_hash is None or not get_object_path(jar_hash).is_file():
+        jar_hash = add(storage.get_jar_path(tag), tag)
+    with refs() as index:
+        link(get_object_path(jar_hash), storage.get_instance_path(instance) / "server.jar")
+        index["instances"][instance] = jar_hash
+        index["objects"].setdefault(jar_hash, {"size": get_object_path(jar_hash).stat().st_size})
+        index["objects"][jar_hash]["used"] = time.time()
+
+
+def touch(tag: str) -> None:
+    """Mark a cached Jar as used.
+
+    Arguments:
+        tag (str): The Tag of the cached Jar.
+    """
+    with refs() as index:
+        jar_hash = index["tags"].get(tag)
+        if jar_hash in index["objects"]:
+            index["objects"][jar_hash]["used"] = time.time()
+
+
+def rename(instance: str, new_name: str) -> None:
+    """Move the Reference of an Instance to its new Name.
+
+    Arguments:
+        instance (str): Current name of the Instance.
+        new_name (str): New name of the Instance.
+    """
+    with refs() as index:
+        if instance in index["instances"]:
+            index["instances"][new_name] = index["instances"].pop(instance)
+
+
+def release(instance: str = None, tag: str = None) -> None:
+    """Drop the Reference of an Instance or a Tag and remove Objects which are not referenced anymore.
+
+    Keyword Arguments:
+        instance (str): The name of the removed Instance. (default: {None})
+        tag (str): The removed Tag, or 'all'. (default: {None})
+    """
+    with refs() as index:
+        if instance:
+            index["instances"].pop(instance, None)
+        if tag == "all":
+            index["tags"].clear()
+        elif tag:
+            index["tags"].pop(tag, None)
+
+        used = set(index["instances"].values()) | set(index["tags"].values())
+        objects_path = storage.get_jar_path(bare=True) / "objects"
+        if objects_path.is_dir():
+            for object_path in objects_path.glob("*/*"):
+                if object_path.name not in used:
+                    object_path.unlink()
+        index["objects"] = {x: y for x, y in index["objects"].items() if x in used}
+
+
+def migrate() -> None:
+    """Add Jars cached before the Index existed to the Object Store, once."""
+    with refs() as index:
+        if index.get("version", 0) >= INDEX_VERSION:
+            return
+    jar_path = storage.get_jar_path(bare=True)
+    for rel_path in storage.get_relative_paths(jar_path, ".jar", -1):
+        if rel_path.parts[0] != "objects" and (jar_path / rel_path).is_file():
+            add(jar_path / rel_path, str(rel_path.with_suffix("")).replace("/", ":"))
+    with refs() as index:
+        index["version"] = INDEX_VERSION
+
+
+def evict(budget: int = None, keep: list = None) -> list:
+    """Remove the least recently used Jars until the Jar Cache fits into the Budget.
+
+    Jars referenced by an Instance are never removed.
+
+    Keyword Arguments:
+        budget (int): The Budget in Bytes. Defaults to the 'jar_cache_size' Setting, 0 disables Eviction.
+                      (default: {None})
+        keep (list): Tags to keep as well, e.g. Jars just pulled to be installed. (default: {None})
+
+    Returns:
+        list: The removed Tags.
+    """
+    if budget is None:
+        budget = config.parse_size(CFGVARS.get('system', 'jar_cache_size'))
+    if budget <= 0:
+        return []
+
+    evicted = []
+    with refs() as index:
+        total = sum(x["size"] for x in index["objects"].values())
+        in_use = set(index["instances"].values())
+        in_use |= {index["tags"][x] for x in keep or [] if x in index["tags"]}
+        candidates = sorted((x for x in index["objects"] if x not in in_use),
+                            key=lambda x: index["objects"][x].get("used", 0))
+        for jar_hash in candidates:
+            if total <= budget:
+                break
+            tags = [x for x, y in index["tags"].items() if y == jar_hash]
+            for path in [storage.get_jar_path(x) for x in tags] + [get_object_path(jar_hash)]:
+                if path.exists():
+                    path.unlink()
+            for tag in tags:
+                del index["tags"][tag]
+            evicted.extend(tags)
+            total -= index["objects"].pop(jar_hash)["size"]
+    return evicted
+
+
+def list_jars(filter_str: str = '') -> None:
+    """Print a list of all cached Jars from the Index.
+
+    Keyword Arguments:
+        filter_str (str): Filter for version, type or version. (default: {''})
+    """
+    migrate()
+    template = "{:24} {:>10} {:16} {}"
+    print(template.format("Type ID", "Size", "Last Used", "Instances"))
+    with refs() as index:
+        for tag, jar_hash in sorted(index["tags"].items()):
+            if filter_str not in tag:
+                continue
+            entry = index["objects"].get(jar_hash, {})
+            used = datetime.fromtimestamp(entry.get("used", 0)).strftime("%Y-%m-%d %H:%M")
+            instances = ", ".join(sorted(x for x, y in index["instances"].items() if y == jar_hash))
+            print(template.format(tag, f"{entry.get('size', 0) / 1024**2:.1f}MB", used, instances or "-"))
+
+
+def get_ref_counts() -> dict:
+    """Count the Instances using each Jar Object.
+
+    Returns:
+        dict: The Amount of Instances by Hash.
+    """
+    counts = {}
+    with refs() as index:
+        for jar_hash in index["instances"].values():
+            counts[jar_hash] = counts.get(jar_hash, 0) + 1
+    return counts
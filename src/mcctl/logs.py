@@ -0,0 +1,560 @@
+#!/bin/env python3
+
+# mcctl: A Minecraft Server Management Utility written in Python
+# Copyright (C) 2020 Matthias Cotting
+
+# This file is part of mcctl.
+
+# mcctl is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# mcctl is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with mcctl. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import base64
+import shutil
+import select
+import hashlib
+import ctypes
+import ctypes.util
+from pathlib import Path
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# inotify Event Masks, see inotify(7)
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+
+# Rotated Logs are named "YYYY-MM-DD-N.log.gz"
+_ROTATED_LOG = re.compile(r"^(\d{4}-\d{2}-\d{2})-(\d+)\.log\.gz$")
+_BLOCK_SIZE = 64 * 1024
+
+INDEX_NAME = ".index.json"
+# Log Lines start with "[HH:MM:SS] [Thread/LEVEL]:" (vanilla) or "[HH:MM:SS LEVEL]:" (paper/spigot)
+_TIMESTAMP = re.compile(rb"^\[(\d{2}):(\d{2}):(\d{2})")
+_TOKEN = re.compile(rb"\w+")
+_BLOOM_HASHES = 7
+_DAY = 24 * 3600
+
+
+def _inotify_watch(path: Path) -> int:
+    """Create an inotify Instance watching a Directory for written and new Files.
+
+    Arguments:
+        path (Path): The Directory to watch.
+
+    Returns:
+        int: The File Descriptor of the inotify Instance, -1 if inotify is not available.
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        inotify_fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return -1
+    if inotify_fd < 0:
+        return -1
+
+    mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+    if libc.inotify_add_watch(inotify_fd, bytes(path), mask) < 0:
+        os.close(inotify_fd)
+        return -1
+    return inotify_fd
+
+
+@contextmanager
+def tail(log_path: Path, from_start: bool = False, pollrate: float = 0.2) -> dict:
+    """Open a Log File for incremental Reading.
+
+    Only the Bytes appended since the last read are read, see read_appended().
+    Truncation and Rotation of the Log File are detected, a rotated File is read to its End before switching to the new one.
+
+    Arguments:
+        log_path (Path): The Path of the Log File, e.g. "logs/latest.log".
+
+    Keyword Arguments:
+        from_start (bool): Read existing Contents instead of starting at the End of the File. (default: {False})
+        pollrate (float): The polling interval in seconds if inotify is not available. (default: {0.2})
+
+    Yields:
+        dict: A Handle for read_appended().
+    """
+    handle = {
+        "path": log_path,
+        "file": open(log_path, "rb"),
+        "partial": b"",
+        "pollrate": pollrate,
+        "inotify": _inotify_watch(log_path.parent),
+    }
+    if not from_start:
+        handle["file"].seek(0, os.SEEK_END)
+    try:
+        yield handle
+    finally:
+        handle["file"].close()
+        if handle["inotify"] >= 0:
+            os.close(handle["inotify"])
+
+
+def _read_new(handle: dict) -> list:
+    """Read all complete Lines appended to the Log File, following Truncation and Rotation.
+
+    Arguments:
+        handle (dict): A Handle created by tail().
+
+    Returns:
+        list: The new Lines, without Line Endings.
+    """
+    log_file = handle["file"]
+    stat = os.fstat(log_file.fileno())
+    if stat.st_size < log_file.tell():
+        # Truncated, start over.
+        log_file.seek(0)
+        handle["partial"] = b""
+
+    data = handle["partial"] + log_file.read()
+    try:
+        rotated = os.stat(handle["path"]).st_ino != stat.st_ino
+    except FileNotFoundError:
+        # The new File is not yet created.
+        rotated = False
+    if rotated:
+        log_file.close()
+        handle["file"] = open(handle["path"], "rb")
+        # The rotated File ends with a complete line.
+        if data and not data.endswith(b"\n"):
+            data += b"\n"
+        data += handle["file"].read()
+
+    *lines, handle["partial"] = data.split(b"\n")
+    return [line.rstrip(b"\r").decode(errors="replace") for line in lines]
+
+
+def read_appended(handle: dict, timeout: float = 0) -> list:
+    """Return the Lines appended to a Log File since the last Call.
+
+    Waits up to <timeout> seconds for new Lines if there are none yet. inotify is used to wake up
+    as soon as the Log is written to, the File is polled if inotify is not available.
+
+    Arguments:
+        handle (dict): A Handle created by tail().
+
+    Keyword Arguments:
+        timeout (float): Maximum Time to wait for new Lines in seconds. (default: {0})
+
+    Returns:
+        list: The new Lines, without Line Endings. Empty if nothing was appended within <timeout>.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        lines = _read_new(handle)
+        remaining = deadline - time.monotonic()
+        if lines or remaining <= 0:
+            return lines
+
+        if handle["inotify"] >= 0:
+            ready, _, _ = select.select([handle["inotify"]], [], [], remaining)
+            if ready:
+                try:
+                    # Events are not evaluated, only drained.
+                    while os.read(handle["inotify"], 4096):
+                        pass
+                except BlockingIOError:
+                    pass
+        else:
+            time.sleep(min(handle["pollrate"], remaining))
+
+
+def get_log_files(log_dir: Path) -> list:
+    """Get the Log Files of an Instance in chronological Order.
+
+    Arguments:
+        log_dir (Path): The Log Directory of the Instance.
+
+    Returns:
+        list: The rotated Logs, oldest first, followed by "latest.log" if it exists.
+    """
+    rotated = []
+    for entry in os.scandir(log_dir):
+        match = _ROTATED_LOG.match(entry.name)
+        if match and entry.is_file():
+            rotated.append((match.group(1), int(match.group(2)), Path(entry.path)))
+    log_files = [path for _, _, path in sorted(rotated)]
+
+    latest = log_dir / "latest.log"
+    if latest.is_file():
+        log_files.append(latest)
+    return log_files
+
+
+def _find_tail_offset(log_file, count: int) -> tuple:
+    """Find the Start of the last Lines of a File by reading Blocks backwards from its End.
+
+    Arguments:
+        log_file (file): A File opened in binary Mode.
+        count (int): The Amount of Lines to find.
+
+    Returns:
+        tuple: The Offset of the first Line found and the Amount of Lines found.
+    """
+    end = log_file.seek(0, os.SEEK_END)
+    if end == 0:
+        return 0, 0
+    log_file.seek(end - 1)
+    if log_file.read(1) == b"\n":
+        # The last Line Ending does not start a new Line.
+        end -= 1
+
+    found = 0
+    pos = end
+    while pos > 0:
+        size = min(_BLOCK_SIZE, pos)
+        pos -= size
+        log_file.seek(pos)
+        block = log_file.read(size)
+        idx = len(block)
+        while True:
+            idx = block.rfind(b"\n", 0, idx)
+            if idx < 0:
+                break
+            found += 1
+            if found == count:
+                return pos + idx + 1, found
+    return 0, found + 1
+
+
+def _count_lines(log_file) -> int:
+    count = 0
+    last = b"\n"
+    for block in iter(lambda: log_file.read(_BLOCK_SIZE), b""):
+        count += block.count(b"\n")
+        last = block[-1:]
+    # A last Line without Line Ending
+    return count + (last != b"\n")
+
+
+def write_tail(log_dir: Path, limit: int = 0, out=None) -> None:
+    """Write the last Lines of all Logs of an Instance.
+
+    "latest.log" is read backwards from its End, rotated Logs are only decompressed as far as needed
+    to get <limit> Lines. The Lines are streamed to <out> without keeping them in Memory.
+
+    Arguments:
+        log_dir (Path): The Log Directory of the Instance.
+
+    Keyword Arguments:
+        limit (int): The Amount of Lines to write. 0 writes all Lines. (default: {0})
+        out (file): A binary File to write to. Defaults to stdout. (default: {None})
+    """
+    if out is None:
+        sys.stdout.flush()
+        out = sys.stdout.buffer
+
+    # List of (Path, Lines to skip, Offset) to write, newest first.
+    plan = []
+    remaining = limit
+    for log_path in reversed(get_log_files(log_dir)):
+        if limit and remaining <= 0:
+            break
+        if not limit:
+            plan.append((log_path, 0, 0))
+        elif log_path.suffix == ".gz":
+            with gzip.open(log_path, "rb") as log_file:
+                count = _count_lines(log_file)
+            plan.append((log_path, max(count - remaining, 0), 0))
+            remaining -= count
+        else:
+            with open(log_path, "rb") as log_file:
+                offset, count = _find_tail_offset(log_file, remaining)
+            plan.append((log_path, 0, offset))
+            remaining -= count
+
+    for log_path, skip, offset in reversed(plan):
+        opener = gzip.open if log_path.suffix == ".gz" else open
+        with opener(log_path, "rb") as log_file:
+            log_file.seek(offset)
+            for _ in range(skip):
+                log_file.readline()
+            shutil.copyfileobj(log_file, out, _BLOCK_SIZE)
+    out.flush()
+
+
+def parse_time(value: str) -> datetime:
+    """Parse an absolute or relative Point in Time.
+
+    Arguments:
+        value (str): A Time like "2020-11-22", "2020-11-22 13:37", "13:37:00" (today),
+            or a Duration before now like "30m", "12h", "2d".
+
+    Raises:
+        ValueError: Raised if the Value cannot be parsed.
+
+    Returns:
+        datetime: The Point in Time as local, naive datetime.
+    """
+    units = {"s": 1, "m": 60, "h": 3600, "d": _DAY, "w": 7 * _DAY}
+    relative = re.match(r"^(\d+)([smhdw])$", value)
+    if relative:
+        seconds = int(relative.group(1)) * units[relative.group(2)]
+        return datetime.now() - timedelta(seconds=seconds)
+
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    for fmt in ("%H:%M:%S", "%H:%M"):
+        try:
+            parsed = datetime.strptime(value, fmt).time()
+            return datetime.combine(datetime.now().date(), parsed)
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid Time '{value}'")
+
+
+def _bloom_positions(token: bytes, size: int) -> list:
+    digest = hashlib.blake2b(token, digest_size=8).digest()
+    first, second = int.from_bytes(digest[:4], "little"), int.from_bytes(digest[4:], "little")
+    return [(first + i * second) % size for i in range(_BLOOM_HASHES)]
+
+
+def _bloom_create(tokens: set) -> dict:
+    # About 10 Bits per Token, for ~1% false Positives.
+    size = 1024
+    while size < len(tokens) * 10:
+        size *= 2
+    bits = bytearray(size // 8)
+    for token in tokens:
+        for pos in _bloom_positions(token, size):
+            bits[pos // 8] |= 1 << (pos % 8)
+    return {"size": size, "bits": base64.b64encode(bits).decode()}
+
+
+def _bloom_contains(bloom: dict, tokens: list) -> bool:
+    size = bloom["size"]
+    bits = base64.b64decode(bloom["bits"])
+    return all(bits[pos // 8] & (1 << (pos % 8))
+               for token in tokens for pos in _bloom_positions(token, size))
+
+
+def _literal_tokens(pattern: bytes) -> list:
+    """Get the Tokens every Line containing <pattern> must contain as a whole Token.
+
+    A Token at the Start or End of the Pattern may be Part of a longer Token in the Line, so only enclosed Tokens are returned.
+    """
+    return [match.group() for match in _TOKEN.finditer(pattern)
+            if match.start() > 0 and match.end() < len(pattern)]
+
+
+def _get_seconds(line: bytes, last: list) -> list:
+    """Get the Day (relative to the first Timestamp) and Second of the Day of a Log Line.
+
+    Arguments:
+        line (bytes): The Log Line.
+        last (list): Day and Second of the previous Timestamp, None for the first one.
+
+    Returns:
+        list: Day and Second of the Line, <last> if the Line has no Timestamp.
+    """
+    match = _TIMESTAMP.match(line)
+    if not match:
+        return last
+    hours, minutes, seconds = (int(x) for x in match.groups())
+    secs = hours * 3600 + minutes * 60 + seconds
+    if last is None:
+        return [0, secs]
+    # Timestamps only contain the Time, a Jump back by more than half a Day is Midnight.
+    return [last[0] + (secs < last[1] - _DAY // 2), secs]
+
+
+def _scan(log_file, entry: dict, tokens: set = None) -> None:
+    """Scan the Lines of a Log File from the current Position and update its Index Entry.
+
+    Arguments:
+        log_file (file): A Log File opened in binary Mode, positioned at entry["offset"].
+        entry (dict): The Index Entry of the File.
+
+    Keyword Arguments:
+        tokens (set): A Set the Tokens of all Lines are added to. (default: {None})
+    """
+    offset = entry["offset"]
+    for line in log_file:
+        if not line.endswith(b"\n"):
+            # Still being written.
+            break
+        last = entry["last"]
+        current = _get_seconds(line, last)
+        if current is not last:
+            if last is None:
+                entry["first"] = current
+            if last is None or current[0] != last[0] or current[1] // 3600 != last[1] // 3600:
+                # First Line of every Hour, to seek to when reading from a Point in Time.
+                entry["marks"].append(current + [offset])
+            entry["last"] = current
+        if tokens is not None:
+            tokens.update(_TOKEN.findall(line))
+        offset += len(line)
+        entry["lines"] += 1
+    entry["offset"] = offset
+
+
+def update_index(log_dir: Path) -> dict:
+    """Update the persistent Index of the Logs of an Instance.
+
+    For every Log File, the Index records the Line Count, the Time Span, the Offset of the first Line of every Hour
+    and, for rotated Logs, a Bloom Filter of all Tokens. Only new rotated Logs and the Lines appended to "latest.log"
+    since the last Update are read.
+
+    Arguments:
+        log_dir (Path): The Log Directory of the Instance.
+
+    Returns:
+        dict: The Index Entries by File Name.
+    """
+    index_path = log_dir / INDEX_NAME
+    try:
+        with open(index_path) as index_file:
+            index = json.load(index_file)
+    except (OSError, ValueError):
+        index = {}
+
+    new_index = {}
+    changed = False
+    for log_path in get_log_files(log_dir):
+        stat = log_path.stat()
+        entry = index.get(log_path.name)
+        latest = log_path.suffix != ".gz"
+        if latest:
+            if entry is None or entry.get("inode") != stat.st_ino or stat.st_size < entry["offset"]:
+                entry = None
+        elif entry is None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+            entry = None
+
+        if entry is None:
+            entry = {"offset": 0, "lines": 0, "first": None, "last": None, "marks": []}
+        if latest and entry["offset"] < stat.st_size:
+            offset = entry["offset"]
+            with open(log_path, "rb") as log_file:
+                log_file.seek(offset)
+                _scan(log_file, entry)
+            changed = changed or entry["offset"] != offset
+        elif not latest and "bloom" not in entry:
+            tokens = set()
+            with gzip.open(log_path, "rb") as log_file:
+                _scan(log_file, entry, tokens)
+            entry["bloom"] = _bloom_create(tokens)
+            changed = True
+
+        entry.update({"size": stat.st_size, "mtime": stat.st_mtime, "inode": stat.st_ino})
+        new_index[log_path.name] = entry
+
+    if changed or new_index.keys() != index.keys():
+        tmp_path = index_path.with_name(f"{INDEX_NAME}.tmp")
+        with open(tmp_path, "w") as index_file:
+            json.dump(new_index, index_file)
+        os.replace(tmp_path, index_path)
+    return new_index
+
+
+def _get_base(log_path: Path, entry: dict) -> datetime:
+    """Get the Midnight of the Day the first Timestamp of a Log was written.
+
+    Log Lines only contain the Time of Day. The Date of the last Line is the Date in the Name of a rotated Log,
+    or the Modification Date of "latest.log". Every Midnight passed in the Log is one Day back from there.
+    """
+    match = _ROTATED_LOG.match(log_path.name)
+    if match:
+        last_date = datetime.strptime(match.group(1), "%Y-%m-%d")
+    else:
+        last_date = datetime.fromtimestamp(entry["mtime"]).replace(hour=0, minute=0, second=0, microsecond=0)
+    days = entry["last"][0] if entry["last"] else 0
+    return last_date - timedelta(days=days)
+
+
+def write_filtered(log_dir: Path, since: datetime = None, until: datetime = None,
+                   grep: str = None, limit: int = 0, out=None) -> None:
+    """Write the Lines of all Logs of an Instance within a Time Range and/or containing a String.
+
+    The Log Index (see update_index()) is used to only read Logs which can contain matching Lines,
+    and to start reading at the Hour <since> falls into.
+
+    Keyword Arguments:
+        since (datetime): Only write Lines logged at or after this Time. (default: {None})
+        until (datetime): Only write Lines logged at or before this Time. (default: {None})
+        grep (str): Only write Lines containing this String. (default: {None})
+        limit (int): Only write the last <limit> matching Lines. 0 writes all. (default: {0})
+        out (file): A binary File to write to. Defaults to stdout. (default: {None})
+    """
+    if out is None:
+        sys.stdout.flush()
+        out = sys.stdout.buffer
+
+    index = update_index(log_dir)
+    pattern = grep.encode() if grep else None
+    tokens = _literal_tokens(pattern) if pattern else []
+    matches = deque(maxlen=limit) if limit else None
+
+    for log_path in get_log_files(log_dir):
+        entry = index.get(log_path.name)
+        if entry is None:
+            continue
+        base = _get_base(log_path, entry)
+        lower = (since - base).total_seconds() if since else None
+        upper = (until - base).total_seconds() if until else None
+
+        if entry["first"] is not None:
+            first = entry["first"][0] * _DAY + entry["first"][1]
+            last = entry["last"][0] * _DAY + entry["last"][1]
+            if upper is not None and first > upper:
+                break
+            if lower is not None and last < lower:
+                continue
+        if tokens and "bloom" in entry and not _bloom_contains(entry["bloom"], tokens):
+            continue
+
+        current = None
+        opener = gzip.open if log_path.suffix == ".gz" else open
+        with opener(log_path, "rb") as log_file:
+            if lower is not None:
+                for mark in reversed(entry["marks"]):
+                    if mark[0] * _DAY + mark[1] <= lower:
+                        log_file.seek(mark[2])
+                        current = mark[:2]
+                        break
+            for line in log_file:
+                current = _get_seconds(line, current)
+                if current is not None:
+                    seconds = current[0] * _DAY + current[1]
+                    if upper is not None and seconds > upper:
+                        break
+                    if lower is not None and seconds < lower:
+                        continue
+                elif lower is not None:
+                    continue
+                if pattern and pattern not in line:
+                    continue
+                if not line.endswith(b"\n"):
+                    line += b"\n"
+                if matches is None:
+                    out.write(line)
+                else:
+                    matches.append(line)
+
+    if matches:
+        out.writelines(matches)
+    out.flush()
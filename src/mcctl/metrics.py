@@ -0,0 +1,250 @@
+#!/bin/env python3
+
+# mcctl: A Minecraft Server Management Utility written in Python
+# Copyright (C) 2020 Matthias Cotting
+
+# This file is part of mcctl.
+
+# mcctl is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# mcctl is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with mcctl. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import re
+import mmap
+import time
+import struct
+from pathlib import Path
+from datetime import datetime
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor
+from mcctl import service, storage, common, logs
+
+# Ring Files start with a Header (Magic, Capacity, Amount of Samples ever written), followed by <capacity>
+# fixed-size Records. Sample n is stored in Slot n % capacity, so Slots are in Time Order from the oldest Sample on.
+_HEADER = struct.Struct("<4sIQ")
+_MAGIC = b"MCM1"
+# Time, Memory (Bytes), CPU Time (ns, cumulative), Latency (ms), Players, lagging Log Messages, skipped Ticks
+_RECORD = struct.Struct("<dQQfiII")
+CAPACITY = 8640
+_UNSET = 2**64 - 1
+_LAG_EXPR = re.compile(r"Can't keep up!.*?(\d+) ticks? behind")
+
+
+def get_ring_path(instance: str) -> Path:
+    """Return the Path of the Metrics Ring File of an Instance.
+
+    Arguments:
+        instance (str): The name of the Instance.
+
+    Returns:
+        Path: The Path of the Ring File.
+    """
+    return storage.get_home_path() / "metrics" / f"{instance}.ring"
+
+
+def open_ring(instance: str, capacity: int = CAPACITY) -> mmap.mmap:
+    """Map the Ring File of an Instance into memory, creating it if necessary.
+
+    Arguments:
+        instance (str): The name of the Instance.
+
+    Keyword Arguments:
+        capacity (int): The Amount of Samples kept in a new Ring File. (default: {CAPACITY})
+
+    Returns:
+        mmap.mmap: The writable Mapping of the Ring File.
+    """
+    ring_path = get_ring_path(instance)
+    storage.create_dirs(ring_path.parent)
+    fd = os.open(ring_path, os.O_RDWR | os.O_CREAT, 0o640)
+    try:
+        if os.fstat(fd).st_size == 0:
+            os.ftruncate(fd, _HEADER.size + capacity * _RECORD.size)
+            os.pwrite(fd, _HEADER.pack(_MAGIC, capacity, 0), 0)
+        return mmap.mmap(fd, 0)
+    finally:
+        os.close(fd)
+
+
+def append(ring: mmap.mmap, sample: tuple) -> None:
+    """Append a Sample to a Ring, overwriting the oldest one if the Ring is full.
+
+    Arguments:
+        ring (mmap.mmap): The Mapping of the Ring File.
+        sample (tuple): The Fields of the Record.
+    """
+    _, capacity, count = _HEADER.unpack_from(ring)
+    _RECORD.pack_into(ring, _HEADER.size + (count % capacity) * _RECORD.size, *sample)
+    # The Count is updated last, so Readers never see a partially written Record as valid.
+    _HEADER.pack_into(ring, 0, _MAGIC, capacity, count + 1)
+
+
+def read(instance: str, since: float = 0, until: float = None) -> list:
+    """Read the Samples of an Instance within a Time Range.
+
+    The Start is found by Binary Search over the Slots in Time Order, only Records in range are unpacked.
+
+    Arguments:
+        instance (str): The name of the Instance.
+
+    Keyword Arguments:
+        since (float): Unix Timestamp of the oldest Sample to return. (default: {0})
+        until (float): Unix Timestamp of the newest Sample to return. (default: {None})
+
+    Returns:
+        list: The Records as Tuples, oldest first.
+    """
+    ring_path = get_ring_path(instance)
+    if not ring_path.is_file():
+        raise FileNotFoundError(f"No Metrics collected for '{instance}'.")
+    with open(ring_path, "rb") as ring_file, \
+            mmap.mmap(ring_file.fileno(), 0, access=mmap.ACCESS_READ) as ring:
+        magic, capacity, count = _HEADER.unpack_from(ring)
+        if magic != _MAGIC:
+            raise ValueError(f"Invalid Ring File '{ring_path}'.")
+        first = max(count - capacity, 0)
+
+        def get_time(idx: int) -> float:
+            return struct.unpack_from("<d", ring, _HEADER.size + (idx % capacity) * _RECORD.size)[0]
+
+        low, high = first, count
+        while low < high:
+            mid = (low + high) // 2
+            if get_time(mid) < since:
+                low = mid + 1
+            else:
+                high = mid
+
+        samples = []
+        for idx in range(low, count):
+            sample = _RECORD.unpack_from(ring, _HEADER.size + (idx % capacity) * _RECORD.size)
+            if until is not None and sample[0] > until:
+                break
+            samples.append(sample)
+    return samples
+
+
+def sample(instance: str, state: dict, log: dict = None) -> tuple:
+    """Take a Sample of an Instance.
+
+    Arguments:
+        instance (str): The name of the Instance.
+        state (dict): The Unit Properties of the Instance, see service.query_states().
+
+    Keyword Arguments:
+        log (dict): A Handle of the Instance Log, see logs.tail(). (default: {None})
+
+    Returns:
+        tuple: The Fields of the Record.
+    """
+    lag_messages = skipped_ticks = 0
+    for line in logs.read_appended(log) if log is not None else []:
+        match = _LAG_EXPR.search(line)
+        if match:
+            lag_messages += 1
+            skipped_ticks += int(match.group(1))
+
+    players, latency = -1, float("nan")
+    if state.get("ActiveState") in ("active", "reloading"):
+        try:
+            status = common.get_status(instance)
+        except (OSError, ValueError, TypeError):
+            # e.g. no server-port in the server.properties, recorded as unreachable.
+            status = None
+        if status is not None:
+            players, latency = status.players.online, status.latency
+    memory = state.get("MemoryCurrent")
+    cpu = state.get("CPUUsageNSec")
+    return (time.time(), _UNSET if memory is None else memory, _UNSET if cpu is None else cpu,
+            latency, players, lag_messages, skipped_ticks)
+
+
+def collect(interval: float = 10.0, count: int = 0) -> None:
+    """Sample all Instances periodically and append the Samples to their Ring Files.
+
+    Keyword Arguments:
+        interval (float): Seconds between Samples. (default: {10.0})
+        count (int): The Amount of Samples to take, 0 runs until interrupted. (default: {0})
+    """
+    rings = {}
+    with ExitStack() as stack, ThreadPoolExecutor(8) as executor:
+        log_handles = {}
+        taken = 0
+        next_sample = time.monotonic()
+        while not count or taken < count:
+            states = service.query_states()
+            for instance in states:
+                if instance not in rings:
+                    rings[instance] = stack.enter_context(open_ring(instance))
+                log_path = storage.get_instance_path(instance) / "logs" / "latest.log"
+                if instance not in log_handles and log_path.is_file():
+                    log_handles[instance] = stack.enter_context(logs.tail(log_path))
+
+            futures = {x: executor.submit(sample, x, y, log_handles.get(x)) for x, y in states.items()}
+            for instance, future in futures.items():
+                append(rings[instance], future.result())
+            taken += 1
+
+            next_sample += interval
+            if not count or taken < count:
+                time.sleep(max(next_sample - time.monotonic(), 0))
+
+
+def stats(instance: str, since: datetime = None, until: datetime = None, rows: int = 30) -> None:
+    """Print the collected Metrics of an Instance, aggregated into Rows of equal Duration.
+
+    Arguments:
+        instance (str): The name of the Instance.
+
+    Keyword Arguments:
+        since (datetime): Only show Samples taken after this Time. (default: {None})
+        until (datetime): Only show Samples taken before this Time. (default: {None})
+        rows (int): The maximum Amount of Rows. (default: {30})
+    """
+    samples = read(instance, since.timestamp() if since else 0, until.timestamp() if until else None)
+    template = "{:16} {:>11} {:>11} {:>10} {:>6} {:>6} {:>5}"
+    print(template.format("Time", "Players", "Latency", "Memory", "CPU", "TPS", "Lag"))
+    if not samples:
+        return
+
+    start, end = samples[0][0], samples[-1][0]
+    step = max((end - start) / rows, 1e-9)
+    buckets = [[] for _ in range(rows)]
+    for idx, record in enumerate(samples):
+        buckets[min(int((record[0] - start) / step), rows - 1)].append((idx, record))
+
+    for bucket in (x for x in buckets if x):
+        records = [x[1] for x in bucket]
+        online = [x[4] for x in records if x[4] >= 0]
+        latencies = [x[3] for x in records if x[3] == x[3]]
+        memory = max((x[1] for x in records if x[1] != _UNSET), default=None)
+
+        # CPU Time and skipped Ticks are related to the Time since the previous Sample.
+        first_idx = bucket[0][0]
+        previous = samples[first_idx - 1] if first_idx else records[0]
+        elapsed = records[-1][0] - previous[0]
+        cpu = tps = None
+        if elapsed > 0:
+            if records[-1][2] != _UNSET and previous[2] != _UNSET and records[-1][2] >= previous[2]:
+                cpu = (records[-1][2] - previous[2]) / 1e9 / elapsed
+            skipped = sum(x[6] for x in records if x is not previous)
+            tps = max(20 - skipped / elapsed, 0)
+
+        print(template.format(
+            datetime.fromtimestamp(records[-1][0]).strftime("%Y-%m-%d %H:%M"),
+            f"{sum(online) / len(online):.1f} ({max(online)})" if online else "-",
+            f"{sum(latencies) / len(latencies):.1f}ms" if latencies else "-",
+            f"{memory / 1024**2:.0f}MB" if memory is not None else "-",
+            f"{cpu * 100:.0f}%" if cpu is not None else "-",
+            f"{tps:.1f}" if tps is not None else "-",
+            sum(x[5] for x in records)))
@@ -18,16 +18,18 @@
 # You should have received a copy of the GNU General Public License
 # along with mcctl. If not, see <http://www.gnu.org/licenses/>.
 
+import re
 import shlex
+import socket
 import time
 import os
 import sys
 import subprocess as sproc
-from typing import Callable
+from typing import Callable, Iterator
 from contextlib import contextmanager
 from pathlib import Path
 from pwd import getpwnam
-from mcctl import CFGVARS, storage, service, common
+from mcctl import CFGVARS, storage, service, common, logs, rcon
 from mcctl.visuals import compute
 
 
@@ -81,24 +83,56 @@ def edit(file_path: Path, editor: str) -> None:
     proc.wait()
 
 
-def mc_exec(instance: str, command: list, pollrate: float = 0.2, max_retries: int = 24, max_flush_retries: int = 4) -> None:
-    """Execute a command on the console of a server.
+def console(instance: str, command: str, use_screen: bool = False, expect: str = None, timeout: float = None,
+            pollrate: float = 0.2, max_retries: int = 24, max_flush_retries: int = 4) -> Iterator[str]:
+    """Execute a command on the console of a server and yield the lines of its response.
 
-    Uses the 'stuff' command of screen to pass the minecraft command to the server.
-    Return Values are read from 'latest.log' shortly after the command is executed.
-    The logfile is read every <timeout> seconds. If nothing is appended to the Log after the set amount of <retries>,
-    the function exits. If there were already some lines received, the function tries <flush_retries> times before exiting.
-    Like this, the function will more likely give an output, and will exit faster if an output was already returned.
+    If RCON is enabled in the server.properties, the command is sent over a pooled RCON connection.
+    Otherwise, the 'stuff' command of screen is used to pass the minecraft command to the server,
+    and the response is read from 'latest.log', see mc_exec().
 
     Arguments:
         instance (str): The name of the instance.
-        command (list): A list of the individual parts of the command executed on the server console.
+        command (str): The command executed on the server console.
 
     Keyword Arguments:
-        pollrate (float): The polling interval between log reads/checks. (default: {0.2})
-        max_retries (int): The amount of retries when no lines have been pushed to console. (default: {25})
-        max_flush_retries (int): The amount of retries when some lines have been pushed to console. (default: {10})
+        use_screen (bool): Use screen even if RCON is enabled. (default: {False})
+        expect (str): A regular expression matching the last line of the response. Lines are read until it matches. (default: {None})
+        timeout (float): Seconds to wait for a line matching <expect>. Defaults to <max_retries> * <pollrate>. (default: {None})
+        pollrate (float): The polling interval if inotify is unavailable, unit of the retry windows. (default: {0.2})
+        max_retries (int): The amount of retries when no lines have been pushed to console. (default: {24})
+        max_flush_retries (int): The amount of retries when some lines have been pushed to console. (default: {4})
+
+    If RCON fails for any other Reason than a refused Connection, e.g. a wrong rcon.password, the screen Session is
+    used instead. A Timeout is not retried on screen, as the Command may already have been executed.
+
+    Raises:
+        TimeoutError: Raised if no line matching <expect> was returned.
+        ConnectionError: Raised if the Server is starting up or did not answer over RCON in time.
+
+    Yields:
+        str: The lines of the response.
     """
+    expr = re.compile(expect) if expect else None
+    if not use_screen and rcon.is_enabled(instance):
+        try:
+            response = rcon.execute(instance, command)
+        except ConnectionRefusedError:
+            if not service.is_active(instance):
+                raise OSError("The Server is not running.") from None
+            raise ConnectionError("The Server is starting up.") from None
+        except socket.timeout:
+            raise ConnectionError(f"No RCON response to '{command}' in time.") from None
+        except OSError as ex:
+            print(f"WARN: RCON failed ({ex}), using screen instead.", file=sys.stderr)
+            response = None
+        if response is not None:
+            lines = response.splitlines()
+            yield from lines
+            if expr and not any(expr.search(line) for line in lines):
+                raise TimeoutError(f"Unexpected response to '{command}'.")
+            return
+
     if not service.is_active(instance):
         raise OSError("The Server is not running.")
     elif not common.is_ready(instance):
@@ -106,26 +140,52 @@ def mc_exec(instance: str, command: list, pollrate: float = 0.2, max_retries: in
 
     log_path = storage.get_instance_path(instance) / "logs/latest.log"
 
-    with open(log_path) as log_file:
-        old_count = sum(1 for line in log_file) - 1
-
-        jar_cmd = " ".join(command)
+    with logs.tail(log_path, pollrate=pollrate) as log:
         # Use ^U^Y to cut and paste Text already in the Session
         cmd = shlex.split(
-            f"screen -p 0 -S mc-{instance} -X stuff '^U{jar_cmd}^M^Y'")
+            f"screen -p 0 -S mc-{instance} -X stuff '^U{command}^M^Y'")
         proc = sproc.Popen(cmd, preexec_fn=demote())  # nopep8 pylint: disable=subprocess-popen-preexec-fn
         proc.wait()
 
-        i = 0
-        while i < max_retries:
-            i += 1
-            time.sleep(pollrate)
-            log_file.seek(0)
-            for j, line in enumerate(log_file):
-                if j > old_count:
-                    i = max_retries - max_flush_retries
-                    print(line.rstrip())
-                    old_count += 1
+        if expr:
+            deadline = time.monotonic() + (timeout or pollrate * max_retries)
+            while time.monotonic() < deadline:
+                for line in logs.read_appended(log, deadline - time.monotonic()):
+                    yield line
+                    if expr.search(line):
+                        return
+            raise TimeoutError(f"No response to '{command}'.")
+
+        lines = logs.read_appended(log, pollrate * max_retries)
+        while lines:
+            yield from lines
+            lines = logs.read_appended(log, pollrate * max_flush_retries)
+
+
+def mc_exec(instance: str, command: list, use_screen: bool = False, pollrate: float = 0.2, max_retries: int = 24, max_flush_retries: int = 4) -> None:
+    """Execute a command on the console of a server.
+
+    If RCON is enabled in the server.properties, the command is sent over a pooled RCON connection
+    and its exact response is printed.
+    Otherwise, the 'stuff' command of screen is used to pass the minecraft command to the server.
+    Return Values are read from 'latest.log' as soon as they are appended. If nothing is appended to the Log
+    within <max_retries> * <pollrate> seconds, the function exits. If there were already some lines received,
+    the function exits as soon as no more lines are appended within <max_flush_retries> * <pollrate> seconds.
+    Like this, the function will more likely give an output, and will exit faster if an output was already returned.
+
+    Arguments:
+        instance (str): The name of the instance.
+        command (list): A list of the individual parts of the command executed on the server console.
+
+    Keyword Arguments:
+        use_screen (bool): Use screen even if RCON is enabled. (default: {False})
+        pollrate (float): The polling interval if inotify is unavailable, unit of the retry windows. (default: {0.2})
+        max_retries (int): The amount of retries when no lines have been pushed to console. (default: {24})
+        max_flush_retries (int): The amount of retries when some lines have been pushed to console. (default: {4})
+    """
+    for line in console(instance, " ".join(command), use_screen, pollrate=pollrate,
+                        max_retries=max_retries, max_flush_retries=max_flush_retries):
+        print(line)
 
 
 def get_ids(user: str) -> tuple:
@@ -0,0 +1,211 @@
+#!/bin/env python3
+
+# mcctl: A Minecraft Server Management Utility written in Python
+# Copyright (C) 2020 Matthias Cotting
+
+# This file is part of mcctl.
+
+# mcctl is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# mcctl is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with mcctl. If not, see <http://www.gnu.org/licenses/>.
+
+import struct
+import socket
+import itertools
+import threading
+from mcctl import config, storage
+
+# Packet Types, see https://wiki.vg/RCON
+SERVERDATA_AUTH = 3
+SERVERDATA_AUTH_RESPONSE = 2
+SERVERDATA_EXECCOMMAND = 2
+SERVERDATA_RESPONSE_VALUE = 0
+
+# Authenticated Connections by Instance Name, reused for all Commands of this Process.
+_CONNECTIONS = {}
+_LOCKS = {}
+_POOL_LOCK = threading.Lock()
+_REQUEST_IDS = itertools.count(1)
+
+
+def get_settings(instance: str) -> dict:
+    """Read the RCON Settings of an Instance from its server.properties.
+
+    Arguments:
+        instance (str): The name of the instance.
+
+    Returns:
+        dict: "port" and "password" of RCON, None if RCON is disabled.
+    """
+    cfg = config.get_properties(
+        storage.get_instance_path(instance) / "server.properties")
+    if cfg.get("enable-rcon", "false").lower() != "true" or not cfg.get("rcon.password"):
+        return None
+    return {
+        "port": int(cfg.get("rcon.port") or 25575),
+        "password": cfg.get("rcon.password")
+    }
+
+
+def is_enabled(instance: str) -> bool:
+    """Test if RCON is enabled for an Instance.
+
+    Arguments:
+        instance (str): The name of the instance.
+
+    Returns:
+        bool: True if RCON is enabled and a Password is set.
+    """
+    return get_settings(instance) is not None
+
+
+def _send_packet(sock: socket.socket, request_id: int, packet_type: int, body: str) -> None:
+    payload = struct.pack("<ii", request_id, packet_type) + body.encode() + b"\0\0"
+    sock.sendall(struct.pack("<i", len(payload)) + payload)
+
+
+def _recv_exactly(sock: socket.socket, length: int) -> bytes:
+    data = b""
+    while len(data) < length:
+        chunk = sock.recv(length - len(data))
+        if not chunk:
+            raise ConnectionResetError("RCON Connection closed by Server.")
+        data += chunk
+    return data
+
+
+def _recv_packet(sock: socket.socket) -> tuple:
+    length, = struct.unpack("<i", _recv_exactly(sock, 4))
+    request_id, packet_type = struct.unpack("<ii", _recv_exactly(sock, 8))
+    body = _recv_exactly(sock, length - 8)
+    return request_id, packet_type, body[:-2]
+
+
+def connect(port: int, password: str, host: str = "localhost", timeout: float = 5.0) -> socket.socket:
+    """Open and authenticate an RCON Connection.
+
+    Arguments:
+        port (int): The RCON Port of the Server.
+        password (str): The RCON Password of the Server.
+
+    Keyword Arguments:
+        host (str): The Host of the Server. (default: {"localhost"})
+        timeout (float): Socket Timeout in seconds. (default: {5.0})
+
+    Raises:
+        PermissionError: Raised if the Password was not accepted.
+
+    Returns:
+        socket: The authenticated Connection.
+    """
+    sock = socket.create_connection((host, port), timeout)
+    try:
+        request_id = next(_REQUEST_IDS)
+        _send_packet(sock, request_id, SERVERDATA_AUTH, password)
+        packet_type = None
+        while packet_type != SERVERDATA_AUTH_RESPONSE:
+            response_id, packet_type, _ = _recv_packet(sock)
+        if response_id != request_id:
+            raise PermissionError("RCON Authentication failed.")
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+def command(sock: socket.socket, cmd: str) -> str:
+    """Execute a Command on an authenticated RCON Connection.
+
+    Responses can be split into multiple Packets. To know when the Response is complete,
+    an invalid Packet is sent after the Command; the Server answers it after the last Packet of the Response.
+
+    Arguments:
+        sock (socket): A Connection opened with connect().
+        cmd (str): The Command to execute.
+
+    Returns:
+        str: The Response of the Server.
+    """
+    request_id = next(_REQUEST_IDS)
+    end_id = next(_REQUEST_IDS)
+    _send_packet(sock, request_id, SERVERDATA_EXECCOMMAND, cmd)
+    _send_packet(sock, end_id, SERVERDATA_RESPONSE_VALUE, "")
+
+    response = b""
+    while True:
+        response_id, _, body = _recv_packet(sock)
+        if response_id == end_id:
+            break
+        if response_id == request_id:
+            response += body
+    return response.decode(errors="replace")
+
+
+def execute(instance: str, cmd: str) -> str:
+    """Execute a Command on an Instance via RCON.
+
+    Connections are kept open and reused for subsequent Commands on the same Instance.
+    A Connection closed by the Server, e.g. after a restart, is reopened once.
+
+    Arguments:
+        instance (str): The name of the instance.
+        cmd (str): The Command to execute.
+
+    Raises:
+        ValueError: Raised if RCON is not enabled for the Instance.
+
+    Returns:
+        str: The Response of the Server.
+    """
+    with _POOL_LOCK:
+        lock = _LOCKS.setdefault(instance, threading.Lock())
+
+    with lock:
+        sock = _CONNECTIONS.pop(instance, None)
+        if sock is not None:
+            try:
+                response = command(sock, cmd)
+            except ConnectionError:
+                # Closed by the Server, reconnect below.
+                sock.close()
+            except BaseException:
+                sock.close()
+                raise
+            else:
+                _CONNECTIONS[instance] = sock
+                return response
+
+        settings = get_settings(instance)
+        if settings is None:
+            raise ValueError("RCON is not enabled.")
+        sock = connect(settings["port"], settings["password"])
+        try:
+            response = command(sock, cmd)
+        except BaseException:
+            sock.close()
+            raise
+        _CONNECTIONS[instance] = sock
+        return response
+
+
+def close(instance: str = None) -> None:
+    """Close pooled RCON Connections.
+
+    Keyword Arguments:
+        instance (str): Only close the Connection of this Instance. All are closed if omitted. (default: {None})
+    """
+    with _POOL_LOCK:
+        instances = [instance] if instance else list(_CONNECTIONS)
+        for name in instances:
+            sock = _CONNECTIONS.pop(name, None)
+            if sock is not None:
+                sock.close()
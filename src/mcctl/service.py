@@ -18,16 +18,131 @@
 # You should have received a copy of the GNU General Public License
 # along with mcctl. If not, see <http:// www.gnu.org/licenses/>.
 
+import re
 import shlex
 import time
+import fnmatch
 import subprocess as sproc
-from mcctl import CFGVARS, proc
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures, FIRST_COMPLETED
+from mcctl import CFGVARS, proc, storage, common, logs, config
 
 
 UNIT_NAME = CFGVARS.get('system', 'systemd_service')
+UNIT_PROPERTIES = ("ActiveState", "SubState", "UnitFileState",
+                   "MainPID", "MemoryCurrent", "CPUUsageNSec")
 
+# States for which "systemctl is-active" and "systemctl is-enabled" succeed.
+_ACTIVE_STATES = ("active", "reloading")
+_ENABLED_STATES = ("enabled", "enabled-runtime", "static",
+                   "indirect", "generated", "transient", "alias")
 
-def is_active(instance: str) -> bool:
+# Logged by the Server once it accepts Connections, e.g. "[12:00:00] [Server thread/INFO]: Done (12.345s)! For help, ..."
+_DONE_LINE = re.compile(r"\]: Done \((\d+(?:[.,]\d+)?)s\)!")
+# Bounds of the exponential Polling Interval in Seconds while waiting for a Server.
+_POLL_MIN = 0.1
+_POLL_MAX = 5.0
+# Seconds before a Restart at which Players on a populated Server are warned during a Rolling Restart.
+RESTART_WARNINGS = (60, 30, 10, 5)
+# Seconds between Status Pings while waiting for Servers to empty during a Rolling Restart.
+DRAIN_POLL = 10.0
+
+# Snapshot of the last queried Unit States and the Time they were queried at, by Instance Name.
+# States older than STATE_TTL Seconds are queried again, which matters in long-running Processes like the Exporter.
+# Callers that just queried many Instances pass the Result on instead, see is_active() and is_enabled().
+STATE_TTL = 2.0
+_STATES = {}
+_STATE_TIMES = {}
+
+
+def get_unit_name(instance: str) -> str:
+    """Return the systemd Unit Name of an Instance.
+
+    Arguments:
+        instance (str): The name of the instance.
+
+    Returns:
+        str: The Unit Name, e.g. "mcserver@myserver".
+    """
+    return "@".join((UNIT_NAME, instance))
+
+
+def parse_unit_properties(output: str) -> list:
+    """Parse the Output of "systemctl show" for one or more Units.
+
+    Numeric Properties are converted to int, unset Values (e.g. MemoryCurrent without Accounting) to None.
+
+    Arguments:
+        output (str): The Output of "systemctl show", with one Block per Unit separated by an empty Line.
+
+    Returns:
+        list: A dict of Properties for each Unit, in Order of the Output.
+    """
+    numeric = ("MainPID", "MemoryCurrent", "CPUUsageNSec")
+    units = []
+    for block in output.strip().split("\n\n"):
+        props = {}
+        for line in block.splitlines():
+            key, _, value = line.partition("=")
+            if key in numeric:
+                # systemd reports unset Counters as "[not set]" or UINT64_MAX
+                value = int(value) if value.isdigit() and int(value) < 2**64 - 1 else None
+            props[key] = value
+        units.append(props)
+    return units
+
+
+def query_states(instances: list = None) -> dict:
+    """Query the State of multiple Instances with a single systemctl call.
+
+    The Result is kept as a Snapshot which is used by is_active() and is_enabled().
+
+    Keyword Arguments:
+        instances (list): The Instance Names to query. All Instances are queried if omitted. (default: {None})
+
+    Returns:
+        dict: The Unit Properties (see UNIT_PROPERTIES) by Instance Name.
+    """
+    if instances is None:
+        base_path = storage.get_instance_path(bare=True)
+        instances = sorted(x.name for x in base_path.iterdir())
+    if not instances:
+        return {}
+
+    cmd = ["systemctl", "show", f"--property={','.join(UNIT_PROPERTIES)}"]
+    cmd.extend(get_unit_name(x) for x in instances)
+    out = sproc.run(cmd, stdout=sproc.PIPE, stderr=sproc.PIPE,
+                    universal_newlines=True, check=False)
+    units = parse_unit_properties(out.stdout)
+    if out.returncode != 0 or len(units) != len(instances):
+        raise OSError(f"Unable to query Units: {out.stderr.strip()}")
+
+    states = dict(zip(instances, units))
+    _STATES.update(states)
+    now = time.monotonic()
+    _STATE_TIMES.update((x, now) for x in instances)
+    return states
+
+
+def get_state(instance: str, refresh: bool = False) -> dict:
+    """Get the Unit Properties of an Instance from the Snapshot.
+
+    Arguments:
+        instance (str): The name of the instance.
+
+    Keyword Arguments:
+        refresh (bool): Query systemd even if the Instance is in the Snapshot. (default: {False})
+
+    Returns:
+        dict: The Unit Properties (see UNIT_PROPERTIES).
+    """
+    expired = time.monotonic() - _STATE_TIMES.get(instance, 0) > STATE_TTL
+    if refresh or expired or instance not in _STATES:
+        query_states([instance])
+    return _STATES[instance]
+
+
+def is_active(instance: str, state: dict = None) -> bool:
     """Test if an instance is running.
 
     systemd is queried to determine if the service of the server is running.
@@ -35,17 +150,18 @@ def is_active(instance: str) -> bool:
     Arguments:
         instance (str): The name of the instance.
 
+    Keyword Arguments:
+        state (dict): The Unit Properties if already queried, see query_states(). (default: {None})
+
     Returns:
         bool: true: Server running, false: Server inactive/dead
     """
-    service_instance = "@".join((UNIT_NAME, instance))
-    test_cmd = shlex.split(f"systemctl is-active {service_instance}")
-    test_out = sproc.run(test_cmd, stdout=sproc.PIPE,
-                         stderr=sproc.PIPE, check=False)
-    return test_out.returncode == 0
+    if state is None:
+        state = get_state(instance)
+    return state.get("ActiveState") in _ACTIVE_STATES
 
 
-def is_enabled(instance: str) -> bool:
+def is_enabled(instance: str, state: dict = None) -> bool:
     """Test if an instance is enabled.
 
     systemd is queried to determine if the service of the server is flagged to start on system boot.
@@ -53,41 +169,128 @@ def is_enabled(instance: str) -> bool:
     Arguments:
         instance (str): The name of the instance.
 
+    Keyword Arguments:
+        state (dict): The Unit Properties if already queried, see query_states(). (default: {None})
+
     Returns:
         bool: true: Server starts on system boot, false: Server stays inactive/dead
     """
-    service_instance = "@".join((UNIT_NAME, instance))
-    test_cmd = shlex.split(f"systemctl is-enabled {service_instance}")
-    test_out = sproc.run(test_cmd, stdout=sproc.PIPE,
-                         stderr=sproc.PIPE, check=False)
-    return test_out.returncode == 0
+    if state is None:
+        state = get_state(instance)
+    return state.get("UnitFileState") in _ENABLED_STATES
+
+
+def wait_stopped(instance: str, timeout: float = 120.0) -> None:
+    """Wait until the Unit of an Instance has stopped, polling with exponential Backoff.
+
+    Arguments:
+        instance (str): The name of the instance.
+
+    Keyword Arguments:
+        timeout (float): Maximum Time to wait in Seconds. (default: {120.0})
+
+    Raises:
+        TimeoutError: Raised if the Unit is still active after <timeout> Seconds.
+    """
+    deadline = time.monotonic() + timeout
+    delay = _POLL_MIN
+    while get_state(instance, refresh=True).get("ActiveState") not in ("inactive", "failed"):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"'{instance}' did not stop within {timeout:g}s.")
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, _POLL_MAX)
+
+
+def wait_ready(instance: str, log_handle: dict = None, timeout: float = 120.0) -> None:
+    """Wait until an Instance accepts Connections.
+
+    The Server is ready once it logs "Done (x.xxxs)!" or answers a Status Ping. New Log Lines wake the Wait up
+    immediately, Pings and Unit States are polled with exponential Backoff in between.
+
+    Arguments:
+        instance (str): The name of the instance.
+
+    Keyword Arguments:
+        log_handle (dict): A Handle of logs.tail() on latest.log opened before the Start. (default: {None})
+        timeout (float): Maximum Time to wait in Seconds. (default: {120.0})
+
+    Raises:
+        OSError: Raised if the Unit stops while waiting.
+        TimeoutError: Raised if the Server is not ready after <timeout> Seconds.
+    """
+    log_path = storage.get_instance_path(instance) / "logs" / "latest.log"
+    deadline = time.monotonic() + timeout
+    delay = _POLL_MIN
+    with ExitStack() as stack:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"'{instance}' was not ready within {timeout:g}s.")
+            if log_handle is None and log_path.exists():
+                # The Log did not exist before the Start, everything in it is new.
+                log_handle = stack.enter_context(logs.tail(log_path, from_start=True))
+            if log_handle is not None:
+                lines = logs.read_appended(log_handle, timeout=min(delay, remaining))
+                if any(_DONE_LINE.search(x) for x in lines):
+                    return
+            else:
+                time.sleep(min(delay, remaining))
+            if get_state(instance, refresh=True).get("ActiveState") not in ("active", "activating", "reloading"):
+                raise OSError(f"'{instance}' stopped while starting.")
+            if common.is_ready(instance):
+                return
+            delay = min(delay * 2, _POLL_MAX)
 
 
-def set_status(instance: str, action: str) -> None:
+def set_status(instance: str, action: str, wait: bool = False, timeout: float = 120.0) -> None:
     """Apply a systemd action to a minecraft server service.
 
     systemd is called to start, stop, restart, enable or disable a service
-    of the Unit mcserver@.service.
+    of the Unit mcserver@.service. systemctl returns once the Job of the Action has completed.
 
     Arguments:
         instance (str): The name of the instance.
         action (str): The systemd action to apply to the service.
             Can be "start", "restart", "stop", "enable", "disable".
+
+    Keyword Arguments:
+        wait (bool): Return only once a started Server accepts Connections or a stopped Unit is inactive. (default: {False})
+        timeout (float): Maximum Time to wait in Seconds. (default: {120.0})
     """
     allowed = ("start", "restart", "stop", "enable", "disable")
     assert action in allowed, f"Invalid action '{action}'"
 
-    service_instance = "@".join((UNIT_NAME, instance))
-    cmd = shlex.split(f"systemctl {action} {service_instance}")
-    with proc.managed_run_as(0, 0):
-        sproc.run(cmd, check=True)
-    if action in ("start", "restart", "stop"):
-        time.sleep(1)
-        if is_active(instance) == (action == "stop"):
-            raise OSError(f"Command Failed! ({action} of '{instance}' failed).")
+    cmd = ["systemctl", action, get_unit_name(instance)]
+    started = time.monotonic()
+    with ExitStack() as stack:
+        log_handle = None
+        log_path = storage.get_instance_path(instance) / "logs" / "latest.log"
+        if wait and action in ("start", "restart") and log_path.exists():
+            # Opened before the Action, so Lines of the new Server are not missed. Rotation is followed.
+            log_handle = stack.enter_context(logs.tail(log_path))
+
+        with proc.managed_run_as(0, 0):
+            try:
+                sproc.run(cmd, check=True)
+            finally:
+                _STATES.pop(instance, None)
 
+        if action == "stop":
+            if wait:
+                wait_stopped(instance, timeout)
+            elif is_active(instance):
+                raise OSError(f"Command Failed! ({action} of '{instance}' failed).")
+        elif action in ("start", "restart"):
+            if get_state(instance, refresh=True).get("ActiveState") not in ("active", "activating", "reloading"):
+                raise OSError(f"Command Failed! ({action} of '{instance}' failed).")
+            if wait:
+                wait_ready(instance, log_handle, timeout)
+                print(f"'{instance}' is ready after {time.monotonic() - started:.1f}s.")
 
-def notified_set_status(instance: str, action: str, message: str = '', persistent: bool = False) -> None:
+
+def notified_set_status(instance: str, action: str, message: str = '', persistent: bool = False,
+                        wait: bool = False, timeout: float = 120.0) -> None:
     """Notifies the Players on the Server if applicable and sets the Service Status.
 
     Arguments:
@@ -98,6 +301,8 @@ def notified_set_status(instance: str, action: str, message: str = '', persisten
         message (str): A message relayed to Server Chat, e.g. reason the Server is shutting down.
         persistent (bool): If True, the Server will not start after a Machine reboot (default: {False})
         restart (bool): If True, persistent wil be ignored and the server wil be restarted (default: {False})
+        wait (bool): Return only once the Server accepts Connections or has stopped. (default: {False})
+        timeout (float): Maximum Time to wait in Seconds. (default: {120.0})
     """
     allowed = ("start", "restart", "stop")
     assert action in allowed, f"Invalid action '{action}'"
@@ -114,4 +319,224 @@ def notified_set_status(instance: str, action: str, message: str = '', persisten
             proc.mc_exec(instance, shlex.split(msg))
         except ConnectionError:
             pass
-    set_status(instance, action)
+    set_status(instance, action, wait, timeout)
+
+
+def match_instances(patterns: list, all_instances: bool = False) -> list:
+    """Resolve Instance Names and Globs to existing Instances.
+
+    Arguments:
+        patterns (list): Instance Names or Globs, e.g. "lobby-*".
+
+    Keyword Arguments:
+        all_instances (bool): Match all Instances, <patterns> are ignored. (default: {False})
+
+    Raises:
+        FileNotFoundError: Raised if a Pattern matches no Instance.
+
+    Returns:
+        list: The matching Instance Names without Duplicates, sorted by Name.
+    """
+    base_path = storage.get_instance_path(bare=True)
+    names = sorted(x.name for x in base_path.iterdir() if x.is_dir())
+    if all_instances:
+        return names
+    matches = set()
+    for pattern in patterns:
+        found = fnmatch.filter(names, pattern)
+        if not found:
+            raise FileNotFoundError(f"No Instance matches '{pattern}'.")
+        matches.update(found)
+    return sorted(matches)
+
+
+def get_priority(instance: str) -> int:
+    """Return the Start Priority of an Instance, set as PRIORITY in its Environment File.
+
+    Arguments:
+        instance (str): The name of the instance.
+
+    Returns:
+        int: The Priority, higher Priorities start earlier and stop later. 0 if unset or invalid.
+    """
+    env_path = storage.get_instance_path(instance) / CFGVARS.get('system', 'env_file')
+    try:
+        return int(config.get_properties(env_path).get("PRIORITY", 0))
+    except (OSError, ValueError):
+        return 0
+
+
+def get_players(instance: str) -> int:
+    """Return the Amount of Players online on an Instance.
+
+    Arguments:
+        instance (str): The name of the instance.
+
+    Returns:
+        int: The Players online, 0 if the Server does not answer Pings as nobody can be connected.
+    """
+    try:
+        status = common.get_status(instance)
+    except (OSError, ValueError, TypeError):
+        status = None
+    return 0 if status is None else status.players.online
+
+
+def _countdown_restart(instance: str, message: str = '', timeout: float = 120.0) -> None:
+    """Warn the Players of an Instance with a Countdown in Chat and restart it.
+
+    The Countdown is cut short as soon as the last Player has left.
+
+    Arguments:
+        instance (str): The name of the instance.
+
+    Keyword Arguments:
+        message (str): A message relayed to Server Chat, e.g. the reason for the Restart. (default: {''})
+        timeout (float): Maximum Time to wait for the Server to be ready again in Seconds. (default: {120.0})
+    """
+    warnings = sorted(RESTART_WARNINGS, reverse=True)
+    if get_players(instance):
+        restart_at = time.monotonic() + warnings[0]
+        for seconds in warnings:
+            time.sleep(max(restart_at - seconds - time.monotonic(), 0))
+            if not get_players(instance):
+                break
+            msg = f"say §6Server restarting in {seconds} seconds"
+            msg += f": {message}" if message else "."
+            try:
+                proc.mc_exec(instance, shlex.split(msg))
+            except ConnectionError:
+                pass
+        else:
+            time.sleep(max(restart_at - time.monotonic(), 0))
+    notified_set_status(instance, "restart", message, wait=True, timeout=timeout)
+
+
+def rolling_restart(instances: list, max_down: int = 1, drain: float = 300.0, message: str = '',
+                    timeout: float = 120.0) -> None:
+    """Restart many Instances with at most <max_down> of them down at the same Time.
+
+    Empty Servers are restarted first. Populated Servers are given until <drain> Seconds after the Start to empty,
+    then the Servers with the fewest Players are restarted after a Countdown in Chat (see RESTART_WARNINGS).
+    A Slot is freed once the restarted Server accepts Connections again.
+
+    Arguments:
+        instances (list): The names of the instances.
+
+    Keyword Arguments:
+        max_down (int): Maximum Amount of Instances restarting at the same Time. (default: {1})
+        drain (float): Seconds to wait for populated Servers to empty. (default: {300.0})
+        message (str): A message relayed to Server Chat, e.g. the reason for the Restart. (default: {''})
+        timeout (float): Maximum Time to wait for each Server to be ready again in Seconds. (default: {120.0})
+
+    Raises:
+        OSError: Raised if the Restart failed for any Instance.
+    """
+    deadline = time.monotonic() + drain
+    pending = list(instances)
+    running = {}
+    failed = []
+    max_down = max(max_down, 1)
+    with ThreadPoolExecutor(max_down) as executor, ThreadPoolExecutor(16) as pinger:
+        while pending or running:
+            for name, future in list(running.items()):
+                if future.done():
+                    del running[name]
+                    try:
+                        future.result()
+                    except Exception as ex:  # pylint: disable=broad-except
+                        print(f"Unable to restart '{name}': {ex}")
+                        failed.append(name)
+
+            if pending and len(running) < max_down:
+                players = dict(zip(pending, pinger.map(get_players, pending)))
+                drained = time.monotonic() >= deadline
+                for name in sorted(pending, key=players.get)[:max_down - len(running)]:
+                    if players[name] and not drained:
+                        break
+                    pending.remove(name)
+                    running[name] = executor.submit(_countdown_restart, name, message, timeout)
+
+            if running:
+                wait_futures(running.values(), timeout=DRAIN_POLL, return_when=FIRST_COMPLETED)
+            elif pending:
+                time.sleep(max(min(DRAIN_POLL, deadline - time.monotonic()), 0))
+    if failed:
+        raise OSError(f"{len(failed)} of {len(instances)} Instances failed ({', '.join(failed)}).")
+
+
+def set_status_many(instances: list, action: str, all_instances: bool = False, jobs: int = 4, message: str = '',
+                    persistent: bool = False, wait: bool = False, timeout: float = 120.0) -> None:
+    """Start, stop or restart many Instances with at most <jobs> Actions running at the same Time.
+
+    Instances are started in Order of descending Priority (see get_priority()) and stopped in reverse Order.
+    A started Server only frees its Slot once it accepts Connections, so the next Server is admitted
+    when a previous one is ready instead of all Worlds loading at once.
+
+    Arguments:
+        instances (list): Instance Names or Globs.
+        action (str): The systemd action to apply to the services. Can be "start", "restart", "stop".
+
+    Keyword Arguments:
+        all_instances (bool): Apply the Action to all Instances. (default: {False})
+        jobs (int): Maximum Amount of concurrent Actions. (default: {4})
+        message (str): A message relayed to Server Chat, e.g. reason the Server is shutting down. (default: {''})
+        persistent (bool): Also enable/disable the Services, see notified_set_status(). (default: {False})
+        wait (bool): Wait for a single Instance to be ready/stopped, always done for many. (default: {False})
+        timeout (float): Maximum Time to wait for each Instance in Seconds. (default: {120.0})
+
+    Raises:
+        OSError: Raised if the Action failed for any Instance.
+    """
+    names = match_instances(instances, all_instances)
+    if not names:
+        raise ValueError("No Instances given, pass Instance Names or '--all'.")
+    if len(names) == 1:
+        notified_set_status(names[0], action, message, persistent, wait, timeout)
+        return
+
+    priorities = {x: get_priority(x) for x in names}
+    names.sort(key=priorities.get, reverse=action != "stop")
+    with ThreadPoolExecutor(max(jobs, 1)) as executor:
+        # Submitted in Order, the Executor admits queued Actions as Slots become free.
+        futures = {x: executor.submit(notified_set_status, x, action, message, persistent, True, timeout)
+                   for x in names}
+        failed = []
+        for name, future in futures.items():
+            try:
+                future.result()
+            except Exception as ex:  # pylint: disable=broad-except
+                print(f"Unable to {action} '{name}': {ex}")
+                failed.append(name)
+    if failed:
+        raise OSError(f"{len(failed)} of {len(names)} Instances failed ({', '.join(failed)}).")
+
+
+def restart_many(instances: list, action: str = "restart", all_instances: bool = False, jobs: int = 4,
+                 message: str = '', persistent: bool = False, wait: bool = False, timeout: float = 120.0,
+                 rolling: bool = False, drain: float = 300.0) -> None:
+    """Restart many Instances, optionally in a Rolling Restart.
+
+    Arguments:
+        instances (list): Instance Names or Globs.
+
+    Keyword Arguments:
+        action (str): The systemd action, only "restart" is allowed. (default: {"restart"})
+        all_instances (bool): Restart all Instances. (default: {False})
+        jobs (int): Maximum Amount of concurrent Restarts. (default: {4})
+        message (str): A message relayed to Server Chat, e.g. reason for the Restart. (default: {''})
+        persistent (bool): Ignored for Restarts, see notified_set_status(). (default: {False})
+        wait (bool): Wait for a single Instance to be ready, always done for many. (default: {False})
+        timeout (float): Maximum Time to wait for each Instance in Seconds. (default: {120.0})
+        rolling (bool): Restart only active Instances, preferring empty Servers, see rolling_restart(). (default: {False})
+        drain (float): Seconds to wait for populated Servers to empty in a Rolling Restart. (default: {300.0})
+    """
+    assert action == "restart", f"Invalid action '{action}'"
+    if not rolling:
+        set_status_many(instances, action, all_instances, jobs, message, persistent, wait, timeout)
+        return
+    names = match_instances(instances, all_instances)
+    if not names:
+        raise ValueError("No Instances given, pass Instance Names or '--all'.")
+    states = query_states(names)
+    rolling_restart([x for x in names if is_active(x, states[x])], jobs, drain, message, timeout)
@@ -21,20 +21,31 @@
 
 import os
 import sys
-import gzip
+import time
+import fcntl
 import shutil
 import random
 import string
+import zlib
 import hashlib
+import tempfile
 import zipfile as zf
-from typing import List
+from collections import deque
+from contextlib import contextmanager, ExitStack
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
+from typing import Iterator
 from datetime import datetime
-from grp import getgrgid
+from grp import getgrnam
 from pwd import getpwnam
-from mcctl import service, config, CFGVARS
+from mcctl import service, config, logs, proc, jars, CFGVARS
 
 SERVER_USER = CFGVARS.get('system', 'server_user')
+# Compressed Data of a single File is kept in Memory up to this Size, and spooled to a Temporary File beyond.
+_SPOOL_SIZE = 64 * 1024 * 1024
+_READ_SIZE = 1024 * 1024
+# ioctl to share the Data Blocks of a File (reflink), see ioctl_ficlone(2)
+_FICLONE = 0x40049409
 
 
 def get_home_path(user_name: str = SERVER_USER) -> Path:
@@ -79,37 +90,64 @@ def get_jar_path(type_id: str = '', bare: bool = False) -> Path:
     return bare_path if bare else bare_path / f"{type_id.replace(':', '/')}.jar"
 
 
-def get_child_paths(path: Path) -> list:
-    """Get all subdirectories and files of a Path.
+def walk(path: Path, filter_str: str = '', filter_idx: int = 0, sort: bool = False) -> Iterator[tuple]:
+    """Walk all subdirectories and files of a Path lazily.
+
+    Entries are yielded as they are found, together with their os.DirEntry, which caches the Result of stat().
+    The Filter is applied while walking, see get_relative_paths(). With a positive filter_idx, Subtrees that do
+    not match are not walked at all.
 
     Arguments:
         path (Path): Path to walk.
 
-    Returns:
-        list: A list of all paths found.
+    Keyword Arguments:
+        filter_str (str): A string that is checked against a specified directory. (default: {''})
+        filter_idx (int): The index of the directory to test against. (default: {0})
+        sort (bool): Walk each Directory in sorted Order, which yields the same Order as sorting all Paths.
+                     (default: {False})
+
+    Yields:
+        tuple: The Path relative to path and the os.DirEntry.
     """
-    return sorted(path.rglob("*"))
+    def walk_dir(dir_path: str, rel_parts: tuple) -> Iterator[tuple]:
+        with os.scandir(dir_path) as entries:
+            entries = sorted(entries, key=lambda x: x.name) if sort else list(entries)
+        depth = len(rel_parts)
+        for entry in entries:
+            parts = rel_parts + (entry.name,)
+            if filter_idx >= 0:
+                if depth == filter_idx and filter_str not in entry.name:
+                    continue
+                matches = depth >= filter_idx
+            else:
+                matches = len(parts) >= -filter_idx and filter_str in parts[filter_idx]
+            if matches:
+                yield Path(*parts), entry
+            if entry.is_dir(follow_symlinks=False):
+                yield from walk_dir(entry.path, parts)
+
+    yield from walk_dir(str(path), ())
 
 
-def get_jar_list(filter_str: str = '') -> None:
-    """Get a List of all cached .jar-files.
+def get_child_paths(path: Path) -> list:
+    """Get all subdirectories and files of a Path.
 
-    Lists all cached .jar-Files in the Type-Tag format.
+    Arguments:
+        path (Path): Path to walk.
 
-    Keyword Arguments:
-        filter_str (str): Filter for version, type or version. (default: {''})
+    Returns:
+        list: A list of all paths found.
     """
-    jars = get_relative_paths(get_home_path() / "jars", ".jar", -1)
-    for jar in jars:
-        if filter_str in str(jar):
-            print(str(jar).replace("/", ":").replace(".jar", ''))
+    return [path / x for x, _ in walk(path, sort=True)]
 
 
-def chown(path: Path, user: str, group: str = None) -> None:
+def chown(path: Path, user: str, group: str = None, jobs: int = 8) -> int:
     """Change owner of file or of a path recursively.
 
     Changes the owner of a file or of a path and its subdirectories.
     The gid of the default group of the user is used if [group] is omitted.
+    Subdirectories are walked in parallel, entries already owned by user and group are skipped.
+    Symlinks are changed themselves and not followed.
 
     Arguments:
         path (Path): The path of which owners should be recursively changed.
@@ -117,16 +155,43 @@ def chown(path: Path, user: str, group: str = None) -> None:
 
     Keyword Arguments:
         group (str): Group that should own the path. (default: {None})
+        jobs (int): The Amount of Directories walked in parallel. (default: {8})
+
+    Returns:
+        int: The Amount of changed Entries.
     """
-    if not group:
-        gid = getpwnam(user).pw_gid
-        group = getgrgid(gid).gr_name
-    if path.is_dir():
-        file_list = get_child_paths(path)
-    else:
-        file_list = [path]
-    for fle in file_list:
-        shutil.chown(fle, user, group)
+    user_data = getpwnam(user)
+    uid = user_data.pw_uid
+    gid = getgrnam(group).gr_gid if group else user_data.pw_gid
+
+    def chown_entry(entry_path: str, stat: os.stat_result) -> int:
+        if stat.st_uid == uid and stat.st_gid == gid:
+            return 0
+        os.chown(entry_path, uid, gid, follow_symlinks=False)
+        return 1
+
+    def chown_dir(dir_path: str) -> tuple:
+        changed = 0
+        subdirs = []
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                changed += chown_entry(entry.path, entry.stat(follow_symlinks=False))
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+        return changed, subdirs
+
+    changed = chown_entry(str(path), os.lstat(path))
+    if not path.is_dir() or path.is_symlink():
+        return changed
+    with ThreadPoolExecutor(jobs) as executor:
+        pending = {executor.submit(chown_dir, str(path))}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                dir_changed, subdirs = future.result()
+                changed += dir_changed
+                pending.update(executor.submit(chown_dir, x) for x in subdirs)
+    return changed
 
 
 def get_relative_paths(path: Path, filter_str: str = '', filter_idx: int = 0) -> list:
@@ -148,13 +213,7 @@ def get_relative_paths(path: Path, filter_str: str = '', filter_idx: int = 0) ->
     Returns:
         list: A list of all relative Paths found.
     """
-    path_list = []
-    length = len(path.parts)
-    for file_path in get_child_paths(path):
-        rel_path = Path(*file_path.parts[length:])
-        if filter_str in rel_path.parts[filter_idx]:
-            path_list.append(rel_path)
-    return path_list
+    return [x for x, _ in walk(path, filter_str, filter_idx, sort=True)]
 
 
 def create_dirs(path: Path) -> None:
@@ -196,11 +255,210 @@ def move(source: Path, dest: Path) -> Path:
     return shutil.move(source, dest)
 
 
-def export(instance: str, zip_path: Path = None, compress: bool = False, world_only: bool = False) -> Path:
+def clone_file(source: Path, dest: Path) -> None:
+    """Copy a File including its Metadata, sharing its Data Blocks (reflink) where the File System supports it.
+
+    Arguments:
+        source (Path): Source file.
+        dest (Path): Destination file.
+    """
+    with open(source, "rb") as src, open(dest, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            cloned = True
+        except OSError:
+            cloned = False
+    if not cloned:
+        shutil.copyfile(source, dest)
+    shutil.copystat(source, dest)
+
+
+def clone_tree(source: Path, dest: Path, rel_paths: list, jobs: int = 8) -> None:
+    """Clone Files and Directories of a Path to another Path, see clone_file().
+
+    Arguments:
+        source (Path): The Path the relative Paths are in.
+        dest (Path): The Path to clone to.
+        rel_paths (list): The relative Paths of the Files and Directories to clone.
+
+    Keyword Arguments:
+        jobs (int): The Amount of Files copied in parallel. (default: {8})
+    """
+    files = []
+    for rel_path in rel_paths:
+        if (source / rel_path).is_dir():
+            create_dirs(dest / rel_path)
+        else:
+            create_dirs((dest / rel_path).parent)
+            files.append(rel_path)
+    with ThreadPoolExecutor(jobs) as executor:
+        for _ in executor.map(lambda x: clone_file(source / x, dest / x), files):
+            pass
+
+
+@contextmanager
+def hot_copy(instance: str, rel_paths: list) -> Path:
+    """Stage a consistent Copy of a running Instance, pausing Saving only while staging.
+
+    Automatic Saving is turned off and the World is flushed to disk via the Console. The Files are cloned
+    to a Staging Folder and Saving is turned on again right away, unless it had already been turned off before.
+    The Staging Folder is removed on exit.
+
+    Arguments:
+        instance (str): The name of the Instance.
+        rel_paths (list): The relative Paths in the Instance to stage.
+
+    Yields:
+        Path: The Staging Folder, or the Instance Path itself if the Server is not running.
+    """
+    server_path = get_instance_path(instance)
+    if not service.is_active(instance):
+        yield server_path
+        return
+
+    staging_path = get_home_path() / "staging" / f"{instance}.{os.getpid()}"
+    try:
+        started = time.monotonic()
+        response = list(proc.console(instance, "save-off", expect=r"(?i)saving is (now disabled|already turned off)"))
+        # Saving was turned off by someone else, so leave it to them to turn it on again.
+        was_off = any("already turned off" in line.lower() for line in response)
+        try:
+            list(proc.console(instance, "save-all flush", expect=r"Saved the (game|world)", timeout=300))
+            clone_tree(server_path, staging_path, rel_paths)
+        finally:
+            if not was_off:
+                list(proc.console(instance, "save-on", expect=r"(?i)saving is (now enabled|already turned on)"))
+        print(f"Saving was paused for {time.monotonic() - started:.1f}s.")
+        yield staging_path
+    finally:
+        shutil.rmtree(staging_path, ignore_errors=True)
+
+
+def _compress_file(file_path: Path, level: int) -> tuple:
+    """Compress a File to a raw Deflate Stream, as stored in Zip-Files.
+
+    Arguments:
+        file_path (Path): The File to compress.
+        level (int): The zlib Compression Level.
+
+    Returns:
+        tuple: The compressed Data as File Object, the CRC32 and the Size of the uncompressed Data.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    compressed = tempfile.SpooledTemporaryFile(_SPOOL_SIZE)
+    crc = 0
+    size = 0
+    with open(file_path, "rb") as src:
+        for block in iter(lambda: src.read(_READ_SIZE), b""):
+            crc = zlib.crc32(block, crc)
+            size += len(block)
+            compressed.write(compressor.compress(block))
+    compressed.write(compressor.flush())
+    compressed.seek(0)
+    return compressed, crc, size
+
+
+def can_write_compressed(zip_file: zf.ZipFile) -> bool:
+    """Test if the zipfile Internals used by _write_compressed() are available.
+
+    Arguments:
+        zip_file (ZipFile): The Zip-File opened for writing.
+
+    Returns:
+        bool: True if precompressed Members can be written, False if Files must be compressed by zipfile itself.
+    """
+    return (all(hasattr(zip_file, x) for x in ("fp", "start_dir", "_writecheck", "_didModify", "NameToInfo"))
+            and hasattr(zf.ZipInfo, "FileHeader"))
+
+
+def _write_compressed(zip_file: zf.ZipFile, zinfo: zf.ZipInfo, compressed, crc: int, size: int) -> None:
+    """Write an already compressed Member to a Zip-File.
+
+    zipfile has no public API to add precompressed Data, so the Header is written like in ZipFile.open(mode="w").
+    Check can_write_compressed() before, the Internals used may change between Python Versions.
+
+    Arguments:
+        zip_file (ZipFile): The Zip-File opened for writing.
+        zinfo (ZipInfo): The Info of the new Member.
+        compressed (file): The compressed Data, see _compress_file().
+        crc (int): The CRC32 of the uncompressed Data.
+        size (int): The Size of the uncompressed Data.
+    """
+    compressed.seek(0, os.SEEK_END)
+    zinfo.compress_type = zf.ZIP_DEFLATED
+    zinfo.compress_size = compressed.tell()
+    zinfo.file_size = size
+    zinfo.CRC = crc
+    zinfo.flag_bits = 0
+    compressed.seek(0)
+
+    zip64 = zinfo.file_size > zf.ZIP64_LIMIT or zinfo.compress_size > zf.ZIP64_LIMIT
+    zip_file.fp.seek(zip_file.start_dir)
+    zinfo.header_offset = zip_file.fp.tell()
+    zip_file._writecheck(zinfo)  # pylint: disable=protected-access
+    zip_file._didModify = True  # pylint: disable=protected-access
+    zip_file.fp.write(zinfo.FileHeader(zip64))
+    shutil.copyfileobj(compressed, zip_file.fp, _READ_SIZE)
+    zip_file.start_dir = zip_file.fp.tell()
+    zip_file.filelist.append(zinfo)
+    zip_file.NameToInfo[zinfo.filename] = zinfo
+
+
+def _write_archive(source_path: Path, file_list: list, zip_path: Path, compress: bool, jobs: int, level: int) -> None:
+    """Write Files to a Zip-File, compressing them in parallel.
+
+    Arguments:
+        source_path (Path): The Path the Files are in.
+        file_list (list): The relative Paths of the Files with their Size, or None for Directories, in Archive Order.
+        zip_path (Path): The path of the Zip-File that is generated.
+        compress (bool): True: Compress the Zip-File using ZIP_DEFLATE. False: Use ZIP_STORE
+        jobs (int): The Amount of Files compressed in parallel.
+        level (int): The Compression Level from 0 (none) to 9 (best).
+    """
+    total_size = sum(x[1] or 0 for x in file_list)
+    compress_mode = zf.ZIP_DEFLATED if compress else zf.ZIP_STORED
+    with zf.ZipFile(zip_path, "w", compression=compress_mode, allowZip64=True) as zip_file, \
+            ThreadPoolExecutor(jobs) as executor:
+        # Without the Internals, zipfile compresses each File itself while writing.
+        compress = compress and can_write_compressed(zip_file)
+        written = 0
+        # Files being compressed, in Archive Order. zlib releases the GIL, so Threads use all Cores.
+        pending = deque()
+        files = iter(file_list)
+        while True:
+            # Limit the compressed Files held back until their Turn.
+            for file_path, size in files:
+                future = None
+                if compress and size is not None:
+                    future = executor.submit(_compress_file, source_path / file_path, level)
+                pending.append((file_path, size, future))
+                if len(pending) >= jobs * 2:
+                    break
+            if not pending:
+                break
+
+            file_path, size, future = pending.popleft()
+            full_path = source_path / file_path
+            written += size or 0
+            sys.stdout.write(
+                f"\r[{(written * 100 / max(total_size, 1)):3.0f}%] Writing: {file_path}...\033[K")
+            if future is None:
+                zip_file.write(full_path, file_path)
+            else:
+                compressed, crc, size = future.result()
+                with compressed:
+                    zinfo = zf.ZipInfo.from_file(full_path, file_path)
+                    _write_compressed(zip_file, zinfo, compressed, crc, size)
+    print()
+
+
+def export(instance: str, zip_path: Path = None, compress: bool = False, world_only: bool = False,
+           jobs: int = None, level: int = 6, hot: bool = False) -> Path:
     """Export a minecraft server instance to a Zip-File.
 
     Export a minecraft server instance to a Zip-File for archiving or similar.
     Optionally, the File can also be compressed and all config Files can be excluded.
+    Files are compressed in parallel and written to the Archive in order.
 
     Arguments:
         instance (str): The name of the Instance to be exported.
@@ -209,6 +467,9 @@ def export(instance: str, zip_path: Path = None, compress: bool = False, world_o
         zip_path (Path): The path of the Zip-File that is generated. (default: {None})
         compress (bool): True: Compress the Zip-File using ZIP_DEFLATE. False: Use ZIP_STORE (default: {False})
         world_only (bool): Only export the World data without configuration files. (default: {False})
+        jobs (int): The Amount of Files compressed in parallel. Defaults to the CPU Count. (default: {None})
+        level (int): The Compression Level from 0 (none) to 9 (best). (default: {6})
+        hot (bool): Export a consistent Copy of a running Server, see hot_copy(). (default: {False})
 
     Returns:
         Path: The Path where the Zip-File was saved to.
@@ -224,22 +485,15 @@ def export(instance: str, zip_path: Path = None, compress: bool = False, world_o
         server_cfg = config.get_properties(server_path / "server.properties")
         world = server_cfg.get("level-name")
 
-    file_list = get_relative_paths(server_path, world)
-    total_size = sum((server_path / x).stat().st_size for x in file_list)
-    compress_mode = zf.ZIP_DEFLATED if compress else zf.ZIP_STORED
-    with zf.ZipFile(zip_path, "w", compression=compress_mode, allowZip64=True) as zip_file:
-        written = 0
-        for file_path in file_list:
-            full_path = server_path / file_path
-            written += full_path.stat().st_size
-            sys.stdout.write(
-                f"\r[{(written * 100 / total_size):3.0f}%] Writing: {file_path}...\033[K")
-            zip_file.write(full_path, file_path)
-    print()
+    file_list = [(x, None if y.is_dir(follow_symlinks=False) else y.stat(follow_symlinks=False).st_size)
+                 for x, y in walk(server_path, world, sort=True)]
+    with ExitStack() as stack:
+        source_path = stack.enter_context(hot_copy(instance, [x for x, _ in file_list])) if hot else server_path
+        _write_archive(source_path, file_list, zip_path, compress, jobs or os.cpu_count() or 1, level)
 
     try:
         login_name = os.getlogin()
-    except FileNotFoundError:
+    except OSError:
         login_name = None
         print("WARN: Unable to retrieve Login Name.")
     if login_name:
@@ -272,6 +526,7 @@ def remove(instance: str, confirm: bool = True) -> None:
         ans = "y"
     if ans.lower() == "y":
         shutil.rmtree(del_path)
+        jars.release(instance=instance)
 
 
 def remove_jar(source: str) -> None:
@@ -297,10 +552,12 @@ def remove_jar(source: str) -> None:
         if not del_all:
             del_path.unlink()
         else:
-            shutil.rmtree(del_path)
+            for jar in get_relative_paths(del_path, ".jar", -1):
+                (del_path / jar).unlink()
+        jars.release(tag=source)
 
 
-def inspect(instance: str, limit: int = 0) -> None:
+def inspect(instance: str, limit: int = 0, since: datetime = None, until: datetime = None, grep: str = None) -> None:
     """Get the last lines of the Log.
 
     Arguments:
@@ -308,22 +565,17 @@ def inspect(instance: str, limit: int = 0) -> None:
 
     Keyword Arguments:
         limit (int): The amount of lines to output. 0 returns all lines. (default: {0})
+        since (datetime): Only output lines logged at or after this time. (default: {None})
+        until (datetime): Only output lines logged at or before this time. (default: {None})
+        grep (str): Only output lines containing this string. (default: {None})
     """
     if limit < 0:
         raise OverflowError("Line Limit is lower than minimum of 0.")
     log_path = get_instance_path(instance) / "logs"
-    logs = get_child_paths(log_path)
-
-    lines: List[str] = []
-    for log in reversed(logs):
-        opener = gzip.open if log.name.endswith(".gz") else open
-        with opener(log, "rt") as log_file:
-            lines = log_file.readlines() + lines
-        if len(lines) >= limit and limit != 0:
-            break
-
-    lines_out = lines[-limit:]
-    print(''.join(lines_out), end='')
+    if since or until or grep:
+        logs.write_filtered(log_path, since, until, grep, limit)
+    else:
+        logs.write_tail(log_path, limit)
 
 
 def tmpcopy(file_path: Path) -> Path:
@@ -19,11 +19,22 @@
 # along with mcctl. If not, see <http://www.gnu.org/licenses/>.
 
 from pathlib import Path
+from typing import Callable
+from concurrent.futures import ThreadPoolExecutor
+import os
 import time
 import re
+import json
 import hashlib
-import requests as req
-from mcctl import visuals, storage
+import threading
+from mcctl import visuals, storage, jars, CFGVARS
+
+DOWNLOAD_TIMEOUT = (5, 30)
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+PART_MIN_SIZE = 8 * 1024 * 1024
+
+_SESSION = None
+_CATALOG = None
 
 
 def get_vanilla_download_url(version_tag: str, manifest_url: str) -> tuple:
@@ -39,7 +50,7 @@ def get_vanilla_download_url(version_tag: str, manifest_url: str) -> tuple:
         LookupError: If the Download URL of the specified Version was not found.
 
     Returns:
-        tuple: A tuple with the download URL and the complete, resolved Tag
+        tuple: A tuple with the download URL, the complete, resolved Tag and the published SHA-1 Checksum
     """
     version_manifest = rest_get(manifest_url)
     if version_tag == "latest":
@@ -56,8 +67,9 @@ def get_vanilla_download_url(version_tag: str, manifest_url: str) -> tuple:
     if download_url is None:
         raise LookupError("Server Version not found")
     version_data = rest_get(download_url)
-    url = version_data.get("downloads", {}).get("server", {}).get("url")
-    return url, resolved_tag
+    server_data = version_data.get("downloads", {}).get("server", {})
+    checksum = ("sha1", server_data["sha1"]) if "sha1" in server_data else None
+    return server_data.get("url"), resolved_tag, checksum
 
 
 def get_paper_download_url(version_tag: str, base_url: str) -> tuple:
@@ -70,7 +82,7 @@ def get_paper_download_url(version_tag: str, base_url: str) -> tuple:
         base_url (str): The API URL for Paper.
 
     Returns:
-        tuple: A tuple with the download URL and the complete, resolved Tag
+        tuple: A tuple with the download URL, the complete, resolved Tag and None, as no Checksum is published
     """
     if version_tag == "latest":
         versions = rest_get(base_url)
@@ -84,7 +96,7 @@ def get_paper_download_url(version_tag: str, base_url: str) -> tuple:
         resolved_tag = ":".join(resolved_data.values())
     except Exception as ex:
         raise LookupError("Server Version not found") from ex
-    return join_url(test_url, "download"), resolved_tag
+    return join_url(test_url, "download"), resolved_tag, None
 
 
 def get_spigot_download_url(version_tag: str, base_url: str) -> tuple:
@@ -97,7 +109,7 @@ def get_spigot_download_url(version_tag: str, base_url: str) -> tuple:
         base_url (str):  The API URL for spigot.
 
     Returns:
-        tuple: A tuple with the download URL and the complete, resolved Tag
+        tuple: A tuple with the download URL, the complete, resolved Tag and None, as no Checksum is published
     """
     expr = re.compile(r"<.*>Version</.*>\n?<.*>(.*)</.*>")
     versions = scrape_get(base_url, expr)
@@ -110,7 +122,7 @@ def get_spigot_download_url(version_tag: str, base_url: str) -> tuple:
 
     resolved_tag = f"spigot:{resolved_version}"
     url = SOURCES.get('spigot', {}).get('download_url')
-    return f"{url}{resolved_version}.jar", resolved_tag
+    return f"{url}{resolved_version}.jar", resolved_tag, None
 
 
 SOURCES = {
@@ -130,8 +142,8 @@ SOURCES = {
 }
 
 
-def get_download_url(server_tag: str) -> tuple:
-    """Get the download URL of any minecraft server.
+def resolve_download_url(server_tag: str) -> tuple:
+    """Get the download URL of any minecraft server from the upstream APIs.
 
     Arguments:
         server_tag (str): The Tag of the server (e.g. vanilla:latest).
@@ -140,23 +152,233 @@ def get_download_url(server_tag: str) -> tuple:
         Exception: If an unsupported Server type is used, an Exception is raised.
 
     Returns:
-        tuple: A tuple with the download URL and the complete, resolved Tag
+        tuple: A tuple with the download URL, the complete, resolved Tag and the Checksum as (algorithm, hex digest)
+               or None
     """
     assert ":" in server_tag, f"Invalid Server Tag '{server_tag}'"
     type_tag, version_tag = server_tag.split(":", 1)
     try:
         func = SOURCES.get(type_tag, {}).get('func')
-        url, resolved_tag = func(version_tag, SOURCES.get(type_tag).get('url'))
+        url, resolved_tag, checksum = func(version_tag, SOURCES.get(type_tag).get('url'))
     except AttributeError:
         raise ValueError("Unsupported server type") from None
 
-    return url, resolved_tag
+    return url, resolved_tag, checksum
+
+
+def get_catalog_path() -> Path:
+    """Return the Path of the Version Catalog.
+
+    Returns:
+        Path: The Path of the Version Catalog.
+    """
+    return storage.get_jar_path(bare=True) / "catalog.json"
+
+
+def load_catalog() -> dict:
+    """Load the Version Catalog, which maps Type IDs to their resolved Tag, download URL and Checksum.
+
+    Returns:
+        dict: The Version Catalog.
+    """
+    global _CATALOG
+    if _CATALOG is None:
+        try:
+            with open(get_catalog_path()) as catalog_file:
+                _CATALOG = json.load(catalog_file)
+        except (OSError, ValueError):
+            _CATALOG = {"synced": 0, "entries": {}}
+    return _CATALOG
+
+
+def save_catalog() -> None:
+    """Write the Version Catalog atomically."""
+    catalog_path = get_catalog_path()
+    storage.create_dirs(catalog_path.parent)
+    tmp_path = catalog_path.with_name(f"{catalog_path.name}.{os.getpid()}")
+    with open(tmp_path, "w") as catalog_file:
+        json.dump(load_catalog(), catalog_file, indent=1)
+    os.replace(tmp_path, catalog_path)
+
+
+def _add_to_catalog(server_tag: str, url: str, tag: str, checksum: tuple) -> None:
+    """Add a resolved Type ID to the Version Catalog, both under the requested and the resolved Tag."""
+    entry = {"url": url, "tag": tag, "checksum": checksum, "resolved": time.time()}
+    entries = load_catalog()["entries"]
+    entries[server_tag] = entry
+    entries[tag] = entry
+
+
+def get_download_url(server_tag: str, offline: bool = False) -> tuple:
+    """Get the download URL of any minecraft server.
+
+    Type IDs are resolved with the upstream APIs and recorded in the Version Catalog. If offline, or if the APIs
+    are not reachable, the Type ID is looked up in the Version Catalog instead.
+
+    Arguments:
+        server_tag (str): The Tag of the server (e.g. vanilla:latest).
+
+    Keyword Arguments:
+        offline (bool): Only use the Version Catalog. (default: {False})
+
+    Raises:
+        LookupError: If the Type ID is needed from the Version Catalog, but is not found there.
+
+    Returns:
+        tuple: A tuple with the download URL, the complete, resolved Tag and the Checksum as (algorithm, hex digest)
+               or None
+    """
+    import requests as req  # pylint: disable=import-outside-toplevel
+    if not offline:
+        try:
+            url, tag, checksum = resolve_download_url(server_tag)
+        except (req.RequestException, LookupError) as ex:
+            # The Paper API reports a failed Request as a LookupError caused by it.
+            unreachable = isinstance(ex, req.RequestException) or isinstance(ex.__cause__, req.RequestException)
+            if not unreachable or server_tag not in load_catalog()["entries"]:
+                raise
+            print(f"WARN: Unable to resolve '{server_tag}' ({ex}), using the Version Catalog.")
+        else:
+            _add_to_catalog(server_tag, url, tag, checksum)
+            try:
+                save_catalog()
+            except OSError:
+                pass
+            return url, tag, checksum
+
+    entry = load_catalog()["entries"].get(server_tag)
+    if entry is None:
+        raise LookupError(f"'{server_tag}' is not in the Version Catalog, run 'mcctl sync {server_tag}' first.")
+    return entry["url"], entry["tag"], tuple(entry["checksum"]) if entry["checksum"] else None
+
+
+def sync(sources: list = None, jobs: int = 8) -> None:
+    """Refresh the Version Catalog.
+
+    All 'latest' Type IDs and the given Type IDs are resolved in parallel. Pinned Versions already in the
+    Catalog do not change upstream and are kept.
+
+    Keyword Arguments:
+        sources (list): Additional Type IDs to add to the Catalog. (default: {None})
+        jobs (int): The Amount of parallel Requests. (default: {8})
+    """
+    catalog = load_catalog()
+    server_tags = {f"{x}:latest" for x in SOURCES} | {"vanilla:latest-snap"}
+    server_tags |= {x for x in catalog["entries"] if "latest" in x}
+    server_tags |= set(sources or [])
+
+    failed = 0
+    with ThreadPoolExecutor(jobs) as executor:
+        futures = {x: executor.submit(resolve_download_url, x) for x in sorted(server_tags)}
+        for server_tag, future in futures.items():
+            try:
+                url, tag, checksum = future.result()
+            except Exception as ex:
+                failed += 1
+                print(f"WARN: Unable to resolve '{server_tag}': {ex}")
+                continue
+            _add_to_catalog(server_tag, url, tag, checksum)
+            print(f"{server_tag:<24} {tag}")
+
+    catalog["synced"] = time.time()
+    save_catalog()
+    print(f"Synced {len(server_tags) - failed} of {len(server_tags)} Type IDs, "
+          f"{len(catalog['entries'])} Entries in the Catalog.")
+
+
+def get_session():
+    """Return the shared HTTP Session.
+
+    The Session keeps Connections to each Host open in a Pool, so repeated Requests skip the TCP and TLS Handshakes.
+    requests is only imported here, as most Commands do not need it and it is slow to import.
+
+    Returns:
+        requests.Session: The shared Session.
+    """
+    global _SESSION
+    if _SESSION is None:
+        import requests as req  # pylint: disable=import-outside-toplevel
+        _SESSION = req.Session()
+        _SESSION.headers['User-Agent'] = 'curl/7.4'
+        adapter = req.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        _SESSION.mount("http://", adapter)
+        _SESSION.mount("https://", adapter)
+    return _SESSION
+
+
+def get_cache_path(url: str) -> Path:
+    """Return the Path of the cached Response of an URL.
+
+    Arguments:
+        url (str): The URL of the Response.
+
+    Returns:
+        Path: The Path of the Cache Entry.
+    """
+    url_hash = hashlib.sha1(url.encode()).hexdigest()
+    return storage.get_home_path() / ".cache" / "http" / f"{url_hash}.json"
+
+
+def cached_get(url: str) -> str:
+    """Send a get request, reusing a cached Response if possible.
+
+    Responses are cached on disk. Within the TTL set by 'http_cache_ttl', the cached Response is returned without
+    a Request. After that, a conditional Request with the ETag and Last-Modified Header is sent, which costs only a
+    '304 Not Modified' if the Resource did not change.
+
+    Arguments:
+        url (str): The target to query.
+
+    Returns:
+        str: The Body of the Response.
+    """
+    cache_path = get_cache_path(url)
+    try:
+        with open(cache_path) as cache_file:
+            entry = json.load(cache_file)
+    except (OSError, ValueError):
+        entry = {}
+    if entry.get("url") != url:
+        entry = {}
+
+    ttl = CFGVARS.getint('system', 'http_cache_ttl')
+    if entry and time.time() - entry.get("fetched", 0) < ttl:
+        return entry["body"]
+
+    header = {}
+    if entry.get("etag"):
+        header["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        header["If-Modified-Since"] = entry["last_modified"]
+    response = get_session().get(url, headers=header, timeout=5)
+    if response.status_code == 304 and entry:
+        entry["fetched"] = time.time()
+    else:
+        response.raise_for_status()
+        entry = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched": time.time(),
+            "body": response.text
+        }
+
+    try:
+        storage.create_dirs(cache_path.parent)
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}")
+        with open(tmp_path, "w") as cache_file:
+            json.dump(entry, cache_file)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # The Cache is an Optimization, a missing Permission must not break Requests.
+        pass
+    return entry["body"]
 
 
 def rest_get(url: str) -> dict:
     """Send a get request and parse response form JSON.
 
-    A HTTP GET request is sent to the specified URL. The response is parsed into a dict.
+    A HTTP GET request is sent to the specified URL, see cached_get(). The response is parsed into a dict.
 
     Arguments:
         url (str): The target to query.
@@ -164,16 +386,13 @@ def rest_get(url: str) -> dict:
     Returns:
         dict: Deserialized JSON Data.
     """
-    header = {'User-Agent': 'curl/7.4'}
-    response = req.get(url, headers=header, timeout=5)
-    response.raise_for_status()
-    return response.json()
+    return json.loads(cached_get(url))
 
 
 def scrape_get(url: str, expr: str) -> list:
     """Send a get request and filter response with regex.
 
-    A HTTP GET request is sent to the specified URL. The regex matches are returned.
+    A HTTP GET request is sent to the specified URL, see cached_get(). The regex matches are returned.
 
     Arguments:
         url (str): The target to query.
@@ -182,38 +401,195 @@ def scrape_get(url: str, expr: str) -> list:
     Returns:
         list: List of matches
     """
-    header = {'User-Agent': 'curl/7.4'}
-    response = req.get(url, headers=header, timeout=5)
-    response.raise_for_status()
-    return re.findall(expr, response.text)
+    return re.findall(expr, cached_get(url))
 
 
-def download(url: str, dest: Path) -> None:
+def _fetch_segment(url: str, segment_path: Path, start: int, end: int, report: Callable, retries: int,
+                   total: int = 0, validator: str = None) -> None:
+    """Download a Byte Range of a File into a Segment File, resuming where a previous Attempt stopped.
+
+    Arguments:
+        url (str): The target to query.
+        segment_path (Path): The File the Range is written to.
+        start (int): The first Byte of the Range.
+        end (int): The last Byte of the Range, or None if the Size is unknown and Ranges are not supported.
+        report (Callable): Called with the Amount of Bytes written.
+        retries (int): The Amount of Attempts after an interrupted Transfer.
+
+    Keyword Arguments:
+        total (int): The Size of the whole File, checked against the Content-Range. (default: {0})
+        validator (str): The ETag or Last-Modified Value of the File, sent as If-Range. (default: {None})
+
+    Raises:
+        IOError: If the Transfer still fails after all Retries, or the File changed on the Server.
+    """
+    import requests as req  # pylint: disable=import-outside-toplevel
+    length = None if end is None else end - start + 1
+    for attempt in range(retries + 1):
+        offset = segment_path.stat().st_size if segment_path.exists() and end is not None else 0
+        if length is not None and offset >= length:
+            return
+        header = {}
+        if end is not None:
+            header["Range"] = f"bytes={start + offset}-{end}"
+            if validator:
+                # The Server sends the whole File instead of the Range if it has changed.
+                header["If-Range"] = validator
+        try:
+            with get_session().get(url, headers=header, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+                response.raise_for_status()
+                if end is not None:
+                    if response.status_code != 206:
+                        raise IOError("Server ignored the requested Range, the File may have changed")
+                    match = re.match(r"bytes (\d+)-\d+/(\d+|\*)", response.headers.get("content-range", ""))
+                    if not match or int(match.group(1)) != start + offset or \
+                            match.group(2) not in ("*", str(total)):
+                        raise IOError("Unexpected Content-Range in Response")
+                    remaining = length - offset
+                else:
+                    # The Length of encoded Responses does not match the decoded Content.
+                    encoded = response.headers.get("content-encoding", "identity") != "identity"
+                    expected = response.headers.get("content-length")
+                    remaining = int(expected) if expected and not encoded else None
+                with open(segment_path, "ab" if offset else "wb") as segment_hnd:
+                    for data in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                        if remaining is not None and end is not None:
+                            # Never write beyond the Range, the Segments are concatenated unchecked.
+                            data = data[:remaining]
+                        segment_hnd.write(data)
+                        report(len(data))
+                        if remaining is not None:
+                            remaining -= len(data)
+                            if remaining <= 0 and end is not None:
+                                break
+            if remaining is None or remaining == 0:
+                return
+        except (req.ConnectionError, req.Timeout, req.exceptions.ChunkedEncodingError):
+            pass
+        if attempt < retries:
+            time.sleep(min(2 ** attempt * 0.5, 10))
+    raise IOError(f"Download of '{url}' failed after {retries + 1} Attempts")
+
+
+def _probe(url: str) -> tuple:
+    """Query the final URL, Size and Validator of a File with a HEAD Request.
+
+    Arguments:
+        url (str): The target to query.
+
+    Returns:
+        tuple: The URL after Redirects, the Size (0 if unknown), the ETag or Last-Modified Value (None if there is
+               no strong Validator) and if Ranges are supported. Ranges are unsupported if HEAD is rejected.
+    """
+    import requests as req  # pylint: disable=import-outside-toplevel
+    try:
+        response = get_session().head(url, allow_redirects=True, timeout=DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+    except req.RequestException:
+        # Some Hosts reject HEAD, e.g. with 405 or 403. The File is downloaded with a single GET.
+        return url, 0, None, False
+    etag = response.headers.get("etag")
+    # Weak ETags are not allowed in If-Range.
+    validator = etag if etag and not etag.startswith("W/") else response.headers.get("last-modified")
+    total_length = int(response.headers.get("content-length", 0))
+    ranges = bool(total_length) and response.headers.get("accept-ranges") == "bytes"
+    return response.url, total_length, validator, ranges
+
+
+def download(url: str, dest: Path, checksum: tuple = None, parts: int = 4, retries: int = 5,
+             on_progress: Callable = None) -> None:
     """Download a file with progress report.
 
-    A file is downloaded from a webserver, progress is shown via the reporthook-Parameter.
+    The File is downloaded into '.part'-Files next to the Destination, which are resumed with HTTP Range Requests
+    after an Interruption. Large Files are split into several Ranges that are downloaded in parallel. The Ranges,
+    Size and Validator are recorded in a '.part.json'-File, Segments are only resumed if they all still match.
+    The File is only moved to the Destination once it is complete, has the expected Size and its Checksum matches.
 
     Arguments:
         url (str): The target to query.
         dest (Path): The path where to save the recieved file to.
+
+    Keyword Arguments:
+        checksum (tuple): The expected Checksum as (algorithm, hex digest), e.g. ("sha1", "..."). (default: {None})
+        parts (int): The maximum Amount of Ranges downloaded in parallel. (default: {4})
+        retries (int): The Amount of Attempts per Range after an interrupted Transfer. (default: {5})
+        on_progress (Callable): Called with the loaded and the total Bytes instead of printing the Progress.
+                                (default: {None})
+
+    Raises:
+        ValueError: If the downloaded File does not match the Checksum.
+        IOError: If the downloaded File does not have the announced Size.
     """
-    response = req.get(url, stream=True)
-    with open(dest, "wb") as dest_hnd:
-        total_length = int(response.headers.get('content-length', 0))
+    url, total_length, validator, ranges = _probe(url)
+    if ranges:
+        count = max(1, min(parts, total_length // PART_MIN_SIZE))
+        bounds = [[total_length * x // count, total_length * (x + 1) // count - 1] for x in range(count)]
+    else:
+        bounds = [[0, None]]
+    segments = [dest.with_name(f"{dest.name}.part{idx}") for idx in range(len(bounds))]
 
-        if not total_length:
-            dest_hnd.write(response.content)
-        else:
-            chunk_size = 4096
-            loaded = 0
-            inital = time.time()
-            for data in response.iter_content(chunk_size):
-                loaded += len(data)
-                dest_hnd.write(data)
-                elapsed = time.time() - inital
-                progress(loaded, elapsed, total_length)
+    meta_path = dest.with_name(f"{dest.name}.part.json")
+    meta = {"url": url, "size": total_length, "validator": validator, "bounds": bounds}
+    try:
+        resumable = ranges and validator and json.loads(meta_path.read_text()) == meta
+    except (OSError, ValueError):
+        resumable = False
+    if resumable:
+        for segment, (start, end) in zip(segments, bounds):
+            if segment.exists() and segment.stat().st_size > end - start + 1:
+                os.truncate(segment, end - start + 1)
+    else:
+        # Leftovers of a different File, Version or Split, or without Validator to tell.
+        for leftover in dest.parent.iterdir():
+            if leftover.name.startswith(f"{dest.name}.part"):
+                leftover.unlink()
+        meta_path.write_text(json.dumps(meta))
+
+    loaded = [sum(x.stat().st_size for x in segments if x.exists() and ranges)]
+    lock = threading.Lock()
+    inital = time.time()
+
+    def report(size: int) -> None:
+        with lock:
+            loaded[0] += size
+            if on_progress:
+                on_progress(loaded[0], total_length)
+            elif total_length:
+                progress(loaded[0], time.time() - inital, total_length)
+
+    with ThreadPoolExecutor(len(bounds)) as executor:
+        futures = [executor.submit(_fetch_segment, url, segment, start, end, report, retries, total_length, validator)
+                   for segment, (start, end) in zip(segments, bounds)]
+        for future in futures:
+            future.result()
+    if not on_progress:
         print()
 
+    tmp_path = dest.with_name(f"{dest.name}.part")
+    hasher = hashlib.new(checksum[0]) if checksum else None
+    size = 0
+    with open(tmp_path, "wb") as dest_hnd:
+        for segment in segments:
+            with open(segment, "rb") as segment_hnd:
+                for data in iter(lambda: segment_hnd.read(DOWNLOAD_CHUNK_SIZE), b""):
+                    if hasher:
+                        hasher.update(data)
+                    size += len(data)
+                    dest_hnd.write(data)
+        dest_hnd.flush()
+        os.fsync(dest_hnd.fileno())
+    for segment in segments:
+        segment.unlink()
+    meta_path.unlink()
+
+    if total_length and size != total_length:
+        tmp_path.unlink()
+        raise IOError(f"Size mismatch: expected {total_length} Bytes, got {size}")
+    if hasher and hasher.hexdigest() != checksum[1].lower():
+        tmp_path.unlink()
+        raise ValueError(f"Checksum mismatch: expected {checksum[0]} {checksum[1]}, got {hasher.hexdigest()}")
+    os.replace(tmp_path, dest)
+
 
 def progress(current: int, elapsed: float, total: int) -> None:
     """Print Progress.
@@ -248,35 +624,155 @@ def join_url(base: str, *parts: str) -> str:
     return f"{base.rstrip('/')}/{path}"
 
 
-def pull(source: str, literal_url: bool = False) -> tuple:
-    """Download a minecraft server jar by type tag.
-
-    A .jar-file is determined by the type tag and saved to disk.
+def resolve(source: str, literal_url: bool = False, offline: bool = False) -> tuple:
+    """Resolve a type tag or URL to its download URL, Tag and Checksum.
 
     Arguments:
         source (str): The type tag of a server or a URL.
 
     Keyword Arguments:
         literal_url (bool): Specifies if the source variable contains an URL or a type tag. (default: {False})
+        offline (bool): Resolve the type tag with the Version Catalog. (default: {False})
 
     Returns:
-        Path: The path of the saved .jar-file.
+        tuple: A tuple with the download URL, the complete, resolved Tag and the Checksum or None.
     """
     if literal_url:
-        url = source
         # Generate artificial Version Tag
-        url_hash = hashlib.sha1(url.encode()).hexdigest()
-        tag = f"other/{url_hash[:12]}"
-    else:
-        url, tag = get_download_url(source)
+        url_hash = hashlib.sha1(source.encode()).hexdigest()
+        return source, f"other/{url_hash[:12]}", None
+    return get_download_url(source, offline)
 
-    print(f"Pulling version '{tag}'")
+
+def fetch(url: str, tag: str, checksum: tuple, offline: bool = False, on_progress: Callable = None) -> bool:
+    """Download a resolved .jar-file into the Jar Cache, unless it is cached already.
+
+    Arguments:
+        url (str): The download URL.
+        tag (str): The resolved Tag.
+        checksum (tuple): The expected Checksum or None.
+
+    Keyword Arguments:
+        offline (bool): Only use cached Files. (default: {False})
+        on_progress (Callable): Passed to download(). (default: {None})
+
+    Raises:
+        FileNotFoundError: If offline and the .jar-file is not cached.
+
+    Returns:
+        bool: True if the File was downloaded, False if it was cached.
+    """
     dest = storage.get_jar_path(tag)
+    if dest.is_file():
+        jars.touch(tag)
+        return False
+    if offline:
+        raise FileNotFoundError(f"'{tag}' is not cached and can not be downloaded offline.")
+    storage.create_dirs(dest.parent)
+    download(url, dest, checksum, on_progress=on_progress)
+    jars.add(dest, tag)
+    return True
+
+
+def pull(source: str, literal_url: bool = False, offline: bool = False) -> tuple:
+    """Download a minecraft server jar by type tag.
+
+    A .jar-file is determined by the type tag and saved to disk.
+
+    Arguments:
+        source (str): The type tag of a server or a URL.
+
+    Keyword Arguments:
+        literal_url (bool): Specifies if the source variable contains an URL or a type tag. (default: {False})
+        offline (bool): Resolve the type tag with the Version Catalog and only use cached Files. (default: {False})
+
+    Raises:
+        FileNotFoundError: If offline and the .jar-file is not cached.
 
-    if not dest.is_file():
-        storage.create_dirs(dest.parent)
-        download(url, dest)
+    Returns:
+        Path: The path of the saved .jar-file.
+    """
+    url, tag, checksum = resolve(source, literal_url, offline)
+    print(f"Pulling version '{tag}'")
+    if fetch(url, tag, checksum, offline):
+        for evicted in jars.evict(keep=[tag]):
+            print(f"Evicted '{evicted}' from the Jar Cache.")
     else:
         print("Already cached, no download required.")
 
-    return dest, tag
+    return storage.get_jar_path(tag), tag
+
+
+def pull_many(sources: list = None, literal_url: bool = False, offline: bool = False, manifest: Path = None,
+              jobs: int = 4) -> None:
+    """Download many minecraft server jars concurrently.
+
+    All Sources are resolved first, Sources resolving to the same Tag are downloaded only once. The Downloads
+    run in a bounded Pool, their Progress is shown combined.
+
+    Keyword Arguments:
+        sources (list): Type tags of servers or URLs. (default: {None})
+        literal_url (bool): Specifies if the sources contain URLs instead of type tags. (default: {False})
+        offline (bool): Resolve the type tags with the Version Catalog and only use cached Files. (default: {False})
+        manifest (Path): A File with further Sources, one per Line. Empty Lines and '#'-Comments are ignored.
+                         (default: {None})
+        jobs (int): The Amount of concurrent Downloads. (default: {4})
+
+    Raises:
+        IOError: If any Source failed to resolve or download.
+    """
+    sources = list(sources or [])
+    if manifest:
+        with open(manifest) as manifest_file:
+            lines = (x.split("#", 1)[0].strip() for x in manifest_file)
+            sources.extend(x for x in lines if x)
+    sources = list(dict.fromkeys(sources))
+    if not sources:
+        raise ValueError("No Type IDs or URLs supplied.")
+
+    failed = {}
+    targets = {}
+    with ThreadPoolExecutor(max(min(jobs, len(sources)), 1)) as executor:
+        futures = {x: executor.submit(resolve, x, literal_url, offline) for x in sources}
+        for source, future in futures.items():
+            try:
+                url, tag, checksum = future.result()
+            except Exception as ex:
+                failed[source] = ex
+                continue
+            targets.setdefault(tag, (url, checksum, []))[2].append(source)
+
+    states = {x: (0, 0) for x in targets}
+    lock = threading.Lock()
+    inital = time.time()
+
+    def on_progress(tag: str, loaded: int, total: int) -> None:
+        with lock:
+            states[tag] = (loaded, total)
+            total_length = sum(x[1] for x in states.values())
+            if total_length:
+                progress(sum(x[0] for x in states.values()), time.time() - inital, total_length)
+
+    downloaded = []
+    with ThreadPoolExecutor(max(min(jobs, len(targets)), 1)) as executor:
+        futures = {tag: executor.submit(fetch, url, tag, checksum, offline, lambda x, y, tag=tag: on_progress(tag, x, y))
+                   for tag, (url, checksum, _) in targets.items()}
+        for tag, future in futures.items():
+            try:
+                if future.result():
+                    downloaded.append(tag)
+            except Exception as ex:
+                failed.update({x: ex for x in targets[tag][2]})
+    if downloaded:
+        print()
+
+    for tag, (_, _, tag_sources) in sorted(targets.items()):
+        status = "Pulled" if tag in downloaded else "Cached"
+        if tag_sources[0] not in failed:
+            print(f"{status:8} {tag:24} {', '.join(tag_sources)}")
+    for evicted in jars.evict(keep=list(targets)):
+        print(f"Evicted '{evicted}' from the Jar Cache.")
+    for source, ex in failed.items():
+        print(f"Failed   {source}: {ex}")
+    if failed:
+        raise IOError(f"{len(failed)} of {len(sources)} Sources could not be pulled.")
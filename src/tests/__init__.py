@@ -0,0 +1,18 @@
+# pylint: skip-file
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from mcctl import storage
+
+
+class HomeTestCase(unittest.TestCase):
+    """Runs each Test with an empty temporary Directory as the Home of the Server User, see self.home."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.home = Path(self.tmpdir.name)
+        patch = mock.patch.object(storage, "get_home_path", return_value=self.home)
+        patch.start()
+        self.addCleanup(patch.stop)
@@ -0,0 +1,134 @@
+# pylint: skip-file
+import os
+from unittest import mock
+from mcctl import backup, storage
+from tests import HomeTestCase
+
+
+class TestBackup(HomeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.server_path = self.home / "instances" / "test"
+        (self.server_path / "world" / "region").mkdir(parents=True)
+        (self.server_path / "server.properties").write_text("level-name=world\n")
+        (self.server_path / "world" / "level.dat").write_bytes(os.urandom(1000))
+        (self.server_path / "world" / "region" / "r.0.0.mca").write_bytes(
+            os.urandom(backup.CHUNK_MAX * 3 + 5))
+
+    def get_chunk_count(self):
+        return sum(1 for x in (backup.get_repo_path() / "chunks").rglob("*") if x.is_file())
+
+    def test_incremental(self):
+        backup.create("test")
+        chunk_count = self.get_chunk_count()
+        manifest = backup.load_manifest("test", backup.get_snapshots("test")[-1])
+        self.assertEqual(chunk_count, len({y for x in manifest["files"] for y in x.get("chunks", [])}))
+
+        region = self.server_path / "world" / "region" / "r.0.0.mca"
+        with open(region, "r+b") as region_file:
+            region_file.seek(backup.CHUNK_MAX + 10)
+            region_file.write(b"changed")
+        os.utime(region, ns=(0, 0))
+        with mock.patch.object(backup, "_store_file", wraps=backup._store_file) as store_file:
+            backup.create("test")
+            store_file.assert_called_once_with(region)
+        # Only the Chunk containing the Change, and at most the following one if its Boundary moved.
+        self.assertIn(self.get_chunk_count() - chunk_count, (1, 2))
+        self.assertEqual(len(backup.get_snapshots("test")), 2)
+
+        backup.restore("test", "latest", "restored")
+        restored_path = storage.get_instance_path("restored")
+        for rel_path in storage.get_relative_paths(self.server_path):
+            original = self.server_path / rel_path
+            if original.is_file():
+                self.assertEqual((restored_path / rel_path).read_bytes(), original.read_bytes())
+                self.assertEqual((restored_path / rel_path).stat().st_mtime_ns, original.stat().st_mtime_ns)
+
+    def test_insertion(self):
+        data = os.urandom(2 * 1024**2)
+        data_path = self.server_path / "world" / "data.bin"
+        data_path.write_bytes(data)
+        before = backup._store_file(data_path)
+        data_path.write_bytes(b"inserted" + data)
+        after = backup._store_file(data_path)
+        self.assertGreater(len(before), 8)
+        self.assertLessEqual(len(set(after) - set(before)), 2)
+        self.assertEqual(b"".join(backup.load_chunk(x) for x in after), b"inserted" + data)
+        self.assertTrue(all(len(backup.load_chunk(x)) <= backup.CHUNK_MAX for x in after))
+
+    def test_duplicates_parallel(self):
+        data = os.urandom(backup.CHUNK_MAX * 2)
+        for idx in range(16):
+            (self.server_path / "world" / f"copy{idx}.dat").write_bytes(data)
+        backup.create("test", jobs=8)
+        chunk_dir = backup.get_repo_path() / "chunks"
+        self.assertEqual([x for x in chunk_dir.rglob("*.tmp")], [])
+        backup.restore("test", "latest", "restored")
+        restored_path = storage.get_instance_path("restored") / "world"
+        for idx in range(16):
+            self.assertEqual((restored_path / f"copy{idx}.dat").read_bytes(), data)
+
+    def test_hot(self):
+        commands = []
+
+        def console(instance, command, **kwargs):
+            commands.append(command)
+            yield ""
+
+        with mock.patch.object(storage.service, "is_active", return_value=True), \
+                mock.patch.object(storage.proc, "console", side_effect=console):
+            backup.create("test", hot=True)
+        self.assertEqual(commands, ["save-off", "save-all flush", "save-on"])
+        self.assertFalse((storage.get_home_path() / "staging" / f"test.{os.getpid()}").exists())
+
+        backup.restore("test", "latest", "restored")
+        restored = storage.get_instance_path("restored") / "world" / "level.dat"
+        self.assertEqual(restored.read_bytes(), (self.server_path / "world" / "level.dat").read_bytes())
+
+    def test_hot_already_off(self):
+        commands = []
+
+        def console(instance, command, **kwargs):
+            commands.append(command)
+            yield "Saving is already turned off" if command == "save-off" else ""
+
+        with mock.patch.object(storage.service, "is_active", return_value=True), \
+                mock.patch.object(storage.proc, "console", side_effect=console):
+            backup.create("test", hot=True)
+        self.assertEqual(commands, ["save-off", "save-all flush"])
+
+
+def make_region(payloads):
+    """Create a Region File with the given Chunk Payloads by Index, one Sector each."""
+    header = bytearray(backup.REGION_HEADER_SIZE)
+    sectors = []
+    for idx, (timestamp, data) in sorted(payloads.items()):
+        location = 2 + len(sectors)
+        header[idx * 4:idx * 4 + 4] = location.to_bytes(3, "big") + b"\x01"
+        header[4096 + idx * 4:4096 + idx * 4 + 4] = timestamp.to_bytes(4, "big")
+        payload = len(data).to_bytes(4, "big") + data
+        sectors.append(payload.ljust(backup.SECTOR_SIZE, b"\0"))
+    return bytes(header) + b"".join(sectors)
+
+
+class TestRegionBackup(HomeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.region = self.home / "instances" / "test" / "world" / "region" / "r.0.0.mca"
+        self.region.parent.mkdir(parents=True)
+        self.payloads = {x: (1000 + x, b"\x02" + os.urandom(100)) for x in (0, 5, 1023)}
+        self.region.write_bytes(make_region(self.payloads))
+
+    def test_delta(self):
+        backup.create("test")
+        self.payloads[5] = (2000, b"\x02" + os.urandom(100))
+        self.region.write_bytes(make_region(self.payloads))
+
+        with mock.patch.object(backup, "store_chunk", wraps=backup.store_chunk) as store_chunk:
+            backup.create("test")
+            # Only the Header and the changed Chunk are read.
+            self.assertEqual(store_chunk.call_count, 2)
+
+        backup.restore("test", "latest", "restored")
+        restored = storage.get_instance_path("restored") / "world" / "region" / "r.0.0.mca"
+        self.assertEqual(restored.read_bytes(), self.region.read_bytes())
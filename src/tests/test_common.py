@@ -0,0 +1,37 @@
+# pylint: skip-file
+import time
+import socket
+from unittest import mock
+from mcctl import common
+from tests import HomeTestCase
+
+
+class TestStatus(HomeTestCase):
+    def setUp(self):
+        super().setUp()
+        # Accepts Connections but never answers, like a hung Server.
+        self.listener = socket.socket()
+        self.listener.bind(("localhost", 0))
+        self.listener.listen(4)
+        instance_path = self.home / "instances" / "test"
+        instance_path.mkdir(parents=True)
+        (instance_path / "server.properties").write_text(
+            f"server-port={self.listener.getsockname()[1]}\nmax-players=20\n")
+
+    def tearDown(self):
+        self.listener.close()
+
+    def test_hung_ping_times_out(self):
+        started = time.monotonic()
+        self.assertIsNone(common.get_status("test", timeout=0.3))
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_list_passes_timeout(self):
+        with mock.patch.object(common, "get_status", return_value=None) as get_status, \
+                mock.patch.object(common.service, "query_states", return_value={"test": {}}) as query_states, \
+                mock.patch.object(common.service, "get_state") as get_state, \
+                mock.patch("sys.stdout"):
+            common.get_instance_list(timeout=0.5)
+        get_status.assert_called_once_with("test", 0.5)
+        query_states.assert_called_once_with(["test"])
+        get_state.assert_not_called()
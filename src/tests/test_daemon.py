@@ -0,0 +1,103 @@
+# pylint: skip-file
+import io
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+from pwd import getpwnam
+from mcctl import daemon, storage, CFGVARS
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.socket_path = Path(self.tmpdir.name) / "mcctld.sock"
+        self.patches = [
+            mock.patch.dict(CFGVARS['system'], {"daemon_socket": str(self.socket_path), "server_user": "nobody"}),
+            mock.patch.object(daemon, "is_permitted", side_effect=lambda uid: uid == os.getuid())
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.server = daemon._Server(str(self.socket_path), daemon._RequestHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        for patch in self.patches:
+            patch.stop()
+        self.tmpdir.cleanup()
+
+    def request(self, argv):
+        out = io.StringIO()
+        with mock.patch("sys.stdout", out):
+            exit_code = daemon.request(argv)
+        return exit_code, out.getvalue()
+
+    def test_output(self):
+        def mc_ls(what, filter_str=''):
+            print(f"Listing {what} {filter_str}")
+
+        with mock.patch("mcctl.common.mc_ls", new=mc_ls):
+            exit_code, out = self.request(["ls", "instances", "-f", "test"])
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(out, "Listing instances test\n")
+
+    def test_error(self):
+        with mock.patch("mcctl.common.mc_ls", side_effect=OSError("broken")):
+            exit_code, out = self.request(["ls", "instances"])
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(out, "Unable to list instances: broken\n")
+
+    def test_not_served(self):
+        exit_code, out = self.request(["rm", "test"])
+        self.assertEqual(exit_code, 1)
+
+    def test_binary_output(self):
+        log_dir = Path(self.tmpdir.name) / "instances" / "test" / "logs"
+        log_dir.mkdir(parents=True)
+        (log_dir / "latest.log").write_text("[12:00:00] [Server thread/INFO]: Done\n[12:00:01] other\n")
+        messages = []
+        with mock.patch.object(storage, "get_home_path", return_value=Path(self.tmpdir.name)), \
+                mock.patch.object(daemon, "drop_privileges"):
+            self.assertEqual(daemon.serve(["inspect", "test", "--grep", "Done"], messages.append), 0)
+        self.assertEqual("".join(x["out"] for x in messages), "[12:00:00] [Server thread/INFO]: Done\n")
+
+    def test_invalid_instance(self):
+        for name in ("../etc", "a/b", ".."):
+            exit_code, out = self.request(["inspect", name])
+            self.assertEqual(exit_code, 2, name)
+
+    def test_root_action_needs_root(self):
+        messages = []
+        with mock.patch("mcctl.__main__.LOGIN_USER", "nobody"), \
+                mock.patch("mcctl.service.set_status_many") as set_status:
+            self.assertIsNone(daemon.serve(["start", "test"], messages.append, uid=65534))
+        set_status.assert_not_called()
+
+    @unittest.skipUnless(os.getuid() == 0, "Dropping Privileges requires root")
+    def test_no_root_writes_for_server_user(self):
+        nobody = getpwnam("nobody")
+        home = Path(self.tmpdir.name) / "home"
+        log_dir = home / "instances" / "test" / "logs"
+        log_dir.mkdir(parents=True)
+        os.chmod(self.tmpdir.name, 0o755)
+        for path in (home, home / "instances", home / "instances" / "test", log_dir):
+            os.chown(path, nobody.pw_uid, nobody.pw_gid)
+        (log_dir / "latest.log").write_text("[12:00:00] [Server thread/INFO]: Done\n")
+        target = Path(self.tmpdir.name) / "root_owned"
+        target.write_text("untouched")
+        # Planted by the Server User, the Daemon must not follow it as root.
+        (log_dir / ".index.json.tmp").symlink_to(target)
+        with mock.patch.object(storage, "get_home_path", return_value=home):
+            self.request(["inspect", "test", "--grep", "Done"])
+        self.assertEqual(target.read_text(), "untouched")
+        self.assertEqual(target.stat().st_uid, 0)
+
+    def test_unavailable(self):
+        self.server.server_close()
+        self.socket_path.unlink()
+        self.assertIsNone(daemon.request(["ls", "instances"]))
@@ -0,0 +1,51 @@
+# pylint: skip-file
+import threading
+import urllib.request
+from unittest import mock
+from mcctl import exporter
+from tests import HomeTestCase
+
+
+class TestExporter(HomeTestCase):
+    def setUp(self):
+        super().setUp()
+        instance_path = self.home / "instances" / "test"
+        instance_path.mkdir(parents=True)
+        (instance_path / "jvm-env").write_text("MEM=2G\n")
+
+    def test_probe(self):
+        state = {"ActiveState": "active", "MemoryCurrent": 2**30, "CPUUsageNSec": 3 * 10**9}
+        status = mock.Mock(latency=12.5, players=mock.Mock(online=3, max=20), version=mock.Mock(protocol=754))
+        with mock.patch.object(exporter.common, "get_status", return_value=status):
+            values = exporter.probe("test", state)
+        self.assertEqual(values["mcctl_up"], 1)
+        self.assertEqual(values["mcctl_ready"], 1)
+        self.assertEqual(values["mcctl_players_max"], 20)
+        self.assertEqual(values["mcctl_memory_limit_bytes"], 2 * 1024**3)
+        self.assertEqual(values["mcctl_cpu_seconds_total"], 3.0)
+        self.assertAlmostEqual(values["mcctl_ping_latency_seconds"], 0.0125)
+
+    def test_probe_inactive(self):
+        with mock.patch.object(exporter.common, "get_status") as get_status:
+            values = exporter.probe("test", {"ActiveState": "inactive", "MemoryCurrent": None})
+        get_status.assert_not_called()
+        self.assertEqual(values["mcctl_up"], 0)
+        self.assertNotIn("mcctl_memory_bytes", values)
+        self.assertNotIn("mcctl_players_online", values)
+
+    def test_serve(self):
+        exporter._SNAPSHOT = exporter.render({"test": {"mcctl_up": 1, "mcctl_players_online": 2}}, 0.1)
+        server = exporter._Server(("127.0.0.1", 0), exporter._MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url) as response:
+                self.assertEqual(response.headers["Content-Type"], exporter.CONTENT_TYPE)
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertIn("# TYPE mcctl_up gauge\n", body)
+        self.assertIn('mcctl_up{instance="test"} 1\n', body)
+        self.assertIn('mcctl_players_online{instance="test"} 2\n', body)
+        self.assertNotIn("mcctl_players_max{", body)
@@ -0,0 +1,58 @@
+# pylint: skip-file
+import os
+from mcctl import jars, storage
+from tests import HomeTestCase
+
+
+class TestJars(HomeTestCase):
+    def setUp(self):
+        super().setUp()
+        for instance in ("one", "two"):
+            storage.get_instance_path(instance).mkdir(parents=True)
+        self.data = os.urandom(1000)
+        download = storage.get_jar_path("vanilla:1.16.4")
+        download.parent.mkdir(parents=True)
+        download.write_bytes(self.data)
+
+    def test_install(self):
+        jar_hash = jars.add(storage.get_jar_path("vanilla:1.16.4"), "vanilla:1.16.4")
+        jars.install("vanilla:1.16.4", "one")
+        jars.install("vanilla:1.16.4", "two")
+        object_path = jars.get_object_path(jar_hash)
+        for instance in ("one", "two"):
+            server_jar = storage.get_instance_path(instance) / "server.jar"
+            self.assertEqual(server_jar.read_bytes(), self.data)
+            self.assertTrue(os.path.samefile(server_jar, object_path))
+        self.assertEqual(jars.get_ref_counts(), {jar_hash: 2})
+
+        jars.rename("two", "three")
+        jars.release(tag="vanilla:1.16.4")
+        jars.release(instance="one")
+        self.assertTrue(object_path.is_file())
+        jars.release(instance="three")
+        self.assertFalse(object_path.exists())
+
+    def test_legacy(self):
+        jars.install("vanilla:1.16.4", "one")
+        self.assertEqual((storage.get_instance_path("one") / "server.jar").read_bytes(), self.data)
+        self.assertEqual(storage.get_jar_path("vanilla:1.16.4").stat().st_nlink, 3)
+
+    def test_evict(self):
+        jars.install("vanilla:1.16.4", "one")
+        for version, used in (("1.16.2", 100), ("1.16.3", 200)):
+            jar_path = storage.get_jar_path(f"vanilla:{version}")
+            jar_path.write_bytes(os.urandom(1000))
+            jar_hash = jars.add(jar_path, f"vanilla:{version}")
+            with jars.refs() as index:
+                index["objects"][jar_hash]["used"] = used
+
+        self.assertEqual(jars.evict(1, keep=["vanilla:1.16.2", "vanilla:1.17"]), ["vanilla:1.16.3"])
+        self.assertEqual(jars.evict(1), ["vanilla:1.16.2"])
+        self.assertFalse(storage.get_jar_path("vanilla:1.16.2").exists())
+        self.assertTrue(storage.get_jar_path("vanilla:1.16.4").is_file())
+
+    def test_migrate(self):
+        jars.migrate()
+        with jars.refs() as index:
+            self.assertEqual(list(index["tags"]), ["vanilla:1.16.4"])
+            self.assertEqual(index["version"], jars.INDEX_VERSION)
@@ -0,0 +1,154 @@
+# pylint: skip-file
+import io
+import os
+import gzip
+import time
+import unittest
+import tempfile
+import threading
+from pathlib import Path
+from datetime import datetime
+from mcctl import logs
+
+
+class TestTail(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.log_path = Path(self.tmpdir.name) / "latest.log"
+        self.log_path.write_text("old line\n")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def append(self, text):
+        with open(self.log_path, "a") as log_file:
+            log_file.write(text)
+
+    def test_appended(self):
+        with logs.tail(self.log_path) as log:
+            self.assertListEqual(logs.read_appended(log), [])
+            self.append("first\nsecond\nincompl")
+            self.assertListEqual(logs.read_appended(log), ["first", "second"])
+            self.append("ete\n")
+            self.assertListEqual(logs.read_appended(log), ["incomplete"])
+
+    def test_wakeup(self):
+        with logs.tail(self.log_path) as log:
+            timer = threading.Timer(0.1, self.append, ("delayed\n",))
+            timer.start()
+            started = time.monotonic()
+            self.assertListEqual(logs.read_appended(log, 5), ["delayed"])
+            self.assertLess(time.monotonic() - started, 2)
+            timer.join()
+
+    def test_truncated(self):
+        with logs.tail(self.log_path) as log:
+            self.log_path.write_text("new\n")
+            self.assertListEqual(logs.read_appended(log), ["new"])
+
+    def test_rotated(self):
+        with logs.tail(self.log_path) as log:
+            self.append("last old\n")
+            os.rename(self.log_path, self.log_path.with_name("rotated.log"))
+            self.log_path.write_text("first new\n")
+            self.assertListEqual(logs.read_appended(log), ["last old", "first new"])
+
+
+class TestWriteTail(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.log_dir = Path(self.tmpdir.name)
+        # Rotated Logs with 3 Lines each, "-10" is newer than "-2".
+        lines = 0
+        for name in ("2020-11-20-1", "2020-11-20-2", "2020-11-20-10", "2020-11-21-1"):
+            with gzip.open(self.log_dir / f"{name}.log.gz", "wt") as log_file:
+                for _ in range(3):
+                    log_file.write(f"line {lines}\n")
+                    lines += 1
+        with open(self.log_dir / "latest.log", "w") as log_file:
+            for _ in range(3):
+                log_file.write(f"line {lines}\n")
+                lines += 1
+        (self.log_dir / "debug.log").write_text("not a log\n")
+        self.expected = [f"line {x}\n" for x in range(lines)]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def get_tail(self, limit):
+        out = io.BytesIO()
+        logs.write_tail(self.log_dir, limit, out)
+        return out.getvalue().decode().splitlines(keepends=True)
+
+    def test_order(self):
+        names = [x.name for x in logs.get_log_files(self.log_dir)]
+        self.assertListEqual(names, ["2020-11-20-1.log.gz", "2020-11-20-2.log.gz",
+                                     "2020-11-20-10.log.gz", "2020-11-21-1.log.gz", "latest.log"])
+
+    def test_limits(self):
+        for limit in (1, 2, 3, 4, 7, 15, 100):
+            self.assertListEqual(self.get_tail(limit), self.expected[-limit:])
+
+    def test_all(self):
+        self.assertListEqual(self.get_tail(0), self.expected)
+
+
+class TestIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.log_dir = Path(self.tmpdir.name)
+        with gzip.open(self.log_dir / "2020-11-20-1.log.gz", "wt") as log_file:
+            log_file.write("[22:00:00] [Server thread/INFO]: Starting minecraft server\n"
+                           "[23:30:00] [Server thread/INFO]: Steve joined the game\n"
+                           "\tat some.stack.Trace\n"
+                           "[00:10:00] [Server thread/INFO]: Alex left the game\n")
+        with gzip.open(self.log_dir / "2020-11-21-1.log.gz", "wt") as log_file:
+            log_file.write("[08:00:00 INFO]: Starting minecraft server\n"
+                           "[09:00:00 INFO]: Herobrine joined the game\n")
+        latest = self.log_dir / "latest.log"
+        latest.write_text("[10:00:00] [Server thread/INFO]: Notch joined the game\n")
+        mtime = datetime(2020, 11, 22, 10, 0).timestamp()
+        os.utime(latest, (mtime, mtime))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def get_lines(self, **kwargs):
+        out = io.BytesIO()
+        logs.write_filtered(self.log_dir, out=out, **kwargs)
+        return out.getvalue().decode().splitlines()
+
+    def test_index(self):
+        index = logs.update_index(self.log_dir)
+        entry = index["2020-11-20-1.log.gz"]
+        self.assertEqual(entry["lines"], 4)
+        self.assertListEqual(entry["first"], [0, 22 * 3600])
+        self.assertListEqual(entry["last"], [1, 10 * 60])
+        self.assertTrue((self.log_dir / logs.INDEX_NAME).is_file())
+        # Unchanged Files are not scanned again.
+        self.assertEqual(logs.update_index(self.log_dir), index)
+
+    def test_time_range(self):
+        lines = self.get_lines(since=datetime(2020, 11, 19, 23, 0), until=datetime(2020, 11, 21, 8, 30))
+        self.assertListEqual(lines, [
+            "[23:30:00] [Server thread/INFO]: Steve joined the game",
+            "\tat some.stack.Trace",
+            "[00:10:00] [Server thread/INFO]: Alex left the game",
+            "[08:00:00 INFO]: Starting minecraft server"])
+        lines = self.get_lines(since=datetime(2020, 11, 22))
+        self.assertListEqual(lines, ["[10:00:00] [Server thread/INFO]: Notch joined the game"])
+
+    def test_grep(self):
+        self.assertListEqual(self.get_lines(grep=" joined the "), [
+            "[23:30:00] [Server thread/INFO]: Steve joined the game",
+            "[09:00:00 INFO]: Herobrine joined the game",
+            "[10:00:00] [Server thread/INFO]: Notch joined the game"])
+        self.assertListEqual(self.get_lines(grep="brine joined", limit=1),
+                             ["[09:00:00 INFO]: Herobrine joined the game"])
+        self.assertListEqual(self.get_lines(grep=" Creeper "), [])
+
+    def test_bloom(self):
+        bloom = logs._bloom_create({b"joined", b"game"})
+        self.assertTrue(logs._bloom_contains(bloom, [b"joined", b"game"]))
+        self.assertFalse(logs._bloom_contains(bloom, [b"Creeper"]))
+        self.assertListEqual(logs._literal_tokens(b"brine joined the ga"), [b"joined", b"the"])
@@ -1,6 +1,7 @@
 # pylint: skip-file
 import unittest
 import inspect
+from unittest import mock
 from mcctl.__main__ import get_parser
 
 
@@ -32,6 +33,22 @@ class TestParserMappings(unittest.TestCase):
         self.assertListEqual(sorted(kwargs), sorted(params_ok))
         self.assertListEqual(params, [])
 
+    def test_backup(self):
+        args = self.parser.parse_args("backup testserver -w".split())
+        params_ok = ["action"]
+        params_ok.extend(self.param_base)
+        kwargs, params = get_missing(vars(args), args.func)
+        self.assertListEqual(sorted(kwargs), sorted(params_ok))
+        self.assertListEqual(params, [])
+
+    def test_collect(self):
+        args = self.parser.parse_args("collect -i 5".split())
+        params_ok = ["action"]
+        params_ok.extend(self.param_base)
+        kwargs, params = get_missing(vars(args), args.func)
+        self.assertListEqual(sorted(kwargs), sorted(params_ok))
+        self.assertListEqual(params, [])
+
     def test_config(self):
         args = self.parser.parse_args(
             "config testserver -p motd=TestServer".split())
@@ -68,6 +85,14 @@ class TestParserMappings(unittest.TestCase):
         self.assertListEqual(sorted(kwargs), sorted(params_ok))
         self.assertListEqual(params, kwargs_ok)
 
+    def test_exporter(self):
+        args = self.parser.parse_args("exporter -p 9000".split())
+        params_ok = ["action"]
+        params_ok.extend(self.param_base)
+        kwargs, params = get_missing(vars(args), args.func)
+        self.assertListEqual(sorted(kwargs), sorted(params_ok))
+        self.assertListEqual(params, [])
+
     def test_inspect(self):
         args = self.parser.parse_args("inspect testserver -n 10".split())
         params_ok = ["action"]
@@ -92,6 +117,14 @@ class TestParserMappings(unittest.TestCase):
         self.assertListEqual(sorted(kwargs), sorted(params_ok))
         self.assertListEqual(params, [])
 
+    def test_pull_many(self):
+        args = self.parser.parse_args("pull vanilla:latest paper:latest -j 2".split())
+        params_ok = ["action"]
+        params_ok.extend(self.param_base)
+        kwargs, params = get_missing(vars(args), args.func)
+        self.assertListEqual(sorted(kwargs), sorted(params_ok))
+        self.assertListEqual(params, [])
+
     def test_rename(self):
         args = self.parser.parse_args("rename testserver testsrv".split())
         params_ok = ["action"]
@@ -109,6 +142,24 @@ class TestParserMappings(unittest.TestCase):
         self.assertListEqual(sorted(kwargs), sorted(params_ok))
         self.assertListEqual(params, kwargs_ok)
 
+    def test_restart_many(self):
+        args = self.parser.parse_args("restart testserver other -m yeet -R -d 60 -w".split())
+        self.assertEqual(args.instances, ["testserver", "other"])
+        kwargs_ok = ['persistent']
+        params_ok = []
+        params_ok.extend(self.param_base)
+        kwargs, params = get_missing(vars(args), args.func)
+        self.assertListEqual(sorted(kwargs), sorted(params_ok))
+        self.assertListEqual(params, kwargs_ok)
+
+    def test_restore(self):
+        args = self.parser.parse_args("restore testserver latest -t testsrv".split())
+        params_ok = ["action"]
+        params_ok.extend(self.param_base)
+        kwargs, params = get_missing(vars(args), args.func)
+        self.assertListEqual(sorted(kwargs), sorted(params_ok))
+        self.assertListEqual(params, [])
+
     def test_rm(self):
         args = self.parser.parse_args("rm testserver".split())
         kwargs_ok = ['confirm']
@@ -143,6 +194,46 @@ class TestParserMappings(unittest.TestCase):
         self.assertListEqual(sorted(kwargs), sorted(params_ok))
         self.assertListEqual(params, [])
 
+    def test_start_many(self):
+        args = self.parser.parse_args("start --all -j 8 -w -t 30".split())
+        self.assertTrue(args.all_instances)
+        kwargs_ok = ['message']
+        params_ok = []
+        params_ok.extend(self.param_base)
+        kwargs, params = get_missing(vars(args), args.func)
+        self.assertListEqual(sorted(kwargs), sorted(params_ok))
+        self.assertListEqual(params, kwargs_ok)
+
+    def test_stop_many(self):
+        args = self.parser.parse_args("stop lobby-* survival -p".split())
+        self.assertEqual(args.instances, ["lobby-*", "survival"])
+        params_ok = []
+        params_ok.extend(self.param_base)
+        kwargs, params = get_missing(vars(args), args.func)
+        self.assertListEqual(sorted(kwargs), sorted(params_ok))
+        self.assertListEqual(params, [])
+
+    def test_rolling_restart_only(self):
+        for action in ("start", "stop"):
+            with self.assertRaises(SystemExit), mock.patch("sys.stderr"):
+                self.parser.parse_args(f"{action} testserver -R".split())
+
+    def test_stats(self):
+        args = self.parser.parse_args("stats testserver -s 1h".split())
+        params_ok = ["action"]
+        params_ok.extend(self.param_base)
+        kwargs, params = get_missing(vars(args), args.func)
+        self.assertListEqual(sorted(kwargs), sorted(params_ok))
+        self.assertListEqual(params, [])
+
+    def test_sync(self):
+        args = self.parser.parse_args("sync paper:1.16.4:latest -j 4".split())
+        params_ok = ["action"]
+        params_ok.extend(self.param_base)
+        kwargs, params = get_missing(vars(args), args.func)
+        self.assertListEqual(sorted(kwargs), sorted(params_ok))
+        self.assertListEqual(params, [])
+
     def test_update(self):
         args = self.parser.parse_args(
             "update testserver vanilla:latest".split())
@@ -152,6 +243,19 @@ class TestParserMappings(unittest.TestCase):
         self.assertListEqual(sorted(kwargs), sorted(params_ok))
         self.assertListEqual(params, [])
 
+    def test_update_many(self):
+        args = self.parser.parse_args(
+            "update lobby-* survival vanilla:latest -r -d 60".split())
+        self.assertEqual(args.instances, ["lobby-*", "survival"])
+        self.assertEqual(args.jobs, 1)
+        for action in ("start", "stop", "restart"):
+            self.assertEqual(self.parser.parse_args([action, "lobby-*"]).jobs, 4)
+        params_ok = ["action"]
+        params_ok.extend(self.param_base)
+        kwargs, params = get_missing(vars(args), args.func)
+        self.assertListEqual(sorted(kwargs), sorted(params_ok))
+        self.assertListEqual(params, [])
+
     def test_shell(self):
         args = self.parser.parse_args("shell testserver".split())
         params_ok = ["action"]
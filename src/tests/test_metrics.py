@@ -0,0 +1,51 @@
+# pylint: skip-file
+import io
+from unittest import mock
+from mcctl import metrics
+from tests import HomeTestCase
+
+
+class TestRing(HomeTestCase):
+    def test_wrap_around(self):
+        with metrics.open_ring("test", capacity=10) as ring:
+            for idx in range(25):
+                metrics.append(ring, (1000.0 + idx, 2**20, idx * 10**9, 1.5, idx % 3, 0, 0))
+        samples = metrics.read("test")
+        self.assertEqual([x[0] for x in samples], [1000.0 + x for x in range(15, 25)])
+        samples = metrics.read("test", since=1020, until=1022.5)
+        self.assertEqual([x[0] for x in samples], [1020.0, 1021.0, 1022.0])
+
+    def test_sample(self):
+        state = {"ActiveState": "active", "MemoryCurrent": 2**30, "CPUUsageNSec": None}
+        lines = ["[12:00:00] [Server thread/WARN]: Can't keep up! Is the server overloaded? "
+                 "Running 2500ms or 50 ticks behind", "[12:00:01] [Server thread/INFO]: Done"]
+        status = mock.Mock(latency=12.5, players=mock.Mock(online=3))
+        with mock.patch.object(metrics.logs, "read_appended", return_value=lines), \
+                mock.patch.object(metrics.common, "get_status", return_value=status):
+            record = metrics.sample("test", state, log={})
+        self.assertEqual(record[1:], (2**30, metrics._UNSET, 12.5, 3, 1, 50))
+
+    def test_collect_unreachable(self):
+        states = {x: {"ActiveState": "active"} for x in ("a", "b")}
+        status = mock.Mock(latency=12.5, players=mock.Mock(online=3))
+
+        def get_status(instance):
+            if instance == "a":
+                raise TypeError("missing server-port")
+            return status
+
+        with mock.patch.object(metrics.service, "query_states", return_value=states), \
+                mock.patch.object(metrics.common, "get_status", side_effect=get_status):
+            metrics.collect(interval=0, count=1)
+        self.assertEqual(metrics.read("a")[0][4], -1)
+        self.assertEqual(metrics.read("b")[0][4], 3)
+
+    def test_stats(self):
+        with metrics.open_ring("test") as ring:
+            for idx in range(11):
+                metrics.append(ring, (1000.0 + idx * 10, 2**30, idx * 5 * 10**9, 10.0, 4, 0, 20 if idx == 5 else 0))
+        out = io.StringIO()
+        with mock.patch("sys.stdout", out):
+            metrics.stats("test", rows=1)
+        row = out.getvalue().splitlines()[1].split()
+        self.assertEqual(row[2:], ["4.0", "(4)", "10.0ms", "1024MB", "50%", "19.8", "0"])
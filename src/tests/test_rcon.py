@@ -0,0 +1,149 @@
+# pylint: skip-file
+import struct
+import socket
+import unittest
+import threading
+from unittest import mock
+from mcctl import rcon, proc, service
+from tests import HomeTestCase
+
+PASSWORD = "hunter2"
+
+
+def recv_packet(conn):
+    header = conn.recv(4, socket.MSG_WAITALL)
+    if len(header) < 4:
+        return None
+    length, = struct.unpack("<i", header)
+    data = conn.recv(length, socket.MSG_WAITALL)
+    request_id, packet_type = struct.unpack("<ii", data[:8])
+    return request_id, packet_type, data[8:-2].decode()
+
+
+def send_packet(conn, request_id, packet_type, body):
+    payload = struct.pack("<ii", request_id, packet_type) + body.encode() + b"\0\0"
+    conn.sendall(struct.pack("<i", len(payload)) + payload)
+
+
+class FakeRconServer(threading.Thread):
+    """Minimal RCON Server behaving like the one of Minecraft."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.sock = socket.socket()
+        self.sock.bind(("localhost", 0))
+        self.sock.listen()
+        self.port = self.sock.getsockname()[1]
+        self.connections = 0
+        self.clients = []
+
+    def run(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            self.clients.append(conn)
+            threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+    def handle(self, conn):
+        authenticated = False
+        while True:
+            packet = recv_packet(conn)
+            if packet is None:
+                conn.close()
+                return
+            request_id, packet_type, body = packet
+            if packet_type == rcon.SERVERDATA_AUTH:
+                authenticated = body == PASSWORD
+                send_packet(conn, request_id if authenticated else -1,
+                            rcon.SERVERDATA_AUTH_RESPONSE, "")
+            elif packet_type == rcon.SERVERDATA_EXECCOMMAND and authenticated:
+                if body == "long":
+                    for part in ("a" * 4096, "b" * 4096, "c"):
+                        send_packet(conn, request_id, rcon.SERVERDATA_RESPONSE_VALUE, part)
+                else:
+                    send_packet(conn, request_id, rcon.SERVERDATA_RESPONSE_VALUE, f"Executed {body}")
+            else:
+                send_packet(conn, request_id, rcon.SERVERDATA_RESPONSE_VALUE,
+                            f"Unknown request {packet_type:x}")
+
+    def drop_clients(self):
+        for conn in self.clients:
+            conn.shutdown(socket.SHUT_RDWR)
+        self.clients = []
+
+    def stop(self):
+        self.sock.close()
+
+
+class TestRcon(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRconServer()
+        self.server.start()
+
+    def tearDown(self):
+        rcon.close()
+        self.server.stop()
+
+    def test_command(self):
+        sock = rcon.connect(self.server.port, PASSWORD)
+        self.assertEqual(rcon.command(sock, "list"), "Executed list")
+        self.assertEqual(rcon.command(sock, "long"), "a" * 4096 + "b" * 4096 + "c")
+        sock.close()
+
+    def test_wrong_password(self):
+        with self.assertRaises(PermissionError):
+            rcon.connect(self.server.port, "wrong")
+
+    def test_pooled(self):
+        settings = {"port": self.server.port, "password": PASSWORD}
+        with mock.patch.object(rcon, "get_settings", return_value=settings):
+            for _ in range(3):
+                self.assertEqual(rcon.execute("test", "list"), "Executed list")
+            self.assertEqual(self.server.connections, 1)
+
+            self.server.drop_clients()
+            self.assertEqual(rcon.execute("test", "list"), "Executed list")
+            self.assertEqual(self.server.connections, 2)
+
+
+class TestConsoleFallback(HomeTestCase):
+    def setUp(self):
+        super().setUp()
+        log_path = self.home / "instances" / "test" / "logs" / "latest.log"
+        log_path.parent.mkdir(parents=True)
+        log_path.touch()
+        self.patches = [
+            mock.patch.object(rcon, "is_enabled", return_value=True),
+            mock.patch.object(proc.service, "is_active", return_value=True),
+            mock.patch.object(proc.common, "is_ready", return_value=True),
+            mock.patch.object(proc, "demote"),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def test_auth_failure_uses_screen(self):
+        with mock.patch.object(rcon, "execute", side_effect=PermissionError("RCON Authentication failed.")), \
+                mock.patch.object(proc, "sproc") as sproc, mock.patch("sys.stderr"):
+            lines = list(proc.console("test", "list", max_retries=1, max_flush_retries=1))
+        self.assertEqual(lines, [])
+        self.assertIn("mc-test", sproc.Popen.call_args[0][0])
+
+    def test_timeout(self):
+        with mock.patch.object(rcon, "execute", side_effect=socket.timeout()), \
+                mock.patch.object(proc, "sproc") as sproc:
+            with self.assertRaises(ConnectionError):
+                list(proc.console("test", "list"))
+        sproc.Popen.assert_not_called()
+
+    def test_stop_continues_on_timeout(self):
+        with mock.patch.object(rcon, "execute", side_effect=socket.timeout()), \
+                mock.patch.object(service, "set_status") as set_status:
+            service.notified_set_status("test", "stop")
+        set_status.assert_called_once_with("test", "stop", False, 120.0)
@@ -0,0 +1,154 @@
+# pylint: skip-file
+import unittest
+import time
+import threading
+from unittest import mock
+from mcctl import service
+from mcctl.service import parse_unit_properties
+from tests import HomeTestCase
+
+
+class TestUnitProperties(unittest.TestCase):
+    def test_parse_multiple(self):
+        output = ("ActiveState=active\nSubState=running\nUnitFileState=enabled\n"
+                  "MainPID=1234\nMemoryCurrent=104857600\nCPUUsageNSec=5000000\n\n"
+                  "ActiveState=inactive\nSubState=dead\nUnitFileState=disabled\n"
+                  "MainPID=0\nMemoryCurrent=[not set]\nCPUUsageNSec=18446744073709551615\n")
+        units = parse_unit_properties(output)
+        self.assertEqual(len(units), 2)
+        self.assertEqual(units[0]["ActiveState"], "active")
+        self.assertEqual(units[0]["MainPID"], 1234)
+        self.assertEqual(units[0]["MemoryCurrent"], 104857600)
+        self.assertEqual(units[1]["UnitFileState"], "disabled")
+        self.assertIsNone(units[1]["MemoryCurrent"])
+        self.assertIsNone(units[1]["CPUUsageNSec"])
+
+    def test_enabled_states(self):
+        # Exit Codes of "systemctl is-enabled" for each UnitFileState.
+        expected = {"enabled": True, "enabled-runtime": True, "static": True, "indirect": True, "generated": True,
+                    "transient": True, "alias": True, "linked": False, "linked-runtime": False, "masked": False,
+                    "masked-runtime": False, "disabled": False, "bad": False}
+        for state, enabled in expected.items():
+            unit = parse_unit_properties(f"ActiveState=inactive\nUnitFileState={state}\n")[0]
+            with mock.patch.object(service, "get_state", return_value=unit):
+                self.assertEqual(service.is_enabled("test"), enabled, state)
+
+
+class TestWait(HomeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.log_path = self.home / "instances" / "test" / "logs" / "latest.log"
+        self.log_path.parent.mkdir(parents=True)
+
+    def test_ready_on_done_line(self):
+        def write_done():
+            with open(self.log_path, "a") as log_file:
+                log_file.write('[12:00:00] [Server thread/INFO]: Done (4.213s)! For help, type "help"\n')
+
+        self.log_path.write_text("[11:59:59] [Server thread/INFO]: Starting minecraft server\n")
+        timer = threading.Timer(0.3, write_done)
+        with mock.patch.object(service, "get_state", return_value={"ActiveState": "activating"}), \
+                mock.patch.object(service.common, "is_ready", return_value=False) as is_ready:
+            timer.start()
+            service.wait_ready("test", timeout=5)
+        timer.join()
+        self.assertLessEqual(is_ready.call_count, 3)
+
+    def test_ready_on_ping(self):
+        with mock.patch.object(service, "get_state", return_value={"ActiveState": "active"}), \
+                mock.patch.object(service.common, "is_ready", side_effect=[False, False, True]):
+            service.wait_ready("test", timeout=5)
+
+    def test_unit_failed(self):
+        with mock.patch.object(service, "get_state", return_value={"ActiveState": "failed"}), \
+                mock.patch.object(service.common, "is_ready", return_value=False):
+            with self.assertRaises(OSError):
+                service.wait_ready("test", timeout=5)
+
+    def test_stop_timeout(self):
+        with mock.patch.object(service, "get_state", return_value={"ActiveState": "deactivating"}):
+            with self.assertRaises(TimeoutError):
+                service.wait_stopped("test", timeout=0.3)
+
+
+class TestSetStatusMany(HomeTestCase):
+    def setUp(self):
+        super().setUp()
+        for name, priority in (("lobby-1", None), ("lobby-2", "5"), ("survival", "10"), ("creative", "x")):
+            instance_path = self.home / "instances" / name
+            instance_path.mkdir(parents=True)
+            if priority is not None:
+                (instance_path / "jvm-env").write_text(f"MEM=1G\nPRIORITY={priority}\n")
+
+    def test_match(self):
+        self.assertEqual(service.match_instances(["lobby-*", "lobby-1"]), ["lobby-1", "lobby-2"])
+        self.assertEqual(len(service.match_instances([], all_instances=True)), 4)
+        with self.assertRaises(FileNotFoundError):
+            service.match_instances(["missing"])
+
+    def test_priority_order(self):
+        with mock.patch.object(service, "notified_set_status") as set_status:
+            service.set_status_many([], "start", all_instances=True, jobs=1)
+        started = [x[0][0] for x in set_status.call_args_list]
+        self.assertEqual(started[:2], ["survival", "lobby-2"])
+        self.assertEqual(sorted(started[2:]), ["creative", "lobby-1"])
+        # Every Start waits for the Server to be ready before the next one is admitted.
+        self.assertTrue(all(x[0][4] for x in set_status.call_args_list))
+
+    def test_concurrency_limit(self):
+        lock = threading.Lock()
+        running, peak = [0], [0]
+
+        def set_status(*args):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+
+        with mock.patch.object(service, "notified_set_status", side_effect=set_status):
+            service.set_status_many([], "stop", all_instances=True, jobs=2)
+        self.assertEqual(peak[0], 2)
+
+    def test_failure(self):
+        with mock.patch.object(service, "notified_set_status", side_effect=[None, OSError("x"), None, None]):
+            with self.assertRaises(OSError):
+                service.set_status_many(["*"], "stop", jobs=1)
+
+
+class TestRollingRestart(unittest.TestCase):
+    def test_empty_first(self):
+        players = {"a": 0, "b": 3, "c": 0}
+        with mock.patch.object(service, "get_players", side_effect=players.get), \
+                mock.patch.object(service, "_countdown_restart") as restart, \
+                mock.patch.object(service, "DRAIN_POLL", 0.05):
+            started = time.monotonic()
+            service.rolling_restart(["b", "a", "c"], max_down=1, drain=0.3)
+        self.assertEqual([x[0][0] for x in restart.call_args_list], ["a", "c", "b"])
+        self.assertGreaterEqual(time.monotonic() - started, 0.3)
+
+    def test_countdown(self):
+        with mock.patch.object(service, "RESTART_WARNINGS", (0.2, 0.1)), \
+                mock.patch.object(service, "get_players", return_value=2), \
+                mock.patch.object(service.proc, "mc_exec") as mc_exec, \
+                mock.patch.object(service, "notified_set_status") as set_status:
+            service._countdown_restart("a", "Update")
+        self.assertEqual(mc_exec.call_count, 2)
+        self.assertIn("0.2", mc_exec.call_args_list[0][0][1])
+        set_status.assert_called_once_with("a", "restart", "Update", wait=True, timeout=120.0)
+
+    def test_countdown_emptied(self):
+        with mock.patch.object(service, "get_players", side_effect=[2, 0]), \
+                mock.patch.object(service.proc, "mc_exec") as mc_exec, \
+                mock.patch.object(service, "notified_set_status"):
+            service._countdown_restart("a")
+        mc_exec.assert_not_called()
+
+    def test_restart_many_rolling(self):
+        with mock.patch.object(service, "match_instances", return_value=["a", "b"]), \
+                mock.patch.object(service, "query_states", return_value={"a": {"ActiveState": "inactive"},
+                                                                          "b": {"ActiveState": "active"}}), \
+                mock.patch.object(service, "rolling_restart") as rolling_restart:
+            service.restart_many(["*"], rolling=True, jobs=2, drain=60)
+        rolling_restart.assert_called_once_with(["b"], 2, 60, '', 120.0)
@@ -0,0 +1,34 @@
+# pylint: skip-file
+import sys
+import json
+import unittest
+import subprocess
+from pathlib import Path
+
+# Modules that are slow to import and must only be loaded by the Commands that need them.
+HEAVY_MODULES = ("requests", "mcstatus", "zipfile", "zlib", "concurrent.futures", "mcctl.web", "mcctl.common",
+                 "mcctl.storage", "mcctl.backup", "mcctl.service")
+
+# Budget for the Modules newly imported to parse a Command, independent of the Load of the Machine.
+# About 30 are needed today, importing requests alone would add about 60.
+MAX_MODULES = 50
+
+# Modules the Interpreter loaded on its own (e.g. through .pth Files) are not counted.
+SCRIPT = """
+import sys, json
+preloaded = set(sys.modules)
+from mcctl.__main__ import get_parser
+get_parser().parse_args(["attach", "test"])
+print(json.dumps(sorted(set(sys.modules) - preloaded)))
+"""
+
+
+class TestStartup(unittest.TestCase):
+    def test_lazy_imports(self):
+        result = subprocess.run([sys.executable, "-c", SCRIPT], stdout=subprocess.PIPE, check=True,
+                                cwd=Path(__file__).parents[1])
+        modules = json.loads(result.stdout)
+        self.assertIn("mcctl.__main__", modules)
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, modules)
+        self.assertLessEqual(len(modules), MAX_MODULES, modules)
@@ -0,0 +1,101 @@
+# pylint: skip-file
+import os
+import zipfile
+import unittest
+import tempfile
+from pathlib import Path
+from pwd import getpwuid
+from unittest import mock
+from mcctl import storage
+from tests import HomeTestCase
+
+
+class TestWalk(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name)
+        for sub_dir in ("world/region", "world_nether/DIM-1", "logs", "b"):
+            (self.path / sub_dir).mkdir(parents=True)
+            (self.path / sub_dir / "r.0.0.mca").write_bytes(b"x" * 10)
+        (self.path / "server.jar").touch()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_order(self):
+        expected = [x.relative_to(self.path) for x in sorted(self.path.rglob("*"))]
+        self.assertEqual(storage.get_relative_paths(self.path), expected)
+
+    def test_filter(self):
+        world = storage.get_relative_paths(self.path, "world")
+        self.assertEqual(world[0], Path("world"))
+        self.assertTrue(all(x.parts[0].startswith("world") for x in world))
+        self.assertEqual(len(world), 6)
+        regions = {x: y.stat().st_size for x, y in storage.walk(self.path, ".mca", -1)}
+        self.assertEqual(len(regions), 4)
+        self.assertEqual(set(regions.values()), {10})
+
+
+@unittest.skipUnless(os.getuid() == 0, "Changing Owners requires root")
+class TestChown(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name) / "instance"
+        for sub_dir in ("world/region", "world/data", "logs"):
+            (self.path / sub_dir).mkdir(parents=True)
+            for idx in range(3):
+                (self.path / sub_dir / f"{idx}.dat").touch()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_changed_count(self):
+        user = getpwuid(0).pw_name
+        self.assertEqual(storage.chown(self.path, user), 0)
+        os.chown(self.path / "world" / "region" / "1.dat", 1, 1)
+        os.chown(self.path / "logs", 1, 1)
+        self.assertEqual(storage.chown(self.path, user), 2)
+        self.assertEqual((self.path / "logs").stat().st_uid, 0)
+        self.assertEqual(storage.chown(self.path, user), 0)
+
+
+class TestExport(HomeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = self.home / "instances" / "test"
+        self.files = {
+            "server.properties": b"level-name=world\n",
+            "empty.txt": b"",
+            "wörld/région/r.0.0.mca": os.urandom(300 * 1024) + b"\0" * 200 * 1024,
+            "wörld/data/deep/nested/idcounts.dat": b"abc" * 1000,
+            "logs/latest.log": b"",
+        }
+        for name, data in self.files.items():
+            (self.path / name).parent.mkdir(parents=True, exist_ok=True)
+            (self.path / name).write_bytes(data)
+        (self.path / "empty_dir").mkdir()
+
+    def check_archive(self, zip_path):
+        with zipfile.ZipFile(zip_path) as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            names = set(zip_file.namelist())
+            self.assertIn("empty_dir/", names)
+            for name, data in self.files.items():
+                self.assertEqual(zip_file.read(name), data, name)
+                self.assertEqual(zip_file.getinfo(name).compress_type, zipfile.ZIP_DEFLATED)
+
+    def export(self, **kwargs):
+        zip_path = self.home / "export.zip"
+        with mock.patch.object(storage.os, "getlogin", side_effect=OSError(6, "No such device or address")), \
+                mock.patch("sys.stdout"):
+            storage.export("test", zip_path, compress=True, **kwargs)
+        return zip_path
+
+    def test_parallel(self):
+        zip_path = self.export(jobs=4, level=9)
+        self.check_archive(zip_path)
+
+    def test_without_internals(self):
+        with mock.patch.object(storage, "can_write_compressed", return_value=False):
+            zip_path = self.export(jobs=4)
+        self.check_archive(zip_path)
@@ -0,0 +1,245 @@
+# pylint: skip-file
+import os
+import re
+import json
+import hashlib
+import tempfile
+import threading
+import unittest
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+from mcctl import web
+from tests import HomeTestCase
+
+RESOLVE = web.resolve_download_url
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    data = b""
+    etag = '"v1"'
+    allow_head = True
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, body):
+        match = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        if match and if_range in (None, self.etag):
+            start, end = int(match.group(1)), int(match.group(2))
+            if self.command == "GET":
+                self.requests.append((start, end))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(body)}")
+            body = body[start:end + 1]
+        else:
+            if self.command == "GET":
+                self.requests.append(None)
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", self.etag)
+        self.end_headers()
+        return body
+
+    def do_HEAD(self):
+        if not self.allow_head:
+            self.send_error(405)
+            return
+        self.send_body(self.data)
+
+    def do_GET(self):
+        self.wfile.write(self.send_body(self.data))
+
+
+class ManifestHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.requests.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = b'{"latest": {"release": "1.16.4"}}'
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestDownload(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dest = Path(self.tmpdir.name) / "server.jar"
+        RangeHandler.data = os.urandom(3 * 1024 * 1024 + 7)
+        RangeHandler.requests = []
+        RangeHandler.etag = '"v1"'
+        RangeHandler.allow_head = True
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/server.jar"
+        self.patch = mock.patch.object(web, "PART_MIN_SIZE", 1024 * 1024)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmpdir.cleanup()
+
+    def test_parallel(self):
+        checksum = ("sha1", hashlib.sha1(RangeHandler.data).hexdigest())
+        web.download(self.url, self.dest, checksum)
+        self.assertEqual(self.dest.read_bytes(), RangeHandler.data)
+        self.assertEqual(len(RangeHandler.requests), 3)
+        self.assertEqual(list(self.dest.parent.iterdir()), [self.dest])
+
+    def write_parts(self, *parts, etag='"v1"'):
+        size = len(RangeHandler.data)
+        bounds = [[size * x // len(parts), size * (x + 1) // len(parts) - 1] for x in range(len(parts))]
+        meta = {"url": self.url, "size": size, "validator": etag, "bounds": bounds}
+        self.dest.with_name("server.jar.part.json").write_text(json.dumps(meta))
+        for idx, data in enumerate(parts):
+            self.dest.with_name(f"server.jar.part{idx}").write_bytes(data)
+
+    def test_resume(self):
+        self.write_parts(RangeHandler.data[:1000])
+        web.download(self.url, self.dest, parts=1)
+        self.assertEqual(self.dest.read_bytes(), RangeHandler.data)
+        self.assertEqual(RangeHandler.requests, [(1000, len(RangeHandler.data) - 1)])
+
+    def test_oversized_segment(self):
+        half = len(RangeHandler.data) // 2
+        # A stale first Segment that runs into the Range of the second one.
+        self.write_parts(RangeHandler.data[:half] + b"garbage", RangeHandler.data[half:half + 10])
+        web.download(self.url, self.dest, parts=2)
+        self.assertEqual(self.dest.read_bytes(), RangeHandler.data)
+        self.assertEqual(RangeHandler.requests, [(half + 10, len(RangeHandler.data) - 1)])
+
+    def test_changed_file(self):
+        self.write_parts(os.urandom(1000), etag='"v0"')
+        web.download(self.url, self.dest, parts=1)
+        self.assertEqual(self.dest.read_bytes(), RangeHandler.data)
+        self.assertEqual(RangeHandler.requests, [(0, len(RangeHandler.data) - 1)])
+
+    def test_unrecorded_segment(self):
+        self.dest.with_name("server.jar.part0").write_bytes(os.urandom(1000))
+        web.download(self.url, self.dest, parts=1)
+        self.assertEqual(self.dest.read_bytes(), RangeHandler.data)
+
+    def test_changed_during_download(self):
+        self.write_parts(RangeHandler.data[:1000])
+        with mock.patch.object(web, "_probe", return_value=(self.url, len(RangeHandler.data), '"v0"', True)):
+            self.dest.with_name("server.jar.part.json").unlink()
+            self.write_parts(RangeHandler.data[:1000], etag='"v0"')
+            with self.assertRaises(IOError):
+                web.download(self.url, self.dest, parts=1)
+        self.assertFalse(self.dest.exists())
+
+    def test_head_rejected(self):
+        RangeHandler.allow_head = False
+        web.download(self.url, self.dest)
+        self.assertEqual(self.dest.read_bytes(), RangeHandler.data)
+        self.assertEqual(RangeHandler.requests, [None])
+        self.assertEqual(list(self.dest.parent.iterdir()), [self.dest])
+
+    def test_checksum_mismatch(self):
+        with self.assertRaises(ValueError):
+            web.download(self.url, self.dest, ("sha1", "0" * 40))
+        self.assertEqual(list(self.dest.parent.iterdir()), [])
+
+
+class TestCachedGet(HomeTestCase):
+    def setUp(self):
+        super().setUp()
+        ManifestHandler.requests = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), ManifestHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/version_manifest.json"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_ttl(self):
+        expected = {"latest": {"release": "1.16.4"}}
+        self.assertEqual(web.rest_get(self.url), expected)
+        self.assertEqual(web.rest_get(self.url), expected)
+        self.assertEqual(ManifestHandler.requests, [None])
+
+        with mock.patch.dict(web.CFGVARS['system'], {"http_cache_ttl": "0"}):
+            self.assertEqual(web.rest_get(self.url), expected)
+        self.assertEqual(ManifestHandler.requests, [None, '"v1"'])
+
+
+class TestCatalog(HomeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.patches = [
+            mock.patch.object(web, "_CATALOG", None),
+            mock.patch.object(web, "resolve_download_url", side_effect=self.resolve)
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.resolved = []
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def resolve(self, server_tag):
+        self.resolved.append(server_tag)
+        if server_tag.startswith("vanilla:"):
+            return "https://example.org/server.jar", "vanilla:1.16.4", ("sha1", "ab" * 20)
+        raise requests.ConnectionError("unreachable")
+
+    def test_offline(self):
+        with self.assertRaises(LookupError):
+            web.get_download_url("vanilla:latest", offline=True)
+        web.sync()
+        self.assertIn("paper:latest", self.resolved)
+        self.resolved.clear()
+
+        web._CATALOG = None
+        expected = ("https://example.org/server.jar", "vanilla:1.16.4", ("sha1", "ab" * 20))
+        self.assertEqual(web.get_download_url("vanilla:latest", offline=True), expected)
+        self.assertEqual(web.get_download_url("vanilla:1.16.4", offline=True), expected)
+        self.assertEqual(self.resolved, [])
+        with self.assertRaises(LookupError):
+            web.get_download_url("paper:latest", offline=True)
+        with self.assertRaises(FileNotFoundError):
+            web.pull("vanilla:latest", offline=True)
+
+    def test_paper_unreachable(self):
+        expected = ("https://example.org/paper.jar", "paper:1.16.4:300", None)
+        web._add_to_catalog("paper:1.16.4:latest", *expected)
+        with mock.patch.object(web, "resolve_download_url", side_effect=RESOLVE), \
+                mock.patch.object(web, "rest_get", side_effect=requests.ConnectionError("unreachable")):
+            self.assertEqual(web.get_download_url("paper:1.16.4:latest"), expected)
+            with self.assertRaises(LookupError):
+                web.get_download_url("paper:1.16.3:latest")
+
+
+class TestPullMany(HomeTestCase):
+    def test_dedup(self):
+        tags = {"vanilla:latest": "vanilla:1.16.4", "vanilla:1.16.4": "vanilla:1.16.4", "paper:latest": "paper:1.16.4:300"}
+        manifest = self.home / "jars.txt"
+        manifest.write_text("# Versions\npaper:latest\n\nvanilla:1.16.4  # pinned\n")
+
+        def download(url, dest, checksum, on_progress=None):
+            on_progress(10, 10)
+            dest.write_bytes(url.encode())
+
+        with mock.patch.object(web, "get_download_url", side_effect=lambda x, y: (x, tags[x], None)), \
+                mock.patch.object(web, "download", side_effect=download) as download_mock:
+            web.pull_many(["vanilla:latest"], manifest=manifest)
+        self.assertEqual(download_mock.call_count, 2)
+        self.assertTrue(web.storage.get_jar_path("paper:1.16.4:300").is_file())